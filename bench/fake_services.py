@@ -0,0 +1,775 @@
+"""벤치마크용 로컬 가짜 API 서버
+
+Notion, iCloud CalDAV, GitHub, Telegram Bot API, Anthropic Messages API 중
+하루봇이 쓰는 엔드포인트만 흉내 내는 HTTP 서버 하나를 띄운다. 서비스는 경로 접두사로 나뉜다
+(/notion, /caldav, /github, /telegram, /anthropic).
+
+- 응답 지연과 요청 한도(초당 요청 수, 초과 시 429 + Retry-After)를 서비스별로 설정할 수 있다.
+- 데이터 규모(Notion 페이지 수, 캘린더 수, 커밋 수, 일기 DB 기간)는 Workload로 정한다.
+- 서비스/엔드포인트별 호출 수와 429 응답 수를 센다.
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+from xml.sax.saxutils import escape
+
+KST = timezone(timedelta(hours=9))
+
+GITHUB_USER = "bench-user"
+
+SERVICES = ("notion", "caldav", "github", "telegram", "anthropic")
+
+# Telegram 요약 메시지 끝 문구 — 이 문구가 담긴 메시지를 받으면 가짜 사용자가 답장한다
+SUMMARY_FOOTER = "코멘트를 남겨주세요"
+
+_WORDS = [
+    "회의", "리뷰", "배포", "설계", "문서", "정리", "테스트", "리팩터링", "운동", "독서",
+    "점심", "산책", "기획", "버그", "수정", "데이터", "분석", "발표", "준비", "공부",
+]
+
+
+@dataclass
+class Workload:
+    """가짜 서버에 채울 데이터 규모."""
+
+    notion_pages: int = 1000
+    notion_today: int = 40
+    calendars: int = 30
+    events_per_day: int = 2
+    event_days: int = 90
+    commits: int = 500
+    commit_days: int = 14
+    diary_years: int = 5
+    setting_ratio: float = 0.03
+    reply_delay: float = 1.0
+    seed: int = 42
+
+
+@dataclass
+class ServiceLimits:
+    """서비스 하나의 응답 지연(초)과 요청 한도(초당 요청 수, None이면 무제한)."""
+
+    latency: float = 0.0
+    rate: float | None = None
+    burst: int = 1
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _iso_z(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _rich_text(text: str) -> list[dict]:
+    return [{"type": "text", "text": {"content": text}, "plain_text": text}]
+
+
+class FakeWorld:
+    """가짜 서버가 돌려줄 데이터와 호출 통계."""
+
+    def __init__(self, workload: Workload, now: datetime | None = None):
+        self.workload = workload
+        self.now = now or datetime.now(KST)
+        self.today = self.now.date()
+        self.lock = threading.RLock()
+        self.calls = Counter()
+        self.throttled = Counter()
+        rng = random.Random(workload.seed)
+
+        self._build_notion(rng)
+        self._build_calendars(rng)
+        self._build_github(rng)
+
+        self.chat_id = 1000
+        self.updates = []
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.replied = False
+        self.updates_cond = threading.Condition(self.lock)
+
+    # --- 데이터 생성 ---
+
+    def _build_notion(self, rng: random.Random):
+        w = self.workload
+        day_start = datetime(self.today.year, self.today.month, self.today.day, tzinfo=KST)
+        self.todo_db = _uuid(rng)
+        self.project_db = _uuid(rng)
+        self.diary_db = _uuid(rng)
+        self.diary_ds = _uuid(rng)
+        self.databases = {
+            self.todo_db: "할일 목록",
+            self.project_db: "프로젝트",
+            self.diary_db: "하루 일기",
+        }
+
+        pages = []
+        for i in range(w.notion_pages):
+            if i < w.notion_today:
+                edited = day_start + (self.now - day_start) * rng.random()
+            else:
+                edited = day_start - timedelta(minutes=rng.randint(1, 365 * 24 * 60))
+            kind = rng.random()
+            if kind < 0.2:
+                parent = {"type": "database_id", "database_id": self.todo_db}
+            elif kind < 0.5:
+                parent = {"type": "database_id", "database_id": self.project_db}
+            else:
+                parent = {"type": "workspace", "workspace": True}
+            pages.append({
+                "object": "page",
+                "id": _uuid(rng),
+                "last_edited_time": _iso_z(edited.replace(second=0, microsecond=0)),
+                "parent": parent,
+                "properties": {
+                    "이름": {"type": "title", "title": _rich_text(_sentence(rng, 3))},
+                    "태그": {"type": "multi_select", "multi_select": [{"name": rng.choice(_WORDS)}]},
+                    "완료": {"type": "checkbox", "checkbox": rng.random() < 0.5},
+                },
+            })
+        pages.sort(key=lambda p: p["last_edited_time"], reverse=True)
+        self.notion_pages = pages
+
+        self.diary = {}
+        days = w.diary_years * 365
+        for n in range(1, days + 1):
+            d = self.today - timedelta(days=n)
+            edited = datetime(d.year, d.month, d.day, 21, tzinfo=KST)
+            page = {
+                "object": "page",
+                "id": _uuid(rng),
+                "last_edited_time": _iso_z(edited),
+                "parent": {"type": "data_source_id", "data_source_id": self.diary_ds},
+                "properties": {
+                    "summary": {"type": "title", "title": _rich_text(_sentence(rng, 12))},
+                    "date": {"type": "date", "date": {"start": d.isoformat()}},
+                    "comment": {"type": "rich_text", "rich_text": []},
+                    "setting": {
+                        "type": "rich_text",
+                        "rich_text": _rich_text(f"{rng.choice(_WORDS)} 위주로 정리") if rng.random() < w.setting_ratio else [],
+                    },
+                },
+            }
+            self.diary[page["id"]] = page
+
+    def _build_calendars(self, rng: random.Random):
+        w = self.workload
+        self.calendars = []
+        for c in range(w.calendars):
+            events = []
+            for n in range(w.event_days):
+                d = self.today - timedelta(days=n)
+                for _ in range(w.events_per_day):
+                    start = datetime(d.year, d.month, d.day, rng.randint(7, 21), rng.choice((0, 30)), tzinfo=KST)
+                    events.append({
+                        "uid": _uuid(rng),
+                        "start": start,
+                        "end": start + timedelta(minutes=rng.choice((30, 60, 90))),
+                        "summary": _sentence(rng, 2),
+                        "description": _sentence(rng, 6) if rng.random() < 0.3 else "",
+                    })
+            self.calendars.append({
+                "id": f"cal{c}",
+                "name": f"캘린더 {c}",
+                "ctag": f"ctag-{c}-1",
+                "sync_token": f"https://example.com/sync/{c}-1",
+                "events": events,
+            })
+
+    def _build_github(self, rng: random.Random):
+        w = self.workload
+        repos = [f"bench/repo-{i}" for i in range(8)]
+        commits = []
+        for _ in range(w.commits):
+            at = self.now - timedelta(minutes=rng.randint(0, w.commit_days * 24 * 60))
+            commits.append({
+                "sha": uuid.UUID(int=rng.getrandbits(128)).hex + "00000000",
+                "repo": rng.choice(repos),
+                "message": f"{_sentence(rng, 4)} #{rng.randint(1, 999)}",
+                "date": at.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            })
+        commits.sort(key=lambda c: c["date"], reverse=True)
+        self.commits = commits
+
+        # 푸시 하나에 커밋 1~5개, 사이사이 다른 이벤트를 섞는다 (피드는 최근 300개까지)
+        events = []
+        i = 0
+        while i < len(commits) and len(events) < 300:
+            batch = commits[i:i + rng.randint(1, 5)]
+            i += len(batch)
+            events.append({
+                "id": str(len(events)),
+                "type": "PushEvent",
+                "created_at": batch[0]["date"],
+                "repo": {"name": batch[0]["repo"]},
+                "payload": {"commits": [
+                    {"sha": c["sha"], "message": c["message"], "distinct": True} for c in batch
+                ]},
+            })
+            if rng.random() < 0.3 and len(events) < 300:
+                events.append({
+                    "id": str(len(events)), "type": "WatchEvent",
+                    "created_at": batch[-1]["date"], "repo": {"name": "other/repo"}, "payload": {},
+                })
+        self.github_events = events
+
+    # --- Telegram 상태 ---
+
+    def add_update(self, text: str, chat_id: int | None = None):
+        """사용자가 보낸 메시지를 getUpdates 대기열에 넣는다 (chat_id를 주면 다른 채팅에서 보낸 것으로)."""
+        chat_id = self.chat_id if chat_id is None else chat_id
+        with self.updates_cond:
+            self.updates.append({
+                "update_id": self.next_update_id,
+                "message": {
+                    "message_id": self.next_message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "bench"},
+                    "text": text,
+                },
+            })
+            self.next_update_id += 1
+            self.next_message_id += 1
+            self.updates_cond.notify_all()
+
+    def reset(self):
+        """다음 실행을 위해 호출 통계와 답장 상태를 초기화한다."""
+        with self.lock:
+            self.calls.clear()
+            self.throttled.clear()
+            self.replied = False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PATCH(self):
+        self._dispatch()
+
+    def do_PROPFIND(self):
+        self._dispatch()
+
+    def do_REPORT(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        parts = urlsplit(self.path)
+        segments = [s for s in parts.path.split("/") if s]
+        service = segments[0] if segments else ""
+        if service not in SERVICES:
+            return self._send(404, b"not found", "text/plain")
+
+        world = self.server.world
+        limits = self.server.limits.get(service) or ServiceLimits()
+        endpoint = self.server.endpoint_name(service, self.command, segments[1:], self.headers)
+        with world.lock:
+            world.calls[(service, endpoint)] += 1
+
+        bucket = self.server.buckets.get(service)
+        if bucket and not bucket.take():
+            with world.lock:
+                world.throttled[(service, endpoint)] += 1
+            return self._throttle(service)
+
+        if limits.latency:
+            time.sleep(limits.latency)
+
+        handler = getattr(self.server, f"_{service}")
+        result = handler(self, segments[1:], parse_qs(parts.query), body)
+        if result is not None:
+            status, payload, content_type, headers = result
+            self._send(status, payload, content_type, headers)
+
+    def _throttle(self, service: str):
+        if service == "telegram":
+            payload = {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                       "parameters": {"retry_after": 1}}
+        elif service == "anthropic":
+            payload = {"type": "error", "error": {"type": "rate_limit_error", "message": "rate limited"}}
+        else:
+            payload = {"object": "error", "status": 429, "code": "rate_limited", "message": "rate limited"}
+        self._send(429, json.dumps(payload).encode(), "application/json", {"Retry-After": "1"})
+
+    def _send(self, status: int, payload: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+
+def _json(status: int, data, headers: dict | None = None):
+    return status, json.dumps(data, ensure_ascii=False).encode(), "application/json", headers or {}
+
+
+class FakeServer(ThreadingHTTPServer):
+    """모든 가짜 서비스를 한 포트에서 제공하는 HTTP 서버."""
+
+    daemon_threads = True
+
+    def __init__(self, workload: Workload | None = None, limits: dict[str, ServiceLimits] | None = None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.world = FakeWorld(workload or Workload())
+        self.limits = limits or {}
+        self.buckets = {
+            name: _TokenBucket(l.rate, l.burst) for name, l in self.limits.items() if l.rate
+        }
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self.world.updates_cond:
+            self.world.updates_cond.notify_all()
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        # 취소된 롱 폴링 등 클라이언트가 먼저 끊은 연결은 무시한다
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def env(self) -> dict[str, str]:
+        """하루봇이 이 서버를 쓰도록 설정할 환경 변수."""
+        base = self.base_url
+        return {
+            "NOTION_TOKEN": "bench-notion",
+            "NOTION_DIARY_DB_ID": self.world.diary_db,
+            "NOTION_BASE_URL": f"{base}/notion",
+            "APPLE_ID": "bench@example.com",
+            "APPLE_APP_PASSWORD": "bench",
+            "CALDAV_URL": f"{base}/caldav/",
+            "GITHUB_TOKEN": "bench-github",
+            "GITHUB_USER": GITHUB_USER,
+            "GITHUB_API_URL": f"{base}/github",
+            "TELEGRAM_BOT_TOKEN": "1:bench",
+            "TELEGRAM_CHAT_ID": str(self.world.chat_id),
+            "TELEGRAM_API_URL": f"{base}/telegram/bot",
+            "ANTHROPIC_API_KEY": "bench-anthropic",
+            "ANTHROPIC_BASE_URL": f"{base}/anthropic",
+        }
+
+    @staticmethod
+    def endpoint_name(service: str, method: str, segments: list[str], headers) -> str:
+        """호출 통계에 쓸 엔드포인트 이름 (ID 등 가변 경로는 뺀다)."""
+        if service == "notion":
+            names = [s for s in segments[1:] if not re.fullmatch(r"[0-9a-f-]{32,36}", s)]
+            return f"{method} {'/'.join(names)}"
+        if service == "caldav":
+            return f"{method} depth={headers.get('Depth', '0')}"
+        if service == "telegram":
+            return segments[-1]
+        if service == "github":
+            if segments[-1] == "events":
+                return "events"
+            if segments[0] == "repos" and segments[-2:-1] == ["commits"]:
+                return "repos/commits"
+            return "/".join(segments)
+        return "/".join(segments[1:])
+
+    # --- Notion ---
+
+    def _notion(self, handler, segments, query, body):
+        world = self.world
+        data = json.loads(body) if body else {}
+        resource = segments[1] if len(segments) > 1 else ""
+        method = handler.command
+
+        if resource == "search":
+            start = int(data.get("start_cursor") or 0)
+            size = min(int(data.get("page_size", 100)), 100)
+            chunk = world.notion_pages[start:start + size]
+            more = start + size < len(world.notion_pages)
+            return _json(200, {"object": "list", "results": chunk, "has_more": more,
+                               "next_cursor": str(start + size) if more else None})
+
+        if resource == "databases":
+            db_id = segments[2]
+            if db_id not in world.databases:
+                return _json(404, {"object": "error", "status": 404, "code": "object_not_found", "message": "no db"})
+            result = {"object": "database", "id": db_id, "title": _rich_text(world.databases[db_id])}
+            if db_id == world.diary_db:
+                result["data_sources"] = [{"id": world.diary_ds, "name": "일기"}]
+            return _json(200, result)
+
+        if resource == "blocks":
+            rng = random.Random(segments[2])
+            size = int(query.get("page_size", ["100"])[0])
+            blocks = [
+                {"object": "block", "id": _uuid(rng), "type": "paragraph",
+                 "paragraph": {"rich_text": _rich_text(_sentence(rng, 10))}}
+                for _ in range(size)
+            ]
+            return _json(200, {"object": "list", "results": blocks, "has_more": False, "next_cursor": None})
+
+        if resource == "data_sources":
+            return _json(200, self._query_diary(data))
+
+        if resource == "pages":
+            with world.lock:
+                if method == "POST":
+                    page = {
+                        "object": "page",
+                        "id": str(uuid.uuid4()),
+                        "parent": {"type": "data_source_id", "data_source_id": world.diary_ds},
+                        "properties": {"comment": {"type": "rich_text", "rich_text": []},
+                                       "setting": {"type": "rich_text", "rich_text": []}},
+                    }
+                    world.diary[page["id"]] = page
+                else:
+                    page = world.diary.get(segments[2])
+                    if page is None:
+                        return _json(404, {"object": "error", "status": 404, "code": "object_not_found",
+                                           "message": "no page"})
+                if method in ("POST", "PATCH"):
+                    self._apply_properties(page, data.get("properties", {}))
+                    page["last_edited_time"] = _iso_z(datetime.now(KST).replace(second=0, microsecond=0))
+                return _json(200, page)
+
+        return _json(404, {"object": "error", "status": 404, "code": "invalid_request_url", "message": "unknown"})
+
+    @staticmethod
+    def _apply_properties(page: dict, properties: dict):
+        for name, value in properties.items():
+            if "title" in value:
+                text = "".join(t["text"]["content"] for t in value["title"])
+                page["properties"][name] = {"type": "title", "title": _rich_text(text)}
+            elif "rich_text" in value:
+                text = "".join(t["text"]["content"] for t in value["rich_text"])
+                page["properties"][name] = {"type": "rich_text", "rich_text": _rich_text(text) if text else []}
+            elif "date" in value:
+                page["properties"][name] = {"type": "date", "date": value["date"]}
+
+    def _query_diary(self, data: dict) -> dict:
+        with self.world.lock:
+            pages = list(self.world.diary.values())
+        flt = data.get("filter") or {}
+        if flt.get("property") == "date":
+            day = flt["date"]["equals"]
+            pages = [p for p in pages if (p["properties"]["date"]["date"] or {}).get("start") == day]
+        elif flt.get("timestamp") == "last_edited_time":
+            since = flt["last_edited_time"]["on_or_after"]
+            pages = [p for p in pages if p["last_edited_time"] >= since]
+        for sort in data.get("sorts", []):
+            pages.sort(key=lambda p: p.get(sort.get("timestamp"), ""), reverse=sort.get("direction") == "descending")
+        start = int(data.get("start_cursor") or 0)
+        size = min(int(data.get("page_size", 100)), 100)
+        more = start + size < len(pages)
+        return {"object": "list", "results": pages[start:start + size], "has_more": more,
+                "next_cursor": str(start + size) if more else None}
+
+    # --- CalDAV ---
+
+    def _caldav(self, handler, segments, query, body):
+        world = self.world
+        path = "/" + "/".join(["caldav", *segments]) + "/"
+        base = "/caldav/"
+        if handler.command == "PROPFIND":
+            if segments in ([], ["principal"]):
+                prop = (
+                    f"<d:current-user-principal><d:href>{base}principal/</d:href></d:current-user-principal>"
+                    f"<c:calendar-home-set><d:href>{base}calendars/</d:href></c:calendar-home-set>"
+                    f"<d:resourcetype><d:collection/></d:resourcetype>"
+                )
+                return self._multistatus([(path, prop)])
+            if segments == ["calendars"]:
+                responses = [(path, "<d:resourcetype><d:collection/></d:resourcetype>")]
+                for cal in world.calendars:
+                    responses.append((f"{base}calendars/{cal['id']}/", self._calendar_props(cal)))
+                return self._multistatus(responses)
+            cal = self._find_calendar(segments)
+            if cal is None:
+                return 404, b"", "text/plain", {}
+            return self._multistatus([(path, self._calendar_props(cal))])
+
+        if handler.command == "REPORT":
+            cal = self._find_calendar(segments)
+            if cal is None:
+                return 404, b"", "text/plain", {}
+            match = re.search(rb'start="(\d{8}T\d{6}Z)"\s+end="(\d{8}T\d{6}Z)"', body)
+            events = cal["events"]
+            if match:
+                start, end = (datetime.strptime(m.decode(), "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+                              for m in match.groups())
+                events = [e for e in events if e["start"] < end and e["end"] > start]
+            responses = [
+                (f"{base}calendars/{cal['id']}/{e['uid']}.ics",
+                 f"<d:getetag>\"{e['uid'][:8]}\"</d:getetag><c:calendar-data>{escape(self._ics(e))}</c:calendar-data>")
+                for e in events
+            ]
+            return self._multistatus(responses)
+
+        return 405, b"", "text/plain", {}
+
+    def _find_calendar(self, segments):
+        if len(segments) >= 2 and segments[0] == "calendars":
+            for cal in self.world.calendars:
+                if cal["id"] == segments[1]:
+                    return cal
+        return None
+
+    @staticmethod
+    def _calendar_props(cal: dict) -> str:
+        return (
+            "<d:resourcetype><d:collection/><c:calendar/></d:resourcetype>"
+            f"<d:displayname>{escape(cal['name'])}</d:displayname>"
+            "<c:supported-calendar-component-set><c:comp name=\"VEVENT\"/></c:supported-calendar-component-set>"
+            f"<d:sync-token>{escape(cal['sync_token'])}</d:sync-token>"
+            f"<cs:getctag>{escape(cal['ctag'])}</cs:getctag>"
+        )
+
+    @staticmethod
+    def _ics(event: dict) -> str:
+        fmt = "%Y%m%dT%H%M%SZ"
+        lines = [
+            "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//haru-bench//EN", "BEGIN:VEVENT",
+            f"UID:{event['uid']}",
+            f"DTSTAMP:{event['start'].astimezone(timezone.utc).strftime(fmt)}",
+            f"DTSTART:{event['start'].astimezone(timezone.utc).strftime(fmt)}",
+            f"DTEND:{event['end'].astimezone(timezone.utc).strftime(fmt)}",
+            f"SUMMARY:{event['summary']}",
+        ]
+        if event["description"]:
+            lines.append(f"DESCRIPTION:{event['description']}")
+        lines += ["END:VEVENT", "END:VCALENDAR", ""]
+        return "\r\n".join(lines)
+
+    @staticmethod
+    def _multistatus(responses: list[tuple[str, str]]):
+        body = "".join(
+            f"<d:response><d:href>{escape(href)}</d:href><d:propstat><d:prop>{prop}</d:prop>"
+            f"<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+            for href, prop in responses
+        )
+        xml = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<d:multistatus xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav" '
+            f'xmlns:cs="http://calendarserver.org/ns/">{body}</d:multistatus>'
+        )
+        return 207, xml.encode("utf-8"), "application/xml; charset=utf-8", {}
+
+    # --- GitHub ---
+
+    def _github(self, handler, segments, query, body):
+        page = int(query.get("page", ["1"])[0])
+        per_page = min(int(query.get("per_page", ["30"])[0]), 100)
+        if segments[-1] == "events":
+            items = self.world.github_events
+            result = None
+        elif segments == ["user"]:
+            return _json(200, {"login": GITHUB_USER})
+        elif segments[0] == "repos" and segments[-2] == "commits":
+            commit = next((c for c in self.world.commits if c["sha"] == segments[-1]), None)
+            if commit is None:
+                return _json(404, {"message": "No commit found for SHA"})
+            return _json(200, {"sha": commit["sha"], "author": {"login": GITHUB_USER}, "commit": {
+                "message": commit["message"], "committer": {"date": commit["date"]},
+            }})
+        elif segments == ["search", "commits"]:
+            items = self._search_commits(query.get("q", [""])[0])
+            result = {"total_count": len(items), "incomplete_results": False}
+        else:
+            return _json(404, {"message": "Not Found"})
+
+        items = items[:1000]
+        chunk = items[(page - 1) * per_page:page * per_page]
+        if result is None:
+            payload = chunk
+        else:
+            payload = dict(result, items=[
+                {"sha": c["sha"], "repository": {"full_name": c["repo"]},
+                 "commit": {"message": c["message"], "committer": {"date": c["date"]}}}
+                for c in chunk
+            ])
+
+        headers = {}
+        if page * per_page < len(items):
+            params = {k: v[0] for k, v in query.items()}
+            params["page"] = str(page + 1)
+            next_url = f"{self.base_url}/github/{'/'.join(segments)}?{urlencode(params)}"
+            headers["Link"] = f'<{next_url}>; rel="next"'
+
+        encoded = json.dumps(payload, ensure_ascii=False).encode()
+        etag = f'"{uuid.uuid5(uuid.NAMESPACE_OID, encoded.decode()).hex}"'
+        headers["ETag"] = etag
+        if handler.headers.get("If-None-Match") == etag:
+            return 304, b"", "application/json", headers
+        return 200, encoded, "application/json", headers
+
+    def _search_commits(self, q: str) -> list[dict]:
+        commits = self.world.commits
+        if m := re.search(r"committer-date:>=(\S+)", q):
+            since = datetime.fromisoformat(m.group(1))
+            return [c for c in commits if datetime.fromisoformat(c["date"].replace("Z", "+00:00")) >= since]
+        if m := re.search(r"committer-date:(\d{4}-\d{2}-\d{2})\.\.(\d{4}-\d{2}-\d{2})", q):
+            first, last = date.fromisoformat(m.group(1)), date.fromisoformat(m.group(2))
+            return [
+                c for c in commits
+                if first <= datetime.fromisoformat(c["date"].replace("Z", "+00:00")).astimezone(KST).date() <= last
+            ]
+        return commits
+
+    # --- Telegram ---
+
+    def _telegram(self, handler, segments, query, body):
+        world = self.world
+        method = segments[-1]
+        params = self._telegram_params(handler, body)
+
+        if method == "getMe":
+            return _json(200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "haru",
+                                                        "username": "haru_bench_bot"}})
+
+        if method == "getUpdates":
+            offset = params.get("offset")
+            wait = float(params.get("timeout") or 0)
+            deadline = time.monotonic() + wait
+            with world.updates_cond:
+                if offset is not None:
+                    world.updates = [u for u in world.updates if u["update_id"] >= offset]
+                while not world.updates and time.monotonic() < deadline:
+                    world.updates_cond.wait(deadline - time.monotonic())
+                result = list(world.updates)
+            return _json(200, {"ok": True, "result": result})
+
+        if method in ("sendMessage", "editMessageText"):
+            text = params.get("text", "")
+            with world.lock:
+                if method == "sendMessage":
+                    message_id = world.next_message_id
+                    world.next_message_id += 1
+                else:
+                    message_id = params.get("message_id")
+                reply = SUMMARY_FOOTER in text and not world.replied
+                if reply:
+                    world.replied = True
+            if reply:
+                timer = threading.Timer(world.workload.reply_delay, world.add_update, args=("오늘도 수고했어",))
+                timer.daemon = True
+                timer.start()
+            message = {"message_id": message_id, "date": int(time.time()),
+                       "chat": {"id": world.chat_id, "type": "private"}, "text": text}
+            return _json(200, {"ok": True, "result": message})
+
+        return _json(200, {"ok": True, "result": True})
+
+    @staticmethod
+    def _telegram_params(handler, body: bytes) -> dict:
+        """JSON 본문과 폼 본문(값마다 JSON 직렬화) 모두 받는다."""
+        if not body:
+            return {}
+        if handler.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(body)
+        params = {}
+        for key, values in parse_qs(body.decode()).items():
+            try:
+                params[key] = json.loads(values[0])
+            except ValueError:
+                params[key] = values[0]
+        return params
+
+    # --- Anthropic ---
+
+    def _anthropic(self, handler, segments, query, body):
+        request = json.loads(body)
+        text = (
+            "1. **작업 정리** - 오늘 한 일을 차근차근 정리했어요.\n"
+            "2. **회의 참석** - 여러 일정을 소화하며 바쁜 하루를 보냈어요.\n"
+            "3. **코드 개선** - 저장소 곳곳을 다듬었어요."
+        )
+        input_tokens = len(body) // 4
+        output_tokens = len(text) // 2
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                 "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant",
+            "model": request["model"], "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn", "stop_sequence": None, "usage": usage,
+        }
+        if not request.get("stream"):
+            return _json(200, message)
+
+        # SSE 스트림: 연결을 닫아 끝을 알린다
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        def _event(name: str, data: dict):
+            handler.wfile.write(f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode())
+            handler.wfile.flush()
+
+        start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+        _event("message_start", {"type": "message_start", "message": start})
+        _event("content_block_start", {"type": "content_block_start", "index": 0,
+                                       "content_block": {"type": "text", "text": ""}})
+        step = max(1, len(text) // 20)
+        for i in range(0, len(text), step):
+            _event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                           "delta": {"type": "text_delta", "text": text[i:i + step]}})
+            time.sleep(0.02)
+        _event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        _event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                 "usage": {"output_tokens": output_tokens}})
+        _event("message_stop", {"type": "message_stop"})
+        return None
@@ -0,0 +1,190 @@
+"""하루봇 오프라인 벤치마크
+
+실제 자격 증명 없이 로컬 가짜 서버(fake_services)를 상대로 main.run을 돌려
+전체 소요 시간, 단계별 시간, 엔드포인트별 호출 수, 최대 메모리를 측정한다.
+첫 실행(cold: 로컬 캐시 없음)과 이어지는 실행(warm: 캐시 있음)을 따로 보고한다.
+
+사용법:
+    uv run python bench/run_bench.py
+    uv run python bench/run_bench.py --notion-pages 5000 --diary-years 10 --latency notion=0.3 --rate notion=3
+    uv run python bench/run_bench.py --json bench_result.json   # 회귀 비교용 결과 저장
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_services import SERVICES, FakeServer, ServiceLimits, Workload
+
+
+def _parse_service_values(values: list[str], cast=float) -> dict:
+    """["notion=0.3", "github=0.1"] → {"notion": 0.3, "github": 0.1} ("all=0.1"은 모든 서비스)."""
+    result = {}
+    for value in values:
+        name, _, number = value.partition("=")
+        names = SERVICES if name == "all" else (name,)
+        for n in names:
+            if n not in SERVICES:
+                raise SystemExit(f"알 수 없는 서비스: {n} (가능: {', '.join(SERVICES)})")
+            result[n] = cast(number)
+    return result
+
+
+def _build_server(args) -> FakeServer:
+    latency = _parse_service_values(args.latency)
+    rate = _parse_service_values(args.rate)
+    limits = {
+        name: ServiceLimits(latency=latency.get(name, 0.0), rate=rate.get(name), burst=args.burst)
+        for name in SERVICES
+    }
+    workload = Workload(
+        notion_pages=args.notion_pages,
+        notion_today=args.notion_today,
+        calendars=args.calendars,
+        commits=args.commits,
+        diary_years=args.diary_years,
+        reply_delay=args.reply_delay,
+    )
+    return FakeServer(workload, limits)
+
+
+def _run_once(label: str, server: FakeServer, main_module, metrics_module, log) -> dict:
+    """main.run을 한 번 실행하고 측정 결과를 반환한다."""
+    from src.notion_session import close_notion_clients
+
+    server.world.reset()
+    # 지난 실행 이후 쌓인 답장 하나 (미처리 답장 단계에서 어제 일기에 코멘트로 붙는다)
+    server.world.add_update("어제 일기 잘 봤어")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    error = None
+    with contextlib.redirect_stdout(log):
+        try:
+            main_module.run()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            close_notion_clients()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stages = {}
+    with open(metrics_module.METRICS_LOG_PATH, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if lines:
+        last_run = lines[-1]["run_id"]
+        for line in lines:
+            if line["run_id"] == last_run and line["kind"] == "stage":
+                stages[line["name"]] = line["duration_ms"] / 1000
+
+    calls = {f"{svc} {ep}": n for (svc, ep), n in sorted(server.world.calls.items())}
+    throttled = {f"{svc} {ep}": n for (svc, ep), n in sorted(server.world.throttled.items())}
+    return {
+        "label": label,
+        "elapsed_sec": round(elapsed, 3),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "stages": stages,
+        "calls": calls,
+        "throttled": throttled,
+        "total_calls": sum(calls.values()),
+        "error": error,
+    }
+
+
+def _print_result(result: dict):
+    print(f"\n=== {result['label']} ===")
+    if result["error"]:
+        print(f"오류: {result['error']}")
+    print(f"전체 {result['elapsed_sec']:.2f}s, 최대 메모리(tracemalloc) {result['peak_mb']:.1f}MB, 호출 {result['total_calls']}회")
+    if result["stages"]:
+        print("단계:")
+        for name, sec in sorted(result["stages"].items(), key=lambda kv: -kv[1]):
+            print(f"  {name:<16} {sec:7.2f}s")
+    print("엔드포인트별 호출 수:")
+    for name, count in result["calls"].items():
+        limited = result["throttled"].get(name)
+        suffix = f"  (429 {limited}회)" if limited else ""
+        print(f"  {name:<36} {count:5}{suffix}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="하루봇 오프라인 벤치마크")
+    parser.add_argument("--notion-pages", type=int, default=1000, help="워크스페이스 전체 페이지 수")
+    parser.add_argument("--notion-today", type=int, default=40, help="그중 오늘 수정된 페이지 수")
+    parser.add_argument("--calendars", type=int, default=30)
+    parser.add_argument("--commits", type=int, default=500, help="최근 14일 커밋 수")
+    parser.add_argument("--diary-years", type=int, default=5, help="일기 DB에 쌓인 기간 (년)")
+    parser.add_argument("--latency", action="append", default=[], metavar="SERVICE=SEC",
+                        help="서비스별 응답 지연, all=SEC로 전체 지정 (반복 가능)")
+    parser.add_argument("--rate", action="append", default=[], metavar="SERVICE=RPS",
+                        help="서비스별 초당 요청 한도, 넘으면 429 (반복 가능)")
+    parser.add_argument("--burst", type=int, default=3, help="요청 한도의 버스트 크기")
+    parser.add_argument("--runs", type=int, default=2, help="실행 횟수 (첫 실행은 cold, 나머지는 warm)")
+    parser.add_argument("--reply-delay", type=float, default=1.0, help="요약 수신 후 가짜 사용자가 답장하기까지 (초)")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--verbose", action="store_true", help="하루봇 출력을 그대로 보여줌")
+    args = parser.parse_args(argv)
+
+    server = _build_server(args).start()
+    workdir = tempfile.mkdtemp(prefix="haru-bench-")
+    os.environ.update(server.env())
+
+    # 환경 변수를 정한 뒤에 불러와야 모듈 상수(API 주소)에 반영된다
+    import config
+    config.CACHE_DIR = os.path.join(workdir, "cache")
+    import src.main as main_module
+    import src.metrics as metrics_module
+    main_module.USAGE_LOG_PATH = os.path.join(workdir, "usage_log.csv")
+    metrics_module.METRICS_LOG_PATH = os.path.join(workdir, "metrics.jsonl")
+
+    w = server.world.workload
+    print(
+        f"하루봇 벤치마크: Notion 페이지 {w.notion_pages} (오늘 {w.notion_today}), 캘린더 {w.calendars}, "
+        f"커밋 {w.commits}, 일기 {len(server.world.diary)}건 — 작업 디렉터리 {workdir}"
+    )
+
+    log = sys.stdout if args.verbose else io.StringIO()
+    results = []
+    try:
+        for i in range(args.runs):
+            label = "cold" if i == 0 else f"warm #{i}"
+            result = _run_once(label, server, main_module, metrics_module, log)
+            _print_result(result)
+            results.append(result)
+    finally:
+        server.stop()
+        if not args.verbose:
+            with open(os.path.join(workdir, "run.log"), "w", encoding="utf-8") as f:
+                f.write(log.getvalue())
+
+    # ru_maxrss는 Linux에서 KB, macOS에서 바이트 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+    print(f"\n프로세스 최대 RSS {rss_mb:.1f}MB, 하루봇 출력: {os.path.join(workdir, 'run.log')}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"workload": vars(w), "runs": results, "max_rss_mb": round(rss_mb, 1)}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json_path}")
+
+    if any(r["error"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
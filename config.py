@@ -7,17 +7,124 @@ PERIOD_DAYS = 1
 # 오늘 한 일 요약 개수
 SUMMARY_COUNT = 3
 
-# Claude 모델
+# Claude 모델 (MODEL_ROUTING이 꺼져 있을 때 항상 사용)
 CLAUDE_MODEL = "claude-opus-4-6"
 
+# 모델 라우팅 — 입력 규모에 따라 위에서부터 처음 맞는 규칙의 모델을 사용
+# max_items: 수집 항목 수 상한, max_input_tokens: 데이터 블록 추정 토큰 상한 (생략 시 제한 없음)
+MODEL_ROUTING = True
+MODEL_ROUTES = [
+    {"name": "small", "model": "claude-sonnet-4-5-20250929", "max_items": 25, "max_input_tokens": 1500},
+    {"name": "large", "model": "claude-opus-4-6"},
+]
+
+# 호출 실패/타임아웃 시 넘어갈 대체 모델
+MODEL_FALLBACKS = {
+    "claude-opus-4-6": "claude-sonnet-4-5-20250929",
+    "claude-sonnet-4-5-20250929": "claude-opus-4-6",
+}
+
+# Claude API 호출 한 번의 타임아웃 (초) — 재시도 1회 후에도 실패하면 대체 모델로 넘어감
+SUMMARY_API_TIMEOUT = 45
+
 # 요약 생성 최대 토큰
 MAX_TOKENS = 1000
 
+# 요약 프롬프트 데이터 블록의 입력 토큰 예산 (초과 시 중복 합치기 → 발췌 축소 → 항목 제외)
+PROMPT_TOKEN_BUDGET = 2500
+
+# 요약 캐시 — 같은 입력(모델, 프롬프트, 설정, max_tokens)이면 API를 다시 호출하지 않음
+SUMMARY_CACHE_MAX_ENTRIES = 100
+SUMMARY_CACHE_MAX_AGE_DAYS = 7
+
 # Telegram 답장 대기 시간 (초) — GitHub Actions 제한 고려
 TELEGRAM_REPLY_TIMEOUT = 300  # 5분
 
-# 모델별 가격 (USD per 1M tokens)
+# 요약을 스트리밍으로 생성하며 Telegram 메시지를 점진적으로 고쳐 쓸지 여부
+SUMMARY_STREAMING = True
+
+# 스트리밍 중 Telegram 메시지 편집 최소 간격 (초) — 채팅당 편집 제한 고려
+TELEGRAM_EDIT_INTERVAL = 1.5
+
+# getUpdates 롱 폴링 서버 측 대기 시간 (초)
+TELEGRAM_LONG_POLL_TIMEOUT = 25
+
+# 첫 답장 이후 이어서 오는 메시지를 모으는 시간 (초) — 이 시간 동안 조용하면 종료
+TELEGRAM_REPLY_BURST_WINDOW = 3
+# 연속 메시지를 모으는 최대 시간 (초) — 계속 입력 중이어도 이 시간이 지나면 종료
+TELEGRAM_REPLY_BURST_MAX = 30
+
+# CalDAV 캘린더 동시 검색 수
+CALDAV_CONCURRENCY = 4
+
+# CalDAV 캘린더 목록(탐색 결과) 캐시 유지 시간 (시간)
+CALDAV_DISCOVERY_TTL_HOURS = 24
+
+# GitHub 수집 시 사용자 이벤트 API를 먼저 시도 (수집 창을 덮지 못하면 Search API 사용)
+GITHUB_USE_EVENTS = True
+# 이벤트 경로에서 날짜/작성자를 하나씩 조회할 새 커밋 수 상한 — 넘으면 Search API 한 번으로 가져온다
+GITHUB_EVENTS_MAX_LOOKUPS = 5
+# GitHub 응답(ETag) 캐시에서 이 기간 동안 쓰이지 않은 항목은 지운다 (일)
+GITHUB_HTTP_CACHE_MAX_AGE_DAYS = 7
+
+# 로컬 캐시 디렉토리 (프로젝트 루트 기준) — 일기 저장소(diary.sqlite3), 수집 커서 등
+CACHE_DIR = ".cache"
+
+# 일기 로컬 저장소(.cache/diary.sqlite3) ↔ Notion 동기화
+# 변경 후 Notion에 쓰기 전 모으는 시간 (초)
+DIARY_SYNC_DELAY = 2
+# load_settings가 Notion에서 수정된 일기를 다시 받아 오는 최소 간격 (초)
+DIARY_PULL_INTERVAL = 600
+# 종료 시 남은 변경을 쓰기 위해 기다리는 최대 시간 (초)
+DIARY_SYNC_CLOSE_TIMEOUT = 60
+
+# Notion 본문 발췌 동시 요청 수 (Notion API 평균 3 req/s 제한 고려)
+NOTION_EXCERPT_CONCURRENCY = 3
+
+# 상주 모드(serve) 실행 시각 (KST, HH:MM) — GitHub Actions cron과 같은 오후 8시
+SERVE_RUN_TIMES = ["20:00"]
+
+# 서비스별 요청 한도 (초당 요청 수, 버스트) — 프로세스 전체가 토큰 버킷 하나를 공유
+RATE_LIMITS = {
+    "notion": (3, 3),            # Notion 평균 초당 3회
+    "github": (1.3, 10),         # core API 시간당 5,000회
+    "github_search": (0.5, 5),   # search API 분당 30회
+    "caldav": (10, 10),
+    "telegram": (1, 3),          # 같은 채팅에 초당 1건
+    "anthropic": (1, 2),
+}
+
+# 재시도 정책 — 429/503은 Retry-After를 지키고, 없으면 지수 백오프 + 지터
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30  # Retry-After가 이보다 길면 기다리지 않고 실패 처리
+
+# 백필 시 동시에 처리할 날짜 수
+BACKFILL_CONCURRENCY = 4
+
+# 배치 실행(haru-bot batch) 시 동시에 처리할 사용자 수
+# 사용자마다 파이프라인이 PIPELINE_WORKERS개 스레드를 쓰고, 연결 풀과 요청 한도는 함께 쓴다
+BATCH_WORKERS = 8
+
+# 파이프라인 동시 실행 스레드 수
+PIPELINE_WORKERS = 8
+
+# 단계별 타임아웃 (초) — 초과 시 빈 결과로 대체하고 다음 단계 진행
+STAGE_TIMEOUTS = {
+    "setting_column": 30,
+    "pending_replies": 60,
+    "calendar": 60,
+    "notion": 90,
+    "github": 30,
+    "settings": 60,
+    "summary": 180,
+    "telegram": 30,
+    "save": 30,
+    "reply_wait": TELEGRAM_REPLY_TIMEOUT + 60,
+}
+
+# 모델별 가격 (USD per 1M tokens) — cache_write: 프롬프트 캐시 저장, cache_read: 캐시 적중
 MODEL_PRICING = {
-    "claude-opus-4-6": {"input": 15.0, "output": 75.0},
-    "claude-sonnet-4-5-20250929": {"input": 3.0, "output": 15.0},
+    "claude-opus-4-6": {"input": 15.0, "output": 75.0, "cache_write": 18.75, "cache_read": 1.5},
+    "claude-sonnet-4-5-20250929": {"input": 3.0, "output": 15.0, "cache_write": 3.75, "cache_read": 0.3},
 }
@@ -0,0 +1,107 @@
+"""빠진 날짜의 일기를 한꺼번에 만드는 백필 명령 (haru-bot backfill --from --to)
+
+날짜마다 수집 → 요약 → 저장 파이프라인을 따로 돌리되, 여러 날짜를
+config.BACKFILL_CONCURRENCY 만큼 동시에 처리한다. Notion은 날짜별로 검색하면
+기간이 길수록 같은 페이지를 반복해서 훑으므로 기간 전체를 한 번 검색해 날짜별로 나눈다. 일기는 날짜 기준으로
+upsert하므로 같은 기간을 다시 돌려도 중복 페이지가 생기지 않는다.
+Telegram 전송과 답장 대기는 하지 않는다.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+
+import config
+from src.collectors import collect, missing_credentials
+from src.diary_store import (
+    close_diary_sync, ensure_setting_column, flush_diary_writes, load_settings, upsert_diary,
+)
+from src.main import _flush_metrics, _log_usage
+from src.scheduler import Stage, run_stages
+from src.model_router import generate_routed_summary
+
+
+def _collect_notion_by_day(start: date, end: date) -> dict[str, list[dict]]:
+    """기간의 Notion 페이지를 한 번에 수집해 날짜별로 나눈다. 자격 증명이 없으면 빈 dict."""
+    missing = missing_credentials("notion")
+    if missing:
+        print(f"[Notion] {' 또는 '.join(missing)}가 설정되지 않음 - 건너뜀")
+        return {}
+    from src.collectors.notion import collect_notion_by_day
+    return collect_notion_by_day(start, end)
+
+
+def _backfill_day(day: date, settings: list[str], notion_data: list[dict]) -> bool:
+    """하루치 파이프라인을 실행한다. 일기 저장 성공 여부를 반환한다."""
+    day_str = day.isoformat()
+    start_time = time.time()
+    timeouts = config.STAGE_TIMEOUTS
+
+    stages = [
+        Stage("calendar", lambda r: collect("calendar", 1, day=day),
+              timeout=timeouts.get("calendar"), fallback=[]),
+        Stage("github", lambda r: collect("github", 1, day=day),
+              timeout=timeouts.get("github"), fallback=[]),
+        Stage("summary", lambda r: generate_routed_summary(
+                  calendar_data=r["calendar"],
+                  notion_data=notion_data,
+                  github_data=r["github"],
+                  user_settings=settings or None,
+                  day=day,
+              ),
+              deps=("calendar", "github"), timeout=timeouts.get("summary")),
+        Stage("save", lambda r: upsert_diary(day_str, r["summary"][0]),
+              deps=("summary",), timeout=timeouts.get("save"), fallback=False),
+    ]
+
+    print(f"\n=== 백필 {day_str} ===")
+    report = run_stages(stages, max_workers=3)
+    summary, usage = report.results["summary"]
+
+    note = f"backfill+route:{usage['route']}" + ("+cache_hit" if usage.get("cache_hit") else "")
+    _log_usage(day_str, time.time() - start_time, usage, usage["model"], note=note)
+    return report.results["save"]
+
+
+def backfill(start: date, end: date, concurrency: int | None = None):
+    """start부터 end까지(포함) 각 날짜의 일기를 만들거나 갱신한다."""
+    load_dotenv()
+    if end < start:
+        raise ValueError(f"종료일({end})이 시작일({start})보다 앞섭니다.")
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    workers = max(1, min(concurrency or config.BACKFILL_CONCURRENCY, len(days)))
+    print(f"=== 하루봇 백필: {start} ~ {end} ({len(days)}일, 동시 {workers}일) ===")
+
+    ensure_setting_column()
+    settings = load_settings()
+
+    started = time.time()
+    notion_by_day = _collect_notion_by_day(start, end)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as executor:
+        futures = {
+            day: executor.submit(_backfill_day, day, settings, notion_by_day.get(day.isoformat(), []))
+            for day in days
+        }
+    # 일기는 로컬에 먼저 저장되고 Notion에는 백그라운드에서 쓴다 — 남은 쓰기를 지금 마친다
+    if not flush_diary_writes():
+        print("[Backfill] 일부 일기를 Notion에 쓰지 못함 - 로컬에 보관, 다음 실행에서 다시 씀")
+    close_diary_sync()
+
+    failed = []
+    for day, future in futures.items():
+        try:
+            if not future.result():
+                failed.append(day)
+        except Exception as e:
+            print(f"[Backfill] {day} 실패: {e}")
+            failed.append(day)
+
+    print(f"\n=== 백필 완료: {len(days) - len(failed)}/{len(days)}일 성공 ({time.time() - started:.1f}초) ===")
+    if failed:
+        print(f"[Backfill] 실패한 날짜: {', '.join(d.isoformat() for d in failed)}")
+
+    # 여러 날짜가 동시에 돌았으므로 span은 백필 전체를 하나의 실행으로 묶어 기록한다
+    _flush_metrics(f"{start}~{end}", "backfill")
@@ -0,0 +1,117 @@
+"""여러 사용자의 파이프라인을 한 번에 돌리는 배치 명령 (haru-bot batch --roster roster.json)
+
+로스터의 사용자마다 main.run을 사용자 컨텍스트(src.user_context) 안에서 실행하고,
+config.BATCH_WORKERS명씩 동시에 처리한다. Notion/GitHub/Anthropic 연결 풀과 요청 한도
+버킷은 모든 사용자가 함께 쓰되, 버킷은 자격 증명별로 나뉘므로 한 사용자의 429가
+다른 사용자를 멈추지 않는다.
+
+같은 봇을 쓰는 사용자들의 답장은 봇 세션이 채팅(TELEGRAM_CHAT_ID)별로 나눠 전달하므로
+답장 확인/대기 단계도 사용자마다 그대로 실행된다 (사용자당 최대 config.TELEGRAM_REPLY_TIMEOUT초).
+
+사용자별로 실패를 따로 처리하고 (한 명이 실패해도 나머지는 계속), 사용량은
+usage_logs/<사용자 ID>.csv에, 캐시는 .cache/users/<사용자 ID>/에 따로 남긴다.
+
+로스터 형식:
+    {
+      "defaults": {"ANTHROPIC_API_KEY": "${ANTHROPIC_API_KEY}", "TELEGRAM_BOT_TOKEN": "..."},
+      "users": [
+        {"id": "alice", "env": {"NOTION_TOKEN": "...", "NOTION_DIARY_DB_ID": "...", "TELEGRAM_CHAT_ID": "..."}}
+      ]
+    }
+값의 ${NAME}은 프로세스 환경 변수로 바꾼다 (GitHub Actions secrets 등).
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+import config
+from src.diary_store import close_diary_sync
+from src.main import KST, _calc_cost, _flush_metrics, run
+from src.notion_session import close_notion_clients
+from src.telegram_bot import close_session
+from src.user_context import UserContext, use_user
+
+# 사용자 ID는 캐시 디렉터리와 사용량 로그 파일 이름으로 쓰인다
+_USER_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def load_roster(path: str) -> list[UserContext]:
+    """로스터 JSON을 읽어 사용자 컨텍스트 목록을 반환한다. 형식이 잘못되면 ValueError."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    defaults = data.get("defaults", {})
+    users = []
+    seen = set()
+    for entry in data.get("users", []):
+        user_id = str(entry.get("id", ""))
+        if not _USER_ID.match(user_id) or user_id in (".", ".."):
+            raise ValueError(f"사용자 ID는 영문/숫자/_.-만 쓸 수 있습니다: {user_id!r}")
+        if user_id in seen:
+            raise ValueError(f"사용자 ID가 중복됩니다: {user_id}")
+        seen.add(user_id)
+
+        env = {**defaults, **entry.get("env", {})}
+        env = {name: os.path.expandvars(str(value)) for name, value in env.items()}
+        users.append(UserContext(user_id, env))
+    return users
+
+
+def _run_user(user: UserContext) -> dict:
+    """한 사용자의 파이프라인을 실행하고 결과(상태, 소요 시간, 사용량, 오류)를 반환한다."""
+    start = time.time()
+    with use_user(user):
+        try:
+            usage = run(batch_mode=True)
+            return {"status": "ok", "duration": time.time() - start, "usage": usage, "error": None}
+        except Exception as e:
+            print(f"[Batch] {user.user_id} 실패: {type(e).__name__}: {e}")
+            return {"status": "failed", "duration": time.time() - start, "usage": None, "error": str(e)}
+
+
+def run_batch(roster_path: str, workers: int | None = None):
+    """로스터의 모든 사용자에 대해 파이프라인을 한 번씩 실행한다. 한 명이라도 실패하면 종료 코드 1."""
+    load_dotenv()
+    users = load_roster(roster_path)
+    if not users:
+        print(f"[Batch] 로스터에 사용자가 없습니다: {roster_path}")
+        return
+
+    today = datetime.now(KST).strftime("%Y-%m-%d")
+    workers = max(1, min(workers or config.BATCH_WORKERS, len(users)))
+    print(f"=== 하루봇 배치 실행 ({today}, 사용자 {len(users)}명, 동시 {workers}명) ===")
+
+    started = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+            results = dict(zip((u.user_id for u in users), executor.map(_run_user, users)))
+    finally:
+        close_session()
+        close_diary_sync()
+        close_notion_clients()
+        _flush_metrics(today, "batch")
+
+    print(f"\n=== 배치 결과 ({time.time() - started:.1f}s) ===")
+    total_cost = 0.0
+    for user_id, result in results.items():
+        usage = result["usage"]
+        if usage:
+            cost = _calc_cost(usage, usage["model"])
+            total_cost += cost
+            detail = f"{usage['model']}, ${cost:.4f}"
+        else:
+            detail = result["error"]
+        print(f"  {user_id:<20} {result['status']:<7} {result['duration']:6.1f}s  {detail}")
+
+    failed = [user_id for user_id, result in results.items() if result["status"] != "ok"]
+    print(f"성공 {len(results) - len(failed)}명, 실패 {len(failed)}명, 비용 합계 ${total_cost:.4f}")
+    if failed:
+        print(f"[Batch] 실패한 사용자: {', '.join(failed)}")
+        sys.exit(1)
@@ -1,5 +1,42 @@
-from src.collectors.calendar import collect_calendar
-from src.collectors.notion import collect_notion
-from src.collectors.github import collect_github
+"""활동 수집기 (Calendar, Notion, GitHub)
 
-__all__ = ["collect_calendar", "collect_notion", "collect_github"]
+수집기 모듈은 caldav, notion_client, httpx 같은 무거운 의존성을 불러오므로
+처음 쓸 때 불러오고, 필요한 자격 증명이 없으면 아예 불러오지 않는다.
+"""
+
+import importlib
+
+from src.user_context import get_env
+
+# 이름 → (출력 이름, 모듈, 수집 함수, 필요한 설정)
+COLLECTORS = {
+    "calendar": ("Calendar", "src.collectors.calendar", "collect_calendar", ("APPLE_ID", "APPLE_APP_PASSWORD")),
+    "notion": ("Notion", "src.collectors.notion", "collect_notion", ("NOTION_TOKEN",)),
+    "github": ("GitHub", "src.collectors.github", "collect_github", ("GITHUB_TOKEN",)),
+}
+
+
+def missing_credentials(name: str) -> list[str]:
+    """수집기에 필요한데 설정되지 않은 환경 변수 목록."""
+    return [env for env in COLLECTORS[name][3] if not get_env(env)]
+
+
+def collect(name: str, *args, **kwargs) -> list[dict]:
+    """이름으로 수집기를 불러와 실행한다. 자격 증명이 없으면 모듈을 불러오지 않고 빈 목록을 반환한다."""
+    label, module, func, _ = COLLECTORS[name]
+    missing = missing_credentials(name)
+    if missing:
+        print(f"[{label}] {' 또는 '.join(missing)}가 설정되지 않음 - 건너뜀")
+        return []
+    return getattr(importlib.import_module(module), func)(*args, **kwargs)
+
+
+def __getattr__(name: str):
+    # from src.collectors import collect_calendar 처럼 함수를 직접 가져오는 경우
+    for _, module, func, _ in COLLECTORS.values():
+        if name == func:
+            return getattr(importlib.import_module(module), func)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["collect", "collect_calendar", "collect_notion", "collect_github"]
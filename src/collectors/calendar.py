@@ -1,78 +1,215 @@
 """Apple Calendar(iCloud CalDAV)에서 최근 일정 데이터를 수집하는 모듈"""
 
 import os
-from datetime import datetime, timedelta, timezone
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 
 import caldav
+from caldav.elements import dav
+from caldav.elements.base import ValuedBaseElement
 
+import config
+from src.collectors.cursors import load_cursor, save_cursor
+from src.local_cache import load_json, save_json
+from src.metrics import requests_hook
+from src.rate_limit import bucket_key, limit_session
+from src.user_context import get_env, map_with_context
 
-CALDAV_URL = "https://caldav.icloud.com"
 
+CALDAV_URL = os.environ.get("CALDAV_URL", "https://caldav.icloud.com")
+DISCOVERY_FILE = "caldav_calendars.json"
+KST = timezone(timedelta(hours=9))
 
-def collect_calendar(period_days: int) -> list[dict]:
+
+class GetCTag(ValuedBaseElement):
+    """CalendarServer ctag — 캘린더 안의 무엇이든 바뀌면 값이 바뀐다."""
+
+    tag = "{http://calendarserver.org/ns/}getctag"
+
+
+def collect_calendar(period_days: int, day: date | None = None) -> list[dict]:
     """iCloud CalDAV를 통해 Apple Calendar에서 최근 일정을 수집한다.
 
+    캘린더 탐색 결과는 캐시하고, 캘린더별 sync token과 ctag가 그대로인 캘린더는
+    검색하지 않고 저장된 일정을 재사용한다. 나머지 캘린더는 동시에 검색한다.
+
     Args:
         period_days: 수집할 기간 (일 단위)
+        day: 지정하면 오늘 대신 그 날짜(KST) 하루치를 수집한다 (백필용, 커서 사용 안 함)
 
     Returns:
         [{"summary": str, "description": str, "start": str, "end": str}, ...]
     """
-    apple_id = os.environ.get("APPLE_ID")
-    apple_app_password = os.environ.get("APPLE_APP_PASSWORD")
+    apple_id = get_env("APPLE_ID")
+    apple_app_password = get_env("APPLE_APP_PASSWORD")
 
     if not apple_id or not apple_app_password:
         print("[Calendar] APPLE_ID 또는 APPLE_APP_PASSWORD가 설정되지 않음 - 건너뜀")
         return []
 
     try:
-        client = caldav.DAVClient(
-            url=CALDAV_URL,
-            username=apple_id,
-            password=apple_app_password,
-        )
-        principal = client.principal()
-        calendars = principal.calendars()
+        calendars = _get_calendars(apple_id, apple_app_password)
     except Exception as e:
         print(f"[Calendar] iCloud 연결 실패: {e}")
         return []
 
-    KST = timezone(timedelta(hours=9))
-    now_kst = datetime.now(KST)
-    start = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
-    results = []
+    if day is None:
+        now_kst = datetime.now(KST)
+        start = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
+        # 하루 전체를 검색해 캐시하고, 반환할 때 지금까지 시작한 일정만 고른다
+        end = start + timedelta(days=1)
+        cutoff = now_kst
+        cursor = load_cursor("calendar", start.isoformat())
+        if cursor.get("window") != start.isoformat():
+            cursor = {"since": start.isoformat(), "window": start.isoformat(), "calendars": {}}
+    else:
+        start = datetime(day.year, day.month, day.day, tzinfo=KST)
+        end = start + timedelta(days=1)
+        cutoff = end - timedelta(microseconds=1)
+        cursor = {"calendars": {}}
+
+    def _collect_one(cal) -> tuple[dict | None, bool]:
+        """캘린더 하나를 처리한다. (커서 항목, 재사용 여부)를 반환한다."""
+        cached = cursor["calendars"].get(str(cal.url))
+        state = _calendar_state(cal)
+        if cached and state and state == cached["state"]:
+            return cached, True
 
-    for cal in calendars:
         try:
-            events = cal.search(
+            found = cal.search(
                 start=start,
-                end=now_kst,
+                end=end,
                 event=True,
                 expand=True,
             )
         except Exception as e:
             print(f"[Calendar] '{cal.name}' 검색 실패: {e}")
+            return None, False
+        return {"state": state, "events": _parse_events(found)}, False
+
+    workers = max(1, min(config.CALDAV_CONCURRENCY, len(calendars)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="caldav") as executor:
+        outcomes = map_with_context(executor, _collect_one, calendars)
+
+    events = []
+    reused = 0
+    seen = {}
+    for cal, (entry, was_reused) in zip(calendars, outcomes):
+        if entry is None:
             continue
+        seen[str(cal.url)] = entry
+        events.extend(entry["events"])
+        reused += was_reused
+
+    if day is None:
+        # 구독 해제된 캘린더는 커서에서도 지운다
+        cursor["calendars"] = seen
+        save_cursor("calendar", cursor)
+
+    cutoff_ts = cutoff.timestamp()
+    results = [
+        {k: v for k, v in event.items() if k != "start_ts"}
+        for event in events
+        if event["start_ts"] <= cutoff_ts
+    ]
+
+    print(f"[Calendar] {len(results)}개 일정 수집 완료 (캘린더 {len(calendars)}개 중 변경 없는 {reused}개 재사용)")
+    return results
+
 
-        for event in events:
-            try:
-                vevent = event.vobject_instance.vevent
-                summary = str(vevent.summary.value) if hasattr(vevent, "summary") else "제목 없음"
-                description = ""
-                if hasattr(vevent, "description"):
-                    description = str(vevent.description.value)[:200]
-
-                dtstart = vevent.dtstart.value
-                dtend = vevent.dtend.value if hasattr(vevent, "dtend") else dtstart
-
-                results.append({
-                    "summary": summary,
-                    "description": description,
-                    "start": str(dtstart),
-                    "end": str(dtend),
-                })
-            except Exception:
-                continue
-
-    print(f"[Calendar] {len(results)}개 일정 수집 완료")
+def _dav_client(url: str, apple_id: str, apple_app_password: str) -> caldav.DAVClient:
+    """요청마다 metrics span을 남기고 공유 요청 한도를 지키는 DAVClient를 만든다."""
+    client = caldav.DAVClient(url=url, username=apple_id, password=apple_app_password)
+    client.session.hooks["response"].append(requests_hook("caldav"))
+    # 요청 한도는 계정별로 따로 센다
+    limit_session(client.session, bucket_key("caldav", apple_id), url)
+    return client
+
+
+def _get_calendars(apple_id: str, apple_app_password: str) -> list:
+    """캘린더 목록을 반환한다.
+
+    principal/캘린더 탐색 결과(서버 주소, 캘린더 URL, 이름)를 로컬 캐시에 저장해 두고
+    config.CALDAV_DISCOVERY_TTL_HOURS 동안은 탐색 요청 없이 재사용한다.
+    iCloud는 계정마다 다른 호스트(pXX-caldav.icloud.com)를 쓰므로 그 주소도 함께 저장한다.
+    """
+    cache = load_json(DISCOVERY_FILE, {})
+    fresh = (
+        cache.get("apple_id") == apple_id
+        and time.time() - cache.get("discovered_at", 0) < config.CALDAV_DISCOVERY_TTL_HOURS * 3600
+    )
+    if fresh:
+        client = _dav_client(cache["base_url"], apple_id, apple_app_password)
+        return [client.calendar(url=c["url"], name=c["name"]) for c in cache["calendars"]]
+
+    client = _dav_client(CALDAV_URL, apple_id, apple_app_password)
+    calendars = client.principal().calendars()
+    save_json(DISCOVERY_FILE, {
+        "apple_id": apple_id,
+        "discovered_at": time.time(),
+        "base_url": str(client.url),
+        "calendars": [{"url": str(cal.url), "name": cal.name} for cal in calendars],
+    })
+    return calendars
+
+
+def _forget_calendars():
+    """캐시된 캘린더 목록을 지워 다음 실행에서 다시 탐색하게 한다."""
+    save_json(DISCOVERY_FILE, {})
+
+
+def _calendar_state(cal) -> dict | None:
+    """캘린더의 현재 sync token과 ctag를 PROPFIND 한 번으로 가져온다."""
+    try:
+        props = cal.get_properties([dav.SyncToken(), GetCTag()])
+    except caldav.error.NotFoundError:
+        # 캐시된 캘린더가 삭제됨
+        _forget_calendars()
+        return None
+    except Exception:
+        return None
+    state = {
+        "sync_token": props.get(dav.SyncToken.tag),
+        "ctag": props.get(GetCTag.tag),
+    }
+    if not state["sync_token"] and not state["ctag"]:
+        return None
+    return state
+
+
+def _to_timestamp(value) -> float:
+    """dtstart 값(date 또는 datetime)을 타임스탬프로 변환한다."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=KST)
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=KST).timestamp()
+    return 0.0
+
+
+def _parse_events(events) -> list[dict]:
+    """CalDAV 검색 결과를 일정 dict 리스트로 변환한다."""
+    results = []
+    for event in events:
+        try:
+            vevent = event.vobject_instance.vevent
+            summary = str(vevent.summary.value) if hasattr(vevent, "summary") else "제목 없음"
+            description = ""
+            if hasattr(vevent, "description"):
+                description = str(vevent.description.value)[:200]
+
+            dtstart = vevent.dtstart.value
+            dtend = vevent.dtend.value if hasattr(vevent, "dtend") else dtstart
+
+            results.append({
+                "summary": summary,
+                "description": description,
+                "start": str(dtstart),
+                "end": str(dtend),
+                "start_ts": _to_timestamp(dtstart),
+            })
+        except Exception:
+            continue
     return results
@@ -0,0 +1,35 @@
+"""수집기별 증분 커서를 로컬 캐시에 저장하는 모듈
+
+각 수집기는 마지막으로 본 지점(high-water mark, sync token 등)과
+현재 수집 창(window)의 결과를 함께 저장해 두고, 다음 실행에서는 그 이후의
+변경분만 가져와 합친다. 수집 창의 시작이 앞으로 이동한 경우(다음 날, 여러 날 창)는
+창 안에 남는 결과를 재사용하고, 뒤로 넓어진 경우는 처음부터 다시 수집한다.
+"""
+
+from src.local_cache import load_json, save_json
+
+
+def _file_name(source: str) -> str:
+    return f"cursor_{source}.json"
+
+
+def load_cursor(source: str, since: str) -> dict:
+    """source의 커서를 반환한다. 재사용할 수 없으면 빈 커서를 반환한다.
+
+    Args:
+        source: 수집기 이름 ("notion", "calendar", "github")
+        since: 이번 수집 창의 시작 (ISO 형식, 문자열 비교 가능해야 함)
+
+    Returns:
+        {"since": str, ...수집기별 필드}
+    """
+    cursor = load_json(_file_name(source), {})
+    if not cursor.get("since") or cursor["since"] > since:
+        return {"since": since}
+    cursor["since"] = since
+    return cursor
+
+
+def save_cursor(source: str, cursor: dict):
+    """source의 커서를 저장한다."""
+    save_json(_file_name(source), cursor)
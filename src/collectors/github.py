@@ -1,68 +1,306 @@
 """GitHub에서 오늘 커밋 데이터를 수집하는 모듈"""
 
 import os
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
 
 import httpx
 
+import config
+from src.collectors.cursors import load_cursor, save_cursor
+from src.local_cache import load_json, update_json
+from src.metrics import endpoint_name, httpx_hooks
+from src.rate_limit import RateLimitedTransport
+from src.user_context import get_env
+
 KST = timezone(timedelta(hours=9))
-GITHUB_API = "https://api.github.com"
+GITHUB_API = os.environ.get("GITHUB_API_URL", "https://api.github.com")
 # TODO: 회사 git 계정도 수집하기
 # TODO: GITHUB_TOKEN 발급 및 .env, GitHub Secrets 등록
-GITHUB_USER = "yeonwooz"
+
+HTTP_CACHE_FILE = "github_http_cache.json"
+EVENTS_FEED_LIMIT = 300
+
+_http_client = None
+_http_lock = threading.Lock()
+
+# 토큰 → 계정 이름 (GITHUB_USER가 없을 때 GET /user로 확인한 값)
+_token_users: dict[str, str] = {}
 
 
-def collect_github(period_days: int) -> list[dict]:
+def collect_github(period_days: int, day: date | None = None) -> list[dict]:
     """GitHub에서 최근 커밋을 수집한다.
 
     Args:
         period_days: 수집할 기간 (일 단위)
+        day: 지정하면 그 날짜(KST) 하루치 커밋을 수집한다 (백필용, 커서/이벤트 API 사용 안 함)
 
     Returns:
         [{"repo": str, "message": str, "time": str}, ...]
     """
-    token = os.environ.get("GITHUB_TOKEN")
+    token = get_env("GITHUB_TOKEN")
 
     if not token:
         print("[GitHub] GITHUB_TOKEN이 설정되지 않음 - 건너뜀")
         return []
 
-    today = datetime.now(KST).strftime("%Y-%m-%d")
-    since = (datetime.now(KST) - timedelta(days=period_days)).strftime("%Y-%m-%d")
+    if day is None:
+        today = datetime.now(KST).strftime("%Y-%m-%d")
+        since = (datetime.now(KST) - timedelta(days=period_days)).strftime("%Y-%m-%d")
+    else:
+        today = since = day.strftime("%Y-%m-%d")
 
     headers = {
         "Authorization": f"token {token}",
         "Accept": "application/vnd.github.v3+json",
     }
+    client = _get_http_client()
+    try:
+        user = _resolve_user(client, headers, token)
+    except Exception as e:
+        print(f"[GitHub] 계정 확인 실패 - 건너뜀: {e}")
+        return []
+    http_cache = {"old": load_json(HTTP_CACHE_FILE, {}), "new": {}}
 
-    query = f"author:{GITHUB_USER} committer-date:{since}..{today}"
+    # 커밋 날짜(committer date)는 푸시/검색 색인 순서와 다르므로 (다른 브랜치에서 늦게 푸시된 커밋 등)
+    # 마지막으로 본 시각 이후만 검색하면 커밋을 놓친다. 매번 창 전체를 검색하고 커서의 결과와 sha로 합친다.
+    # 바뀌지 않은 결과 페이지는 ETag로 304를 받으므로 창 전체를 다시 요청해도 저렴하다.
+    cursor = load_cursor("github", since) if day is None else {}
+    items = {
+        sha: item for sha, item in cursor.get("items", {}).items()
+        if _kst_date(item["time"]) >= since
+    }
+    skipped = set(cursor.get("skipped", []))
 
     try:
-        resp = httpx.get(
-            f"{GITHUB_API}/search/commits",
-            params={"q": query, "sort": "committer-date", "order": "desc", "per_page": 50},
-            headers=headers,
-            timeout=30,
-        )
-        resp.raise_for_status()
+        fetched = None
+        if config.GITHUB_USE_EVENTS and day is None:
+            fetched = _commits_from_events(client, headers, http_cache, user, since, items, skipped)
+        source = "events"
+        if fetched is None:
+            source = "search"
+            query = f"author:{user} committer-date:{since}..{today}"
+            fetched = _commits_from_search(client, headers, http_cache, query)
     except Exception as e:
         print(f"[GitHub] API 호출 실패: {e}")
-        return []
+        return _sorted_items(items)
+    finally:
+        _save_http_cache(http_cache["new"])
+
+    new_count = 0
+    for sha, item in fetched:
+        if sha not in items:
+            new_count += 1
+        items[sha] = item
+
+    if day is None:
+        save_cursor("github", {"since": cursor["since"], "items": items, "skipped": sorted(skipped)})
+
+    results = _sorted_items(items)
+    print(f"[GitHub] {len(results)}개 커밋 수집 완료 ({source}, 새 커밋 {new_count}개)")
+    return results
+
+
+def _resolve_user(client: httpx.Client, headers: dict, token: str) -> str:
+    """커밋을 모을 계정 이름. GITHUB_USER(배치 실행에서는 사용자별 값)가 없으면 토큰의 주인을 조회한다.
+
+    다른 사람의 커밋이 일기에 들어가지 않도록 고정된 기본 계정은 쓰지 않는다.
+    """
+    user = get_env("GITHUB_USER")
+    if user:
+        return user
+    with _http_lock:
+        cached = _token_users.get(token)
+    if cached:
+        return cached
+    resp = client.get("/user", headers=headers)
+    resp.raise_for_status()
+    login = resp.json()["login"]
+    with _http_lock:
+        _token_users[token] = login
+    return login
+
+
+def _get_http_client() -> httpx.Client:
+    """keep-alive 연결을 재사용하는 공유 httpx 클라이언트를 반환한다."""
+    global _http_client
+    with _http_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                base_url=GITHUB_API,
+                timeout=30,
+                # search API는 core API와 한도가 따로 있다
+                transport=RateLimitedTransport(
+                    "github",
+                    bucket_for=lambda request: "github_search" if request.url.path.endswith("/search/commits") else "github",
+                ),
+                event_hooks=httpx_hooks("github", _endpoint),
+            )
+        return _http_client
+
+
+def _endpoint(url: httpx.URL) -> str:
+    """메트릭용 엔드포인트 이름 (사용자/저장소 이름은 뺀다)."""
+    if url.path.endswith("/events"):
+        return "events"
+    if "/repos/" in url.path and "/commits/" in url.path:
+        return "repos.commits"
+    return endpoint_name(url.path)
+
+
+def _save_http_cache(new: dict):
+    """이번 실행에서 쓴 응답을 캐시 파일에 합쳐 저장한다.
+
+    병렬 백필의 다른 날짜도 같은 파일에 쓰므로 덮어쓰지 않고 합치며,
+    한동안 쓰이지 않은 (지난 쿼리의) 항목은 지워 캐시가 계속 쌓이지 않게 한다.
+    """
+    cutoff = time.time() - config.GITHUB_HTTP_CACHE_MAX_AGE_DAYS * 86400
+
+    def merge(cache: dict) -> dict:
+        cache.update(new)
+        return {key: entry for key, entry in cache.items() if entry.get("used_at", 0) >= cutoff}
 
-    data = resp.json()
+    update_json(HTTP_CACHE_FILE, merge, {})
+
+
+def _get_pages(client: httpx.Client, headers: dict, http_cache: dict, path: str, params: dict):
+    """Link 헤더의 next를 따라가며 응답 본문을 한 페이지씩 돌려준다.
+
+    페이지마다 ETag를 http_cache({"old": 지난 실행, "new": 이번 실행})에 저장해 두고 If-None-Match로 요청하므로,
+    바뀌지 않은 페이지는 304로 응답받아 (rate limit 소모 없이) 캐시된 본문을 쓴다.
+    """
+    url = path
+    while url:
+        request = client.build_request("GET", url, params=params, headers=headers)
+        key = str(request.url)
+        cached = http_cache["old"].get(key)
+        if cached:
+            request.headers["If-None-Match"] = cached["etag"]
+
+        resp = client.send(request)
+        if resp.status_code == 304 and cached:
+            body, next_url = cached["body"], cached.get("next")
+            http_cache["new"][key] = {**cached, "used_at": time.time()}
+        else:
+            resp.raise_for_status()
+            body, next_url = resp.json(), resp.links.get("next", {}).get("url")
+            if resp.headers.get("ETag"):
+                http_cache["new"][key] = {
+                    "etag": resp.headers["ETag"], "body": body, "next": next_url, "used_at": time.time(),
+                }
+
+        yield body
+        # next URL에는 쿼리가 이미 들어 있다
+        url, params = next_url, None
+
+
+def _commits_from_search(client: httpx.Client, headers: dict, http_cache: dict, query: str) -> list[tuple[str, dict]]:
+    """Search API로 커밋을 모든 페이지에 걸쳐 가져온다."""
+    params = {"q": query, "sort": "committer-date", "order": "desc", "per_page": 100}
     results = []
+    for body in _get_pages(client, headers, http_cache, "/search/commits", params):
+        for item in body.get("items", []):
+            commit = item.get("commit", {})
+            committer_date = commit.get("committer", {}).get("date", "")
+            results.append((item.get("sha", committer_date), {
+                "repo": item.get("repository", {}).get("full_name", ""),
+                "message": commit.get("message", "").split("\n")[0],  # 첫 줄만
+                "time": committer_date,
+            }))
+    return results
+
 
-    for item in data.get("items", []):
-        commit = item.get("commit", {})
-        repo_name = item.get("repository", {}).get("full_name", "")
-        message = commit.get("message", "").split("\n")[0]  # 첫 줄만
-        committer_date = commit.get("committer", {}).get("date", "")
+def _commits_from_events(
+    client: httpx.Client, headers: dict, http_cache: dict, user: str, since: str, known: dict, skipped: set,
+) -> list[tuple[str, dict]] | None:
+    """사용자 이벤트(PushEvent)에서 커밋을 가져온다.
+
+    Search API(분당 30회)보다 저렴한 core API를 쓰지만, 이벤트 피드는 최근 300개까지만
+    제공하므로 수집 창 시작보다 오래된 이벤트까지 닿았을 때만 결과를 인정한다.
+    피드가 창을 덮지 못하거나 커밋 정보가 없는 PushEvent가 있으면 None을 반환한다.
+
+    PushEvent의 커밋에는 날짜와 작성자 계정이 없으므로, 검색 경로(author:user, committer date)와
+    같은 결과가 되도록 known(커서의 커밋)과 skipped(이미 조회해 제외한 커밋)에 없는 커밋만 조회한다.
+    조회할 커밋이 config.GITHUB_EVENTS_MAX_LOOKUPS개보다 많거나 조회에 실패하면 None을 반환한다
+    (커밋마다 한 번씩 부르면 core API 한도에 걸려 검색 한 번보다 느리다).
+    """
+    pushed = []  # (sha, repo, message)
+    covered = False
+    total = 0
+    for body in _get_pages(client, headers, http_cache, f"/users/{user}/events", {"per_page": 100}):
+        for event in body:
+            total += 1
+            created = event.get("created_at", "")
+            if not created or _kst_date(created) < since:
+                covered = True
+                break
+            if event.get("type") != "PushEvent":
+                continue
+            commits = event.get("payload", {}).get("commits")
+            if commits is None:
+                return None
+            repo = event.get("repo", {}).get("name", "")
+            for commit in commits:
+                if commit.get("distinct", True) and commit["sha"] not in skipped:
+                    pushed.append((commit["sha"], repo, commit.get("message", "").split("\n")[0]))
+        if covered:
+            break
+    else:
+        # 피드 끝까지 읽었고 상한(300개)에 걸리지 않았다면 창 전체가 들어 있다
+        covered = total < EVENTS_FEED_LIMIT
+    if not covered:
+        return None
 
-        results.append({
-            "repo": repo_name,
-            "message": message,
-            "time": committer_date,
-        })
+    unknown = {sha for sha, _, _ in pushed if sha not in known}
+    if len(unknown) > config.GITHUB_EVENTS_MAX_LOOKUPS:
+        print(f"[GitHub] 새 커밋 {len(unknown)}개 - 커밋별 조회 대신 검색 사용")
+        return None
 
-    print(f"[GitHub] {len(results)}개 커밋 수집 완료")
+    results = []
+    for sha, repo, message in pushed:
+        if sha in known:
+            results.append((sha, {"repo": repo, "message": message, "time": known[sha]["time"]}))
+            continue
+        commit = _commit_info(client, headers, http_cache, repo, sha)
+        if commit is None:
+            return None
+        login, committed = commit
+        # 다른 사람의 커밋이나 창보다 이른 커밋은 다음 실행에서 다시 조회하지 않는다
+        if (login or "").lower() != user.lower() or _kst_date(committed) < since:
+            skipped.add(sha)
+            continue
+        results.append((sha, {"repo": repo, "message": message, "time": committed}))
     return results
+
+
+def _commit_info(client: httpx.Client, headers: dict, http_cache: dict, repo: str, sha: str) -> tuple[str | None, str] | None:
+    """커밋의 (작성자 계정, committer date)를 조회한다. 커밋을 찾을 수 없으면 None.
+
+    작성자 이메일이 GitHub 계정과 연결되지 않았으면 계정은 None이다 (검색의 author:에도 걸리지 않는다).
+    """
+    try:
+        body = next(_get_pages(client, headers, http_cache, f"/repos/{repo}/commits/{sha}", {}))
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in (404, 409, 422):
+            return None
+        raise
+    committed = body.get("commit", {}).get("committer", {}).get("date")
+    if not committed:
+        return None
+    return (body.get("author") or {}).get("login"), committed
+
+
+def _parse_time(value: str) -> datetime:
+    """GitHub의 ISO 시각 문자열을 datetime으로 변환한다."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _kst_date(value: str) -> str:
+    """ISO 시각 문자열을 KST 기준 날짜(YYYY-MM-DD)로 변환한다."""
+    return _parse_time(value).astimezone(KST).strftime("%Y-%m-%d")
+
+
+def _sorted_items(items: dict) -> list[dict]:
+    """커서에 저장된 커밋을 최근 순으로 정렬한다."""
+    return sorted(items.values(), key=lambda item: _parse_time(item["time"]), reverse=True)
@@ -1,71 +1,178 @@
 """Notion에서 최근 활동 데이터를 수집하는 모듈"""
 
-import os
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from notion_client import Client
 
+import config
+from src.collectors.cursors import load_cursor, save_cursor
+from src.notion_session import get_notion_client
+from src.user_context import get_env, map_with_context
+
 KST = timezone(timedelta(hours=9))
 
 
-def collect_notion(period_days: int) -> list[dict]:
+def collect_notion(period_days: int, day: date | None = None) -> list[dict]:
     """Notion 워크스페이스 전체에서 최근 수정된 페이지를 검색하여 수집한다.
 
     Args:
         period_days: 수집할 기간 (일 단위)
+        day: 지정하면 오늘 대신 그 날짜(KST)에 마지막으로 수정된 페이지를 수집한다
+            (커서 사용 안 함). 여러 날짜는 collect_notion_by_day로 한 번에 수집한다.
 
     Returns:
         [{"title": str, "tags": list[str], "excerpt": str, "last_edited": str}, ...]
     """
-    token = os.environ.get("NOTION_TOKEN")
+    token = get_env("NOTION_TOKEN")
 
     if not token:
         print("[Notion] NOTION_TOKEN이 설정되지 않음 - 건너뜀")
         return []
 
-    client = Client(auth=token)
+    if day is not None:
+        return collect_notion_by_day(day, day).get(day.isoformat(), [])
+
+    client = get_notion_client(token)
     since = datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0)
+    # 지난 실행 이후 수정된 페이지만 다시 읽고, 나머지는 커서에 저장된 결과를 쓴다
+    cursor = load_cursor("notion", since.isoformat())
+    items = {
+        page_id: item for page_id, item in cursor.get("items", {}).items()
+        if _parse_time(item["last_edited"]) >= since
+    }
+    stop_at = since
+    if cursor.get("high_water"):
+        stop_at = max(since, _parse_time(cursor["high_water"]))
 
+    db_name_cache = {}
+    pages = []
+    skipped_todo = 0
+    high_water = cursor.get("high_water")
+    refreshed = set()
     try:
-        response = client.search(
-            filter={"property": "object", "value": "page"},
-            sort={"direction": "descending", "timestamp": "last_edited_time"},
-            page_size=50,
-        )
+        for page in _iter_pages_edited_since(client, stop_at):
+            last_edited_str = page["last_edited_time"]
+            if not high_water or _parse_time(last_edited_str) > _parse_time(high_water):
+                high_water = last_edited_str
+
+            # 다시 수정된 페이지는 이전 결과를 버리고 새로 판단한다
+            refreshed.add(page["id"])
+
+            if _is_unfinished_todo(client, page, db_name_cache):
+                skipped_todo += 1
+                continue
+            pages.append(page)
     except Exception as e:
         print(f"[Notion] API 호출 실패: {e}")
-        return []
+        return _sorted_items(items)
+
+    for page_id in refreshed:
+        items.pop(page_id, None)
+
+    excerpts = _fetch_excerpts(client, [page["id"] for page in pages])
+
+    for page, excerpt in zip(pages, excerpts):
+        items[page["id"]] = _to_item(page, excerpt)
+
+    save_cursor("notion", {"since": cursor["since"], "high_water": high_water, "items": items})
+
+    results = _sorted_items(items)
+    print(f"[Notion] {len(results)}개 페이지 수집 완료 (새로 읽음 {len(pages)}개, 미완료 할일 {skipped_todo}개 제외)")
+    return results
+
+
+def collect_notion_by_day(start: date, end: date) -> dict[str, list[dict]]:
+    """start~end(KST, 포함) 기간에 마지막으로 수정된 페이지를 한 번의 검색으로 모아 날짜별로 나눈다 (백필용).
+
+    Notion은 마지막 수정 시각만 알려주므로 그 뒤에 다시 수정된 페이지는 포함되지 않는다.
+    검색이 중간에 실패하면 어느 날짜가 완전한지 알 수 없으므로 빈 dict를 반환한다.
+
+    Returns:
+        {"YYYY-MM-DD": [collect_notion과 같은 형식, 최근 수정 순], ...} (페이지가 없는 날짜는 빠진다)
+    """
+    token = get_env("NOTION_TOKEN")
+    if not token:
+        print("[Notion] NOTION_TOKEN이 설정되지 않음 - 건너뜀")
+        return {}
+
+    client = get_notion_client(token)
+    since = datetime(start.year, start.month, start.day, tzinfo=KST)
+    until = datetime(end.year, end.month, end.day, tzinfo=KST) + timedelta(days=1)
 
     db_name_cache = {}
-    results = []
+    pages = []
     skipped_todo = 0
-    for page in response.get("results", []):
-        last_edited_str = page.get("last_edited_time", "")
-        if not last_edited_str:
-            continue
-
-        last_edited = datetime.fromisoformat(last_edited_str.replace("Z", "+00:00"))
-        if last_edited < since:
-            continue
-
-        # "할일" DB 페이지는 체크박스가 체크된 것만 포함
-        if _is_in_todo_db(client, page, db_name_cache):
-            if not _has_checked_checkbox(page):
+    try:
+        for page in _iter_pages_edited_since(client, since):
+            if _parse_time(page["last_edited_time"]) >= until:
+                continue
+            if _is_unfinished_todo(client, page, db_name_cache):
                 skipped_todo += 1
                 continue
+            pages.append(page)
+    except Exception as e:
+        print(f"[Notion] API 호출 실패: {e}")
+        return {}
 
-        title = _extract_title(page)
-        tags = _extract_tags(page)
-        excerpt = _extract_excerpt(client, page["id"])
+    excerpts = _fetch_excerpts(client, [page["id"] for page in pages])
 
-        results.append({
-            "title": title,
-            "tags": tags,
-            "excerpt": excerpt,
-            "last_edited": last_edited_str,
-        })
+    # 검색 결과가 최근 수정 순이므로 날짜별 목록도 그 순서를 따른다
+    by_day = {}
+    for page, excerpt in zip(pages, excerpts):
+        day = _parse_time(page["last_edited_time"]).astimezone(KST).strftime("%Y-%m-%d")
+        by_day.setdefault(day, []).append(_to_item(page, excerpt))
 
-    print(f"[Notion] {len(results)}개 페이지 수집 완료 (미완료 할일 {skipped_todo}개 제외)")
-    return results
+    print(f"[Notion] {start}~{end} 페이지 {len(pages)}개 수집 완료 ({len(by_day)}일, 미완료 할일 {skipped_todo}개 제외)")
+    return by_day
+
+
+def _to_item(page: dict, excerpt: str) -> dict:
+    return {
+        "title": _extract_title(page),
+        "tags": _extract_tags(page),
+        "excerpt": excerpt,
+        "last_edited": page["last_edited_time"],
+    }
+
+
+def _iter_pages_edited_since(client: Client, since: datetime, page_size: int = 50):
+    """since 이후 수정된 페이지를 최근 수정 순으로 하나씩 돌려준다.
+
+    검색 결과가 last_edited_time 내림차순이므로 next_cursor를 따라가다가
+    since보다 오래된 페이지를 만나는 즉시 멈춘다. 필요한 페이지만 요청하고
+    한 번에 한 페이지 분량만 메모리에 둔다.
+    """
+    start_cursor = None
+    while True:
+        kwargs = {"start_cursor": start_cursor} if start_cursor else {}
+        response = client.search(
+            filter={"property": "object", "value": "page"},
+            sort={"direction": "descending", "timestamp": "last_edited_time"},
+            page_size=page_size,
+            **kwargs,
+        )
+        for page in response.get("results", []):
+            last_edited_str = page.get("last_edited_time", "")
+            if not last_edited_str:
+                continue
+            # last_edited_time은 분 단위라 since와 같은 시각도 포함한다
+            if _parse_time(last_edited_str) < since:
+                return
+            yield page
+
+        if not response.get("has_more"):
+            return
+        start_cursor = response.get("next_cursor")
+
+
+def _parse_time(value: str) -> datetime:
+    """Notion의 ISO 시각 문자열을 datetime으로 변환한다."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _sorted_items(items: dict) -> list[dict]:
+    """커서에 저장된 결과를 최근 수정 순으로 정렬한다."""
+    return sorted(items.values(), key=lambda item: _parse_time(item["last_edited"]), reverse=True)
 
 
 def _is_in_todo_db(client: Client, page: dict, cache: dict) -> bool:
@@ -86,6 +193,11 @@ def _is_in_todo_db(client: Client, page: dict, cache: dict) -> bool:
     return "할일" in cache[db_id]
 
 
+def _is_unfinished_todo(client: Client, page: dict, cache: dict) -> bool:
+    """"할일" DB 페이지 중 체크박스가 체크되지 않은 것인지 확인한다 (체크된 것만 수집에 포함)."""
+    return _is_in_todo_db(client, page, cache) and not _has_checked_checkbox(page)
+
+
 def _has_checked_checkbox(page: dict) -> bool:
     """페이지의 checkbox 속성 중 하나라도 체크되어 있는지 확인한다."""
     for prop in page.get("properties", {}).values():
@@ -116,18 +228,46 @@ def _extract_tags(page: dict) -> list[str]:
     return tags
 
 
+def _fetch_excerpts(client: Client, page_ids: list[str], concurrency: int | None = None) -> list[str]:
+    """여러 페이지의 본문 발췌를 동시에 가져온다.
+
+    결과 순서는 page_ids 순서와 같다. 일부 요청이 실패해도 나머지 결과는 그대로 반환하고,
+    실패한 페이지의 발췌는 빈 문자열이 된다.
+
+    Args:
+        client: Notion 클라이언트
+        page_ids: 발췌를 가져올 페이지 ID 목록
+        concurrency: 동시 요청 수, None이면 config.NOTION_EXCERPT_CONCURRENCY
+    """
+    if not page_ids:
+        return []
+
+    workers = max(1, min(concurrency or config.NOTION_EXCERPT_CONCURRENCY, len(page_ids)))
+
+    def _fetch(page_id: str) -> str | None:
+        try:
+            return _extract_excerpt(client, page_id)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notion-excerpt") as executor:
+        excerpts = map_with_context(executor, _fetch, page_ids)
+
+    failed = excerpts.count(None)
+    if failed:
+        print(f"[Notion] 본문 발췌 {len(page_ids)}건 중 {failed}건 실패 - 나머지만 사용")
+    return [e or "" for e in excerpts]
+
+
 def _extract_excerpt(client: Client, page_id: str, max_length: int = 300) -> str:
-    """페이지 본문의 첫 부분을 텍스트로 추출한다."""
-    try:
-        blocks = client.blocks.children.list(block_id=page_id, page_size=10)
-        texts = []
-        for block in blocks.get("results", []):
-            block_type = block.get("type", "")
-            block_data = block.get(block_type, {})
-            rich_texts = block_data.get("rich_text", [])
-            for rt in rich_texts:
-                texts.append(rt.get("plain_text", ""))
-        full_text = " ".join(texts)
-        return full_text[:max_length]
-    except Exception:
-        return ""
+    """페이지 본문의 첫 부분을 텍스트로 추출한다. 요청 실패 시 예외를 그대로 올린다."""
+    blocks = client.blocks.children.list(block_id=page_id, page_size=10)
+    texts = []
+    for block in blocks.get("results", []):
+        block_type = block.get("type", "")
+        block_data = block.get(block_type, {})
+        rich_texts = block_data.get("rich_text", [])
+        for rt in rich_texts:
+            texts.append(rt.get("plain_text", ""))
+    full_text = " ".join(texts)
+    return full_text[:max_length]
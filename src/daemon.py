@@ -0,0 +1,103 @@
+"""하루봇 상주 모드 (haru-bot serve)
+
+프로세스를 계속 띄워 둔 채로:
+- 내부 스케줄러가 config.SERVE_RUN_TIMES(KST)마다 파이프라인(run)을 실행하고,
+- 답장 수신기가 Telegram 롱 폴링으로 답장을 받는 즉시 해당 날짜 일기에 반영한다.
+
+Telegram 세션, Notion 연결 풀, 로컬 캐시가 실행 사이에 그대로 유지되므로
+매 실행마다 콜드 스타트 비용을 내지 않고, 답장도 5분 대기 창에 묶이지 않는다.
+"""
+
+import signal
+import threading
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+import config
+from src.diary_store import close_diary_sync, diary_exists, upsert_diary
+from src.main import KST, _parse_messages, run
+from src.telegram_bot import close_session, send_message, start_reply_listener
+
+
+def _next_run_time(now: datetime, run_times: list[str]) -> datetime:
+    """now 이후 가장 가까운 실행 시각을 반환한다."""
+    candidates = []
+    for day_offset in (0, 1):
+        day = now + timedelta(days=day_offset)
+        for hhmm in run_times:
+            hour, minute = (int(x) for x in hhmm.split(":"))
+            at = day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if at > now:
+                candidates.append(at)
+    return min(candidates)
+
+
+def _reply_target_date() -> tuple[str, bool]:
+    """답장을 붙일 일기 날짜와 그 일기가 있는지 여부.
+
+    오늘 일기가 있으면 오늘, 없으면 어제. 둘 다 없으면 (처음 설치, 실행하지 않은 날)
+    오늘 날짜에 붙이고, 요약은 오늘 실행에서 채워진다.
+    """
+    now = datetime.now(KST)
+    today = now.strftime("%Y-%m-%d")
+    yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+    if diary_exists(today):
+        return today, True
+    if diary_exists(yesterday):
+        return yesterday, True
+    return today, False
+
+
+def _handle_replies(replies: list[str]):
+    """받은 답장을 코멘트/설정으로 나눠 바로 일기에 반영한다.
+
+    붙일 일기가 없으면 요약 없는 일기를 만들어 답장을 보관한다 (다시 받아도 결과가 같으므로
+    재시도하지 않는다). 로컬 저장에 실패한 경우(일시적 오류)에만 예외를 올려 답장 수신기가
+    같은 메시지를 다시 받도록 한다.
+    """
+    date, exists = _reply_target_date()
+    comments, settings = _parse_messages(replies)
+
+    # 코멘트와 설정을 한 번의 쓰기로 반영한다
+    comment = "\n".join(comments) if comments else None
+    if not upsert_diary(date, comment=comment, settings=settings, create=True):
+        raise RuntimeError(f"{date} 일기 반영 실패")
+    if not exists:
+        print(f"[Serve] {date} 일기가 아직 없어 답장만 먼저 저장")
+        send_message("아직 오늘 일기가 없어서 답장을 먼저 저장해 두었어요. 오늘 요약과 함께 기록할게요.")
+    for s in settings:
+        send_message(f"설정 저장됨: {s}")
+
+
+def serve():
+    """상주 모드로 실행한다. SIGINT/SIGTERM을 받으면 종료한다."""
+    load_dotenv()
+    stop = threading.Event()
+
+    def _stop(signum, frame):
+        print(f"\n[Serve] 종료 신호 수신 ({signal.Signals(signum).name})")
+        stop.set()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    listener = start_reply_listener(_handle_replies)
+    print(f"[Serve] 상주 모드 시작 (실행 시각: {', '.join(config.SERVE_RUN_TIMES)} KST)")
+
+    try:
+        while not stop.is_set():
+            next_run = _next_run_time(datetime.now(KST), config.SERVE_RUN_TIMES)
+            print(f"[Serve] 다음 실행: {next_run.strftime('%Y-%m-%d %H:%M')}")
+            if stop.wait((next_run - datetime.now(KST)).total_seconds()):
+                break
+            try:
+                run(serve_mode=True)
+            except Exception as e:
+                print(f"[Serve] 파이프라인 실행 실패: {e}")
+    finally:
+        if listener:
+            listener.cancel()
+        close_session()
+        close_diary_sync()
+        print("[Serve] 종료")
@@ -0,0 +1,169 @@
+"""일기를 로컬 SQLite에 저장하는 모듈 (diary_store의 1차 저장소)
+
+날짜가 기본 키인 diary 테이블 하나에 요약/코멘트/설정과 대응하는 Notion 페이지 ID를 둔다.
+로컬에서 바꾼 필드는 dirty에 기록해 두었다가 diary_sync가 Notion에 쓰고 지운다.
+파일은 로컬 캐시 디렉터리(.cache/diary.sqlite3, 배치 실행에서는 사용자별)에 둔다.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from src.local_cache import cache_path
+
+DB_FILE = "diary.sqlite3"
+FIELDS = ("summary", "comment", "setting")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS diary (
+    date TEXT PRIMARY KEY,
+    summary TEXT,
+    comment TEXT,
+    setting TEXT,
+    page_id TEXT,
+    remote_edited TEXT,
+    dirty TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS diary_dirty ON diary (date) WHERE dirty != '';
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 파일 경로 → 연결. 호출이 짧아 연결 하나를 락으로 나눠 쓴다
+_connections: dict[str, sqlite3.Connection] = {}
+_lock = threading.RLock()
+
+
+def _connect() -> sqlite3.Connection:
+    path = cache_path(DB_FILE)
+    conn = _connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _connections[path] = conn
+    return conn
+
+
+@contextmanager
+def _transaction():
+    """현재 사용자의 DB에서 트랜잭션 하나를 연다."""
+    with _lock:
+        conn = _connect()
+        with conn:
+            yield conn
+
+
+def close():
+    """열린 연결을 모두 닫는다."""
+    with _lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
+
+
+def get_entry(date: str) -> dict | None:
+    """날짜의 일기 행을 반환한다. 없으면 None."""
+    with _transaction() as conn:
+        row = conn.execute("SELECT * FROM diary WHERE date = ?", (date,)).fetchone()
+    return dict(row) if row else None
+
+
+def write_entry(date: str, changes: dict[str, str]):
+    """필드를 바꾸고 Notion에 쓸 필드(dirty)로 표시한다. 행이 없으면 만든다."""
+    changes = {k: v for k, v in changes.items() if k in FIELDS}
+    if not changes:
+        return
+    with _transaction() as conn:
+        row = conn.execute("SELECT dirty FROM diary WHERE date = ?", (date,)).fetchone()
+        dirty = set(filter(None, row["dirty"].split(","))) if row else set()
+        dirty.update(changes)
+        if row is None:
+            conn.execute("INSERT INTO diary (date) VALUES (?)", (date,))
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        conn.execute(
+            f"UPDATE diary SET {assignments}, dirty = ?, version = version + 1 WHERE date = ?",
+            (*changes.values(), ",".join(sorted(dirty)), date),
+        )
+
+
+def dirty_entries(date: str | None = None) -> list[dict]:
+    """Notion에 아직 쓰지 않은 변경이 있는 행 (date를 주면 그 날짜만)."""
+    with _transaction() as conn:
+        if date is None:
+            rows = conn.execute("SELECT * FROM diary WHERE dirty != '' ORDER BY date").fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM diary WHERE dirty != '' AND date = ?", (date,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def mark_synced(date: str, version: int, page_id: str):
+    """Notion에 쓴 결과를 기록한다. 쓰는 동안 로컬에서 다시 바뀌었으면 dirty는 그대로 둔다."""
+    with _transaction() as conn:
+        conn.execute("UPDATE diary SET page_id = ? WHERE date = ?", (page_id, date))
+        conn.execute("UPDATE diary SET dirty = '' WHERE date = ? AND version = ?", (date, version))
+
+
+def set_page_id(date: str, page_id: str | None):
+    """날짜의 Notion 페이지 ID를 기록하거나 (None이면) 지운다."""
+    with _transaction() as conn:
+        conn.execute("UPDATE diary SET page_id = ? WHERE date = ?", (page_id, date))
+
+
+def apply_remote(pages: list[dict]):
+    """Notion에서 읽은 일기들을 한 트랜잭션으로 반영한다.
+
+    아직 Notion에 쓰지 않은 로컬 변경이 있는 필드는 로컬 값을 유지한다.
+
+    Args:
+        pages: {"date", "page_id", "remote_edited", "summary", "comment", "setting"} 목록
+    """
+    with _transaction() as conn:
+        for page in pages:
+            date = page["date"]
+            row = conn.execute("SELECT dirty FROM diary WHERE date = ?", (date,)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO diary (date) VALUES (?)", (date,))
+                dirty = set()
+            else:
+                dirty = set(filter(None, row["dirty"].split(",")))
+            remote = {k: page[k] for k in FIELDS if k in page and k not in dirty}
+            assignments = "".join(f", {name} = ?" for name in remote)
+            conn.execute(
+                f"UPDATE diary SET page_id = ?, remote_edited = ?{assignments} WHERE date = ?",
+                (page["page_id"], page.get("remote_edited"), *remote.values(), date),
+            )
+
+
+def all_settings() -> list[str]:
+    """설정이 있는 일기의 설정을 날짜순으로 반환한다."""
+    with _transaction() as conn:
+        rows = conn.execute(
+            "SELECT setting FROM diary WHERE setting IS NOT NULL AND setting != '' ORDER BY date"
+        ).fetchall()
+    return [row["setting"] for row in rows]
+
+
+def get_meta(key: str) -> str | None:
+    with _transaction() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def set_meta(key: str, value: str | None):
+    with _transaction() as conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def reset_remote(db_id: str):
+    """Notion DB가 바뀌면 페이지 ID와 동기화 상태를 지운다 (로컬 일기 내용은 그대로 둔다)."""
+    with _transaction() as conn:
+        conn.execute("DELETE FROM meta")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('db_id', ?)", (db_id,))
+        conn.execute("UPDATE diary SET page_id = NULL, remote_edited = NULL")
@@ -1,182 +1,151 @@
-"""Notion 데이터베이스에 일기를 저장하는 모듈"""
+"""일기를 저장하고 읽는 모듈
 
-import os
+읽기와 쓰기는 로컬 SQLite 저장소(diary_db)에서 바로 처리하고, Notion diary DB 반영은
+diary_sync가 백그라운드에서 한다. Notion이 느리거나 응답하지 않아도 일기는 로컬에 남았다가
+다음 동기화 때 쓰인다. 처음 실행할 때는 Notion의 일기를 한 번 모두 받아 온다.
+"""
 
-from notion_client import Client
+import contextvars
+import sqlite3
+from contextlib import contextmanager
 
+from src import diary_db, diary_sync
 
-def _get_client_and_db() -> tuple[Client, str] | tuple[None, None]:
-    """Notion 클라이언트와 DB ID를 반환한다."""
-    token = os.environ.get("NOTION_TOKEN")
-    db_id = os.environ.get("NOTION_DIARY_DB_ID")
-    if not token or not db_id:
-        print("[Diary] NOTION_TOKEN 또는 NOTION_DIARY_DB_ID가 설정되지 않음 - 건너뜀")
-        return None, None
-    return Client(auth=token), db_id
 
-
-def _find_page(client: Client, db_id: str, date: str) -> str | None:
-    """지정한 날짜의 일기 페이지 ID를 찾는다."""
-    db_id_clean = db_id.replace("-", "")
-    try:
-        results = client.search(filter={"property": "object", "value": "page"})
-    except Exception as e:
-        print(f"[Diary] Notion 검색 실패: {e}")
-        return None
-
-    for page in results.get("results", []):
-        parent = page.get("parent", {})
-        if parent.get("database_id", "").replace("-", "") != db_id_clean:
-            continue
-        date_prop = page["properties"].get("date", {}).get("date")
-        if date_prop and date_prop.get("start") == date:
-            return page["id"]
-    return None
+def _ensure_imported():
+    """로컬 저장소가 비어 있으면(처음 실행) Notion의 일기를 받아 온다."""
+    if diary_sync.notion_configured() and not diary_sync.has_pulled():
+        diary_sync.refresh(max_age=float("inf"))
 
 
 def ensure_setting_column():
     """Notion diary DB에 setting 컬럼이 없으면 추가한다."""
-    client, db_id = _get_client_and_db()
-    if not client:
-        return
+    diary_sync.ensure_setting_column()
+
+
+def diary_exists(date: str) -> bool:
+    """지정한 날짜의 일기가 있는지 확인한다 (로컬 저장소 조회)."""
+    _ensure_imported()
+    entry = diary_db.get_entry(date)
+    return entry is not None and entry["summary"] is not None
+
+
+def _merge_settings(existing: str, settings: list[str]) -> str:
+    """기존 설정 뒤에 새 설정을 이어 붙인다. 이미 있는 줄은 다시 넣지 않는다 (재실행 시 중복 방지)."""
+    lines = [line for line in existing.split("\n") if line.strip()]
+    for setting in settings:
+        for line in setting.split("\n"):
+            if line.strip() and line not in lines:
+                lines.append(line)
+    return "\n".join(lines)
+
+
+# buffered_diary_writes 안이면 Notion 쓰기를 미뤘다가 블록이 끝날 때 한 번에 한다
+_held: contextvars.ContextVar[bool] = contextvars.ContextVar("diary_writes_held", default=False)
+
+
+def _request_sync():
+    if not _held.get():
+        diary_sync.request_push()
+
+
+@contextmanager
+def buffered_diary_writes():
+    """with 블록 안의 일기 변경을 Notion에 바로 쓰지 않고, 블록이 끝날 때 날짜마다 한 번에 쓴다.
+
+    요약 저장 → 코멘트 → 설정처럼 한 실행에서 같은 날짜를 여러 번 고쳐도 Notion 쓰기는
+    날짜당 한 번이다. 로컬 저장소에는 바로 저장된다.
+    """
+    token = _held.set(True)
     try:
-        db = client.databases.retrieve(database_id=db_id)
-        if "setting" not in db["properties"]:
-            client.databases.update(
-                database_id=db_id,
-                properties={"setting": {"rich_text": {}}},
-            )
-            print("[Diary] setting 컬럼 추가 완료")
-    except Exception as e:
-        print(f"[Diary] setting 컬럼 확인/추가 실패: {e}")
+        yield
+    finally:
+        _held.reset(token)
+        flush_diary_writes()
+
+
+def flush_diary_writes(date: str | None = None) -> bool:
+    """아직 Notion에 쓰지 않은 변경을 지금 쓴다 (date를 주면 그 날짜만). 모두 성공하면 True."""
+    if not diary_db.dirty_entries(date):
+        return True
+    return diary_sync.push(date)
 
 
-def save_diary(date: str, summary: str, comment: str | None = None, setting: str | None = None):
-    """오늘의 일기를 Notion DB에 저장한다.
+def upsert_diary(date: str, summary: str | None = None, comment: str | None = None,
+                 settings: list[str] | None = None, create: bool = False) -> bool:
+    """날짜의 일기를 만들거나 갱신한다. 준 값만 바꾸고, 설정은 기존 설정 뒤에 이어 붙인다.
+
+    로컬 저장소에 바로 저장하고 Notion에는 백그라운드에서 쓴다. 일기가 없으면
+    summary가 있거나 create가 True일 때만 새로 만든다 (요약은 그날 실행에서 채워진다).
 
     Args:
         date: 날짜 (YYYY-MM-DD)
         summary: Claude가 생성한 오늘 한 일 요약
-        comment: 사용자 코멘트
-        setting: 사용자 설정 (프롬프트 피드백)
+        comment: 사용자 코멘트 (기존 코멘트를 바꾼다)
+        settings: 사용자 설정 (프롬프트 피드백)
+        create: 요약 없이도 일기를 만든다 (일기보다 먼저 온 답장을 버리지 않기 위해)
     """
-    client, db_id = _get_client_and_db()
-    if not client:
-        return False
+    if summary is None and not comment and not settings:
+        return True
 
-    properties = {
-        "summary": {"title": [{"text": {"content": summary[:2000]}}]},
-        "date": {"date": {"start": date}},
-    }
+    _ensure_imported()
+    entry = diary_db.get_entry(date)
+    if (entry is None or entry["summary"] is None) and summary is None and not create:
+        print(f"[Diary] {date} 일기를 찾을 수 없음")
+        return False
 
+    changes = {}
+    if summary is not None:
+        changes["summary"] = summary
     if comment:
-        properties["comment"] = {
-            "rich_text": [{"text": {"content": comment[:2000]}}],
-        }
-
-    if setting:
-        properties["setting"] = {
-            "rich_text": [{"text": {"content": setting[:2000]}}],
-        }
+        changes["comment"] = comment
+    if settings:
+        existing = (entry or {}).get("setting") or ""
+        merged = _merge_settings(existing, settings)
+        if merged != existing:
+            changes["setting"] = merged
 
     try:
-        client.pages.create(
-            parent={"database_id": db_id},
-            properties=properties,
-        )
-        print(f"[Diary] {date} 일기 Notion에 저장 완료")
-        return True
-    except Exception as e:
-        print(f"[Diary] Notion 저장 실패: {e}")
+        diary_db.write_entry(date, changes)
+    except sqlite3.Error as e:
+        print(f"[Diary] {date} 일기 로컬 저장 실패: {e}")
         return False
+    print(f"[Diary] {date} 일기 저장 완료 ({', '.join(changes) or '변경 없음'})")
+    _request_sync()
+    return True
 
 
-def update_diary_comment(date: str, comment: str) -> bool:
-    """기존 일기의 코멘트를 업데이트한다."""
-    client, db_id = _get_client_and_db()
-    if not client:
-        return False
+def save_diary(date: str, summary: str, comment: str | None = None, setting: str | None = None) -> bool:
+    """오늘의 일기를 저장한다. 같은 날짜의 일기가 이미 있으면 새로 만들지 않고 갱신한다."""
+    return upsert_diary(date, summary=summary, comment=comment, settings=[setting] if setting else None)
 
-    page_id = _find_page(client, db_id, date)
-    if not page_id:
-        print(f"[Diary] {date} 일기를 찾을 수 없음")
-        return False
 
-    try:
-        client.pages.update(
-            page_id=page_id,
-            properties={
-                "comment": {
-                    "rich_text": [{"text": {"content": comment[:2000]}}],
-                },
-            },
-        )
-        print(f"[Diary] {date} 일기에 코멘트 업데이트 완료")
-        return True
-    except Exception as e:
-        print(f"[Diary] 코멘트 업데이트 실패: {e}")
-        return False
+def update_diary_comment(date: str, comment: str) -> bool:
+    """기존 일기의 코멘트를 업데이트한다."""
+    return upsert_diary(date, comment=comment)
 
 
 def save_setting(date: str, setting: str) -> bool:
     """기존 일기의 setting 컬럼에 설정을 추가한다. 기존 설정이 있으면 이어 붙인다."""
-    client, db_id = _get_client_and_db()
-    if not client:
-        return False
-
-    page_id = _find_page(client, db_id, date)
-    if not page_id:
-        print(f"[Diary] {date} 일기를 찾을 수 없음 - 설정 저장 실패")
-        return False
-
-    try:
-        # 기존 설정 읽기
-        page = client.pages.retrieve(page_id=page_id)
-        existing = ""
-        rich_text = page["properties"].get("setting", {}).get("rich_text", [])
-        if rich_text:
-            existing = rich_text[0].get("text", {}).get("content", "")
-
-        new_setting = f"{existing}\n{setting}" if existing else setting
-
-        client.pages.update(
-            page_id=page_id,
-            properties={
-                "setting": {
-                    "rich_text": [{"text": {"content": new_setting[:2000]}}],
-                },
-            },
-        )
-        print(f"[Diary] 설정 저장 완료: {setting[:50]}")
-        return True
-    except Exception as e:
-        print(f"[Diary] 설정 저장 실패: {e}")
-        return False
+    return upsert_diary(date, settings=[setting])
 
 
 def load_settings() -> list[str]:
-    """Notion diary DB에서 모든 사용자 설정을 가져온다."""
-    client, db_id = _get_client_and_db()
-    if not client:
-        return []
-
-    db_id_clean = db_id.replace("-", "")
-    settings = []
+    """모든 사용자 설정을 날짜순으로 반환한다.
 
-    try:
-        results = client.search(filter={"property": "object", "value": "page"})
-        for page in results.get("results", []):
-            parent = page.get("parent", {})
-            if parent.get("database_id", "").replace("-", "") != db_id_clean:
-                continue
-            rich_text = page["properties"].get("setting", {}).get("rich_text", [])
-            if rich_text:
-                text = rich_text[0].get("text", {}).get("content", "").strip()
-                if text:
-                    settings.append(text)
-    except Exception as e:
-        print(f"[Diary] 설정 로드 실패: {e}")
+    로컬 저장소에서 읽는다. 마지막 동기화가 config.DIARY_PULL_INTERVAL보다 오래됐으면
+    먼저 Notion에서 수정된 일기만 받아 반영하고, 아직 쓰지 못한 로컬 변경이 있으면 다시 쓴다.
+    """
+    diary_sync.refresh()
+    if diary_db.dirty_entries():
+        _request_sync()
 
+    settings = diary_db.all_settings()
     if settings:
         print(f"[Diary] 사용자 설정 {len(settings)}건 로드됨")
     return settings
+
+
+def close_diary_sync():
+    """백그라운드 동기화를 마무리한다 (남은 변경을 Notion에 쓴다). 실행이 끝날 때 호출한다."""
+    diary_sync.close_sync()
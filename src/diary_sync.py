@@ -0,0 +1,313 @@
+"""로컬 일기 저장소(diary_db)와 Notion diary DB를 동기화하는 모듈
+
+- push: 로컬에서 바뀐 필드를 날짜마다 pages.create 또는 pages.update 한 번으로 Notion에 쓴다.
+- pull: 마지막으로 본 last_edited_time 이후 Notion에서 수정된 일기를 로컬에 반영한다.
+- 백그라운드 동기화: request_push()로 알리면 사용자별 작업 스레드가 config.DIARY_SYNC_DELAY초
+  동안 변경을 모은 뒤 push한다. Notion이 응답하지 않으면 변경은 로컬에 남았다가
+  다음 동기화(또는 다음 실행)에서 다시 쓴다.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import config
+from src import diary_db
+from src.notion_session import get_notion_client
+from src.user_context import current_user, get_env
+
+if TYPE_CHECKING:
+    from notion_client import Client
+
+# 사용자별 push 락 — 작업 스레드와 flush가 같은 날짜를 동시에 만들어 중복 페이지가 생기지 않게 한다
+_push_locks: dict[str | None, threading.RLock] = {}
+_pull_locks: dict[str | None, threading.RLock] = {}
+_locks_lock = threading.Lock()
+
+# pull에 실패하면 이 시간(초) 동안은 다시 시도하지 않는다 (Notion 장애 중 쓰기/읽기가 느려지지 않게)
+_PULL_RETRY_AFTER = 60
+_pull_failed_at: dict[str | None, float] = {}
+
+
+def _user_lock(locks: dict) -> threading.RLock:
+    with _locks_lock:
+        return locks.setdefault(current_user(), threading.RLock())
+
+
+def _get_client_and_db() -> tuple[Client, str] | tuple[None, None]:
+    """Notion 클라이언트와 DB ID를 반환한다. 설정이 없으면 (None, None)."""
+    token = get_env("NOTION_TOKEN")
+    db_id = get_env("NOTION_DIARY_DB_ID")
+    if not token or not db_id:
+        return None, None
+    db_id_clean = db_id.replace("-", "")
+    if diary_db.get_meta("db_id") != db_id_clean:
+        # 다른 DB를 가리키던 페이지 ID와 동기화 시점은 쓸 수 없다
+        diary_db.reset_remote(db_id_clean)
+    return get_notion_client(token), db_id
+
+
+def notion_configured() -> bool:
+    """Notion 동기화에 필요한 설정이 있는지 확인한다."""
+    return bool(get_env("NOTION_TOKEN") and get_env("NOTION_DIARY_DB_ID"))
+
+
+def _get_data_source_id(client: Client, db_id: str) -> str | None:
+    """diary DB의 data source ID를 반환한다 (로컬 DB에 캐시)."""
+    data_source_id = diary_db.get_meta("data_source_id")
+    if data_source_id:
+        return data_source_id
+
+    try:
+        db = client.databases.retrieve(database_id=db_id)
+    except Exception as e:
+        print(f"[Diary] Notion DB 조회 실패: {e}")
+        return None
+
+    data_sources = db.get("data_sources", [])
+    if not data_sources:
+        print("[Diary] diary DB에 data source가 없음")
+        return None
+    diary_db.set_meta("data_source_id", data_sources[0]["id"])
+    return data_sources[0]["id"]
+
+
+def ensure_setting_column():
+    """Notion diary DB에 setting 컬럼이 없으면 추가한다."""
+    client, db_id = _get_client_and_db()
+    if not client:
+        return
+    try:
+        db = client.databases.retrieve(database_id=db_id)
+        if "setting" not in db["properties"]:
+            client.databases.update(
+                database_id=db_id,
+                properties={"setting": {"rich_text": {}}},
+            )
+            print("[Diary] setting 컬럼 추가 완료")
+    except Exception as e:
+        print(f"[Diary] setting 컬럼 확인/추가 실패: {e}")
+
+
+def _find_remote_page(client: Client, db_id: str, date: str) -> str | None:
+    """로컬에 페이지 ID가 없는 날짜의 일기를 Notion에서 date 필터로 찾는다 (중복 생성 방지)."""
+    data_source_id = _get_data_source_id(client, db_id)
+    if not data_source_id:
+        return None
+    results = client.data_sources.query(
+        data_source_id=data_source_id,
+        filter={"property": "date", "date": {"equals": date}},
+        page_size=1,
+    )
+    pages = results.get("results", [])
+    return pages[0]["id"] if pages else None
+
+
+def _properties(entry: dict, fields) -> dict:
+    properties = {}
+    for name in fields:
+        value = entry.get(name)
+        if value is None:
+            continue
+        if name == "summary":
+            properties["summary"] = {"title": [{"text": {"content": value[:2000]}}]}
+        else:
+            properties[name] = {"rich_text": [{"text": {"content": value[:2000]}}] if value else []}
+    return properties
+
+
+def _push_entry(client: Client, db_id: str, entry: dict) -> bool:
+    """한 날짜의 로컬 변경을 Notion에 한 번의 호출로 쓴다."""
+    from notion_client import APIResponseError
+
+    date = entry["date"]
+    page_id = entry["page_id"] or _find_remote_page(client, db_id, date)
+    dirty = entry["dirty"].split(",")
+
+    if page_id:
+        try:
+            client.pages.update(page_id=page_id, properties=_properties(entry, dirty))
+            diary_db.mark_synced(date, entry["version"], page_id)
+            print(f"[Diary] {date} 일기 Notion 갱신 완료 ({entry['dirty']})")
+            return True
+        except APIResponseError as e:
+            if e.status != 404:
+                raise
+            # Notion에서 삭제된 페이지 — 새로 만든다
+            diary_db.set_page_id(date, None)
+
+    properties = _properties(entry, diary_db.FIELDS)
+    properties["date"] = {"date": {"start": date}}
+    page = client.pages.create(parent={"database_id": db_id}, properties=properties)
+    diary_db.mark_synced(date, entry["version"], page["id"])
+    print(f"[Diary] {date} 일기 Notion에 저장 완료")
+    return True
+
+
+def push(date: str | None = None) -> bool:
+    """아직 Notion에 쓰지 않은 로컬 변경을 쓴다 (date를 주면 그 날짜만). 모두 성공하면 True."""
+    client, db_id = _get_client_and_db()
+    if not client:
+        return False
+
+    ok = True
+    with _user_lock(_push_locks):
+        for entry in diary_db.dirty_entries(date):
+            try:
+                _push_entry(client, db_id, entry)
+            except Exception as e:
+                ok = False
+                print(f"[Diary] {entry['date']} 일기 Notion 반영 실패 - 로컬에 보관: {e}")
+    return ok
+
+
+def _page_fields(page: dict) -> dict | None:
+    """Notion 일기 페이지를 diary_db.apply_remote 형식으로 바꾼다. 날짜가 없으면 None."""
+    props = page.get("properties", {})
+    date_prop = props.get("date", {}).get("date") or {}
+    if not date_prop.get("start"):
+        return None
+
+    def _text(name: str, kind: str) -> str:
+        return "".join(rt.get("plain_text", "") for rt in props.get(name, {}).get(kind, [])).strip()
+
+    return {
+        "date": date_prop["start"][:10],
+        "page_id": page["id"],
+        "remote_edited": page.get("last_edited_time"),
+        "summary": _text("summary", "title"),
+        "comment": _text("comment", "rich_text"),
+        "setting": _text("setting", "rich_text"),
+    }
+
+
+def pull() -> int:
+    """마지막 pull 이후 Notion에서 수정된 일기를 로컬에 반영한다. 읽은 페이지 수를 반환한다.
+
+    처음에는 diary DB 전체를 한 번 읽는다.
+    """
+    client, db_id = _get_client_and_db()
+    if not client:
+        return 0
+    data_source_id = _get_data_source_id(client, db_id)
+    if not data_source_id:
+        raise RuntimeError("diary DB의 data source를 찾을 수 없음")
+
+    with _user_lock(_pull_locks):
+        since = diary_db.get_meta("last_edited")
+        query = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}], "page_size": 100}
+        if since:
+            # Notion의 last_edited_time은 분 단위라 같은 시각도 다시 포함한다
+            query["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+
+        fetched = 0
+        while True:
+            response = client.data_sources.query(data_source_id=data_source_id, **query)
+            pages = response.get("results", [])
+            fetched += len(pages)
+            diary_db.apply_remote([f for f in map(_page_fields, pages) if f])
+            for page in pages:
+                edited = page.get("last_edited_time")
+                if edited and (not since or edited > since):
+                    since = edited
+            if not response.get("has_more"):
+                break
+            query["start_cursor"] = response.get("next_cursor")
+
+        if since:
+            diary_db.set_meta("last_edited", since)
+        diary_db.set_meta("pulled_at", str(time.time()))
+    return fetched
+
+
+def refresh(max_age: float | None = None) -> bool:
+    """마지막 pull이 max_age초(기본 config.DIARY_PULL_INTERVAL)보다 오래됐으면 pull한다.
+
+    Notion에 닿지 않으면 로컬 데이터를 그대로 쓴다. 로컬이 최신 상태면 True.
+    """
+    if not notion_configured():
+        return False
+    max_age = config.DIARY_PULL_INTERVAL if max_age is None else max_age
+    # 여러 단계가 동시에 부르면 한 번만 받아 오도록 락 안에서 다시 확인한다
+    with _user_lock(_pull_locks):
+        pulled_at = diary_db.get_meta("pulled_at")
+        if pulled_at and time.time() - float(pulled_at) < max_age:
+            return True
+        if time.time() - _pull_failed_at.get(current_user(), 0) < _PULL_RETRY_AFTER:
+            return False
+        try:
+            fetched = pull()
+            print(f"[Diary] Notion 변경 {fetched}건 반영")
+            return True
+        except Exception as e:
+            _pull_failed_at[current_user()] = time.time()
+            print(f"[Diary] Notion 동기화 실패 - 로컬 데이터 사용: {e}")
+            return False
+
+
+def has_pulled() -> bool:
+    """이 저장소가 Notion에서 한 번이라도 일기를 받아 왔는지 확인한다."""
+    return diary_db.get_meta("pulled_at") is not None
+
+
+class _SyncWorker:
+    """한 사용자의 변경을 모아 Notion에 쓰는 백그라운드 스레드."""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # 만든 쪽의 사용자 컨텍스트에서 돌아야 그 사용자의 자격 증명/DB를 쓴다
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._loop,), name="diary-sync", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait()
+            # 잠깐 기다려 이어지는 변경을 한 번의 쓰기로 묶는다
+            self._stop.wait(config.DIARY_SYNC_DELAY)
+            self._wake.clear()
+            try:
+                push()
+            except Exception as e:
+                print(f"[Diary] 백그라운드 동기화 실패: {e}")
+            # push하는 동안 새 변경이 들어왔으면 (stop()도 깨운다) 한 번 더 쓰고 끝낸다
+            if self._stop.is_set() and not self._wake.is_set():
+                return
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout: float):
+        """멈추라고 알리고 기다린다. 작업 스레드는 그때까지의 변경을 모두 쓴 뒤에 끝난다."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+
+_workers: dict[str | None, _SyncWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def request_push():
+    """현재 사용자의 변경을 백그라운드에서 Notion에 쓰도록 알린다."""
+    if not notion_configured():
+        return
+    with _workers_lock:
+        worker = _workers.get(current_user())
+        if worker is None:
+            worker = _SyncWorker()
+            _workers[current_user()] = worker
+    worker.wake()
+
+
+def close_sync(timeout: float | None = None):
+    """백그라운드 동기화를 마무리한다. 남은 변경을 쓰고 작업 스레드를 멈춘다."""
+    with _workers_lock:
+        workers = list(_workers.values())
+        _workers.clear()
+    for worker in workers:
+        worker.stop(config.DIARY_SYNC_CLOSE_TIMEOUT if timeout is None else timeout)
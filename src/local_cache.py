@@ -0,0 +1,75 @@
+"""실행 간 유지되는 로컬 JSON 캐시 파일을 읽고 쓰는 모듈"""
+
+import json
+import os
+import tempfile
+import threading
+
+import config
+from src.user_context import current_user
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_lock = threading.Lock()
+
+
+def cache_path(name: str, shared: bool = False) -> str:
+    """캐시 파일의 절대 경로를 반환한다. 배치 실행에서는 사용자별 하위 디렉터리를 쓴다.
+
+    shared가 True면 사용자와 관계없이 캐시 루트에 둔다 (봇 세션처럼 사용자들이 함께 쓰는 것의 상태).
+    """
+    user = None if shared else current_user()
+    if user:
+        return os.path.join(PROJECT_ROOT, config.CACHE_DIR, "users", user, name)
+    return os.path.join(PROJECT_ROOT, config.CACHE_DIR, name)
+
+
+def _read(name: str, path: str, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f"[Cache] {name} 읽기 실패 - 무시: {e}")
+        return default
+
+
+def _write(name: str, path: str, data) -> bool:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return True
+    except OSError as e:
+        print(f"[Cache] {name} 저장 실패: {e}")
+        return False
+
+
+def load_json(name: str, default=None, shared: bool = False):
+    """캐시 파일을 읽는다. 파일이 없거나 깨져 있으면 default를 반환한다."""
+    path = cache_path(name, shared)
+    with _lock:
+        return _read(name, path, default)
+
+
+def save_json(name: str, data, shared: bool = False) -> bool:
+    """캐시 파일을 원자적으로 덮어쓴다 (임시 파일에 쓴 뒤 교체)."""
+    path = cache_path(name, shared)
+    with _lock:
+        return _write(name, path, data)
+
+
+def update_json(name: str, update, default=None, shared: bool = False):
+    """캐시 파일을 읽어 update(data)의 반환값으로 덮어쓰고, 그 값을 반환한다.
+
+    읽기부터 쓰기까지 잠금을 잡고 있으므로 동시에 같은 파일을 고치는 스레드(병렬 백필 날짜 등)가
+    서로의 변경을 덮어쓰지 않는다. update는 짧게 끝나야 한다 (다른 캐시 파일 접근도 기다린다).
+    """
+    path = cache_path(name, shared)
+    with _lock:
+        data = update(_read(name, path, default))
+        _write(name, path, data)
+        return data
@@ -2,7 +2,7 @@
 
 매일 오후 8시(KST) 실행되어:
 1. 미처리 답장 확인 → 이전 일기에 코멘트 업데이트
-2. Calendar, Notion에서 오늘 활동을 수집
+2. Calendar, Notion, GitHub에서 오늘 활동을 수집 (1~2단계는 동시 실행)
 3. Claude API로 오늘 한 일 3가지 요약 생성
 4. Telegram으로 요약 전송
 5. 오늘 일기 Notion 저장
@@ -11,9 +11,12 @@
 
 import sys
 import os
+import argparse
 import csv
+import threading
 import time
-from datetime import datetime, timedelta, timezone
+import traceback
+from datetime import date, datetime, timedelta, timezone
 
 KST = timezone(timedelta(hours=9))
 
@@ -21,13 +24,25 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 USAGE_LOG_PATH = os.path.join(PROJECT_ROOT, "usage_log.csv")
+# 배치 실행에서는 사용자별 파일에 기록한다 (usage_logs/<사용자 ID>.csv)
+USAGE_LOG_DIR = os.path.join(PROJECT_ROOT, "usage_logs")
 from dotenv import load_dotenv
 
 import config
-from src.collectors import collect_calendar, collect_notion, collect_github
-from src.summarizer import generate_summary
-from src.telegram_bot import send_summary, send_message, wait_for_reply, get_all_replies
-from src.diary_store import save_diary, update_diary_comment, save_setting, load_settings, ensure_setting_column
+from src.collectors import collect
+from src.model_router import generate_routed_summary
+from src.summarizer import preload_sdk
+from src.telegram_bot import (
+    send_summary, send_message, wait_for_replies, get_all_replies, close_session, StreamingSummary,
+)
+from src.diary_store import (
+    save_diary, update_diary_comment, save_setting, load_settings, ensure_setting_column,
+    buffered_diary_writes, close_diary_sync,
+)
+from src.scheduler import Stage, abandoned_stages, run_stages
+from src.notion_session import connection_stats
+from src.metrics import take_spans, write_metrics, print_summary
+from src.user_context import current_user
 
 
 def _parse_messages(messages: list[str]) -> tuple[list[str], list[str]]:
@@ -52,47 +67,95 @@ def _parse_messages(messages: list[str]) -> tuple[list[str], list[str]]:
     return comments, settings
 
 
+_usage_lock = threading.Lock()
+
+USAGE_LOG_HEADER = [
+    "date", "model", "input_tokens", "output_tokens",
+    "cost_usd", "duration_sec", "source", "note",
+    "cache_write_tokens", "cache_read_tokens",
+]
+
+
 def _calc_cost(usage: dict, model: str) -> float:
-    """토큰 사용량으로 비용(USD)을 계산한다."""
+    """토큰 사용량으로 비용(USD)을 계산한다.
+
+    input_tokens는 캐시되지 않은 입력만 센 값이므로, 캐시 쓰기/읽기 토큰은
+    각각의 단가로 따로 더한다.
+    """
     pricing = config.MODEL_PRICING.get(model, {"input": 3.0, "output": 15.0})
+    cache_write_price = pricing.get("cache_write", pricing["input"] * 1.25)
+    cache_read_price = pricing.get("cache_read", pricing["input"] * 0.1)
+
     input_cost = usage["input_tokens"] / 1_000_000 * pricing["input"]
     output_cost = usage["output_tokens"] / 1_000_000 * pricing["output"]
-    return input_cost + output_cost
+    cache_write_cost = usage.get("cache_creation_input_tokens", 0) / 1_000_000 * cache_write_price
+    cache_read_cost = usage.get("cache_read_input_tokens", 0) / 1_000_000 * cache_read_price
+    return input_cost + output_cost + cache_write_cost + cache_read_cost
+
+
+def _usage_log_path() -> str:
+    """현재 사용자의 사용량 로그 경로. 단일 사용자 실행이면 USAGE_LOG_PATH."""
+    user = current_user()
+    if user:
+        return os.path.join(USAGE_LOG_DIR, f"{user}.csv")
+    return USAGE_LOG_PATH
+
+
+def _ensure_usage_header(path: str):
+    """예전 형식(캐시 컬럼 없음)의 사용량 로그면 헤더만 새 형식으로 바꾼다."""
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    if not lines or lines[0].strip().split(",") == USAGE_LOG_HEADER:
+        return
+    lines[0] = ",".join(USAGE_LOG_HEADER) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
 
 
 def _log_usage(run_date: str, duration_sec: float, usage: dict, model: str, note: str = ""):
-    """실행 기록을 CSV에 누적 저장한다."""
-    cost = _calc_cost(usage, model)
+    """실행 기록을 CSV에 누적 저장한다 (백필처럼 여러 스레드에서 호출해도 안전)."""
+    with _usage_lock:
+        _write_usage_row(run_date, duration_sec, usage, model, note)
+
 
-    write_header = not os.path.exists(USAGE_LOG_PATH)
-    with open(USAGE_LOG_PATH, "a", newline="", encoding="utf-8") as f:
+def _write_usage_row(run_date: str, duration_sec: float, usage: dict, model: str, note: str):
+    cost = _calc_cost(usage, model)
+    cache_write = usage.get("cache_creation_input_tokens", 0)
+    cache_read = usage.get("cache_read_input_tokens", 0)
+
+    path = _usage_log_path()
+    write_header = not os.path.exists(path)
+    if write_header:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    else:
+        _ensure_usage_header(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         if write_header:
-            writer.writerow([
-                "date", "model", "input_tokens", "output_tokens",
-                "cost_usd", "duration_sec", "source", "note",
-            ])
+            writer.writerow(USAGE_LOG_HEADER)
         writer.writerow([
             run_date, model, usage["input_tokens"], usage["output_tokens"],
             f"{cost:.4f}", f"{duration_sec:.1f}", "bot", note,
+            cache_write, cache_read,
         ])
 
-    print(f"[Usage] {model}: 입력 {usage['input_tokens']}토큰, 출력 {usage['output_tokens']}토큰, 비용 ${cost:.4f}")
-
+    total_input = usage["input_tokens"] + cache_write + cache_read
+    hit_rate = cache_read / total_input * 100 if total_input else 0.0
+    print(
+        f"[Usage] {model}: 입력 {usage['input_tokens']}토큰, 출력 {usage['output_tokens']}토큰, "
+        f"캐시 쓰기 {cache_write}토큰, 캐시 읽기 {cache_read}토큰 (적중률 {hit_rate:.0f}%), 비용 ${cost:.4f}"
+    )
 
-def run():
-    """전체 파이프라인을 실행한다."""
-    load_dotenv()
-    start_time = time.time()
-    today = datetime.now(KST).strftime("%Y-%m-%d")
-    yesterday = (datetime.now(KST) - timedelta(days=1)).strftime("%Y-%m-%d")
 
-    print(f"=== 하루봇 실행 ({today}) ===\n")
+def _flush_metrics(run_date: str, note: str):
+    """이번 실행의 span을 metrics.jsonl에 기록하고 요약 표를 출력한다."""
+    spans = take_spans()
+    write_metrics(run_date, spans, note=note)
+    print_summary(spans)
 
-    # 0. Notion DB에 setting 컬럼 확보
-    ensure_setting_column()
 
-    # 1. 미처리 답장 확인
+def _process_pending_replies(yesterday: str) -> list[str]:
+    """1단계: 미처리 답장을 어제 일기에 반영하고, 받은 설정을 반환한다."""
     print("--- 1단계: 미처리 답장 확인 ---")
     pending_settings = []
     replies = get_all_replies(consume=False)
@@ -111,61 +174,241 @@ def run():
 
         if ok:
             get_all_replies(consume=True)
+    return pending_settings
 
-    # 2. 데이터 수집
-    print("\n--- 2단계: 데이터 수집 ---")
-    calendar_data = collect_calendar(config.PERIOD_DAYS)
-    notion_data = collect_notion(config.PERIOD_DAYS)
-    github_data = collect_github(config.PERIOD_DAYS)
+
+def _summarize(results: dict, streams: list) -> tuple[str, dict, bool | None]:
+    """3단계: 수집 결과와 사용자 설정으로 요약을 생성한다.
+
+    config.SUMMARY_STREAMING이면 생성되는 대로 Telegram 메시지를 고쳐 쓰며 전송까지 끝낸다.
+    스트리밍 메시지는 streams에 넣어 두어, 단계가 타임아웃되면 run()이 실패 안내로 바꾼다.
+
+    Returns:
+        (요약, 사용량, 스트리밍 전송 성공 여부 — 스트리밍하지 않았으면 None)
+    """
+    calendar_data = results["calendar"]
+    notion_data = results["notion"]
+    github_data = results["github"]
 
     total = len(calendar_data) + len(notion_data) + len(github_data)
     print(f"\n총 {total}개 항목 수집 (Calendar: {len(calendar_data)}, Notion: {len(notion_data)}, GitHub: {len(github_data)})\n")
 
-    # 3. 요약 생성 (사용자 설정 반영)
     print("--- 3단계: 오늘 한 일 요약 ---")
-    saved_settings = load_settings()
-    all_settings = saved_settings + pending_settings
-    summary, usage = generate_summary(
-        calendar_data=calendar_data,
-        notion_data=notion_data,
-        model=config.CLAUDE_MODEL,
-        max_tokens=config.MAX_TOKENS,
-        github_data=github_data,
-        user_settings=all_settings if all_settings else None,
-    )
+    all_settings = results["settings"] + results["pending_replies"]
+    streaming = StreamingSummary() if config.SUMMARY_STREAMING else None
+    if streaming and not streaming.start():
+        streaming = None
+    if streaming:
+        streams.append(streaming)
+
+    try:
+        summary, usage = generate_routed_summary(
+            calendar_data=calendar_data,
+            notion_data=notion_data,
+            github_data=github_data,
+            user_settings=all_settings if all_settings else None,
+            on_text=streaming.update if streaming else None,
+        )
+    except Exception:
+        # 자리표시 메시지와 중간 텍스트가 그대로 남지 않게 한다
+        if streaming:
+            streaming.fail()
+        raise
     print(f"\n{summary}\n")
 
-    # 4. Telegram 전송
+    streamed = streaming.finish(summary) if streaming else None
+    return summary, usage, streamed
+
+
+def _wait_and_apply_replies(today: str, sent: bool):
+    """6단계: 답장을 기다려 오늘 일기에 코멘트/설정을 반영한다."""
+    if not sent:
+        return
+
+    print("\n--- 6단계: 답장 대기 ---")
+    replies = get_all_replies()
+    if not replies:
+        replies = wait_for_replies(timeout=config.TELEGRAM_REPLY_TIMEOUT)
+
+    if replies:
+        comments, settings = _parse_messages(replies)
+        if comments:
+            update_diary_comment(today, "\n".join(comments))
+        for s in settings:
+            save_setting(today, s)
+            send_message(f"설정 저장됨: {s}")
+
+
+def _send_summary_stage(summary: str, streamed: bool | None) -> bool:
+    """4단계: Telegram으로 요약을 전송한다. 스트리밍으로 이미 보냈으면 그 결과를 쓴다."""
     print("--- 4단계: Telegram 전송 ---")
-    sent = send_summary(summary)
+    if streamed:
+        return True
+    return send_summary(summary)
+
 
-    # 5. 오늘 일기 저장 (대기 중 받은 설정 포함)
+def _save_diary_stage(today: str, summary: str, pending_settings: list[str]) -> bool:
+    """5단계: 오늘 일기를 저장한다 (1단계에서 받은 설정 포함)."""
     print("\n--- 5단계: 일기 저장 ---")
     setting_text = "\n".join(pending_settings) if pending_settings else None
-    save_diary(today, summary, setting=setting_text)
-
-    # 6. 답장 확인 및 대기
-    if sent:
-        print("\n--- 6단계: 답장 대기 ---")
-        replies = get_all_replies()
-        if not replies:
-            reply = wait_for_reply(timeout=config.TELEGRAM_REPLY_TIMEOUT)
-            replies = [reply] if reply else []
-
-        if replies:
-            comments, settings = _parse_messages(replies)
-            if comments:
-                update_diary_comment(today, "\n".join(comments))
-            for s in settings:
-                save_setting(today, s)
-                send_message(f"설정 저장됨: {s}")
+    return save_diary(today, summary, setting=setting_text)
+
+
+def _build_stages(today: str, yesterday: str, handle_replies: bool = True, streams: list | None = None) -> list[Stage]:
+    """파이프라인 단계와 의존 관계를 정의한다.
+
+    0~2단계와 설정 로드는 서로 독립이라 동시에 실행하고,
+    요약 → 전송 → 저장 → 답장 대기는 순서대로 실행한다.
+    handle_replies가 False면 (데몬의 답장 수신기가 대신 처리) 1단계와 6단계를 건너뛴다.
+    streams에는 요약 단계가 시작한 스트리밍 메시지가 들어간다 (_summarize 참고).
+    """
+    streams = [] if streams is None else streams
+    timeouts = config.STAGE_TIMEOUTS
+    period = config.PERIOD_DAYS
+    pending_replies = (lambda r: _process_pending_replies(yesterday)) if handle_replies else (lambda r: [])
+    reply_wait = (lambda r: _wait_and_apply_replies(today, r["telegram"])) if handle_replies else (lambda r: None)
+    return [
+        # 0. Notion DB에 setting 컬럼 확보
+        Stage("setting_column", lambda r: ensure_setting_column(),
+              timeout=timeouts.get("setting_column"), fallback=None),
+        # 1. 미처리 답장 확인
+        Stage("pending_replies", pending_replies,
+              timeout=timeouts.get("pending_replies"), fallback=[]),
+        # 2. 데이터 수집
+        Stage("calendar", lambda r: collect("calendar", period),
+              timeout=timeouts.get("calendar"), fallback=[]),
+        Stage("notion", lambda r: collect("notion", period),
+              timeout=timeouts.get("notion"), fallback=[]),
+        Stage("github", lambda r: collect("github", period),
+              timeout=timeouts.get("github"), fallback=[]),
+        Stage("settings", lambda r: load_settings(),
+              timeout=timeouts.get("settings"), fallback=[]),
+        # Claude SDK는 수집하는 동안 미리 불러 둔다 (요약 단계의 의존성은 아님)
+        Stage("preload_sdk", lambda r: preload_sdk(), fallback=None),
+        # 3. 요약 생성 (사용자 설정 반영) — 실패하면 실행 중단
+        Stage("summary", lambda r: _summarize(r, streams),
+              deps=("pending_replies", "calendar", "notion", "github", "settings"),
+              timeout=timeouts.get("summary")),
+        # 4. Telegram 전송
+        Stage("telegram", lambda r: _send_summary_stage(r["summary"][0], r["summary"][2]),
+              deps=("summary",), timeout=timeouts.get("telegram"), fallback=False),
+        # 5. 오늘 일기 저장 (대기 중 받은 설정 포함)
+        Stage("save", lambda r: _save_diary_stage(today, r["summary"][0], r["pending_replies"]),
+              deps=("telegram", "setting_column"), timeout=timeouts.get("save"), fallback=False),
+        # 6. 답장 확인 및 대기
+        Stage("reply_wait", reply_wait,
+              deps=("save",), timeout=timeouts.get("reply_wait"), fallback=None),
+    ]
+
+
+def run(serve_mode: bool = False, batch_mode: bool = False) -> dict:
+    """전체 파이프라인을 실행한다.
+
+    Args:
+        serve_mode: 데몬(serve)에서 호출할 때 True. 답장은 상시 수신기가 처리하므로
+            답장 확인/대기 단계를 건너뛰고, Telegram 세션도 닫지 않는다.
+        batch_mode: 배치 실행(src.batch)에서 사용자별로 호출할 때 True. 세션 정리와 metrics
+            기록은 배치가 끝난 뒤 한 번에 한다. 같은 봇을 쓰는 사용자들의 답장은 봇 세션의
+            채팅별 받은편지함(src.telegram_bot)이 나눠 주므로 답장 단계도 그대로 실행한다.
+
+    Returns:
+        요약 생성 사용량 (model, route 포함)
+    """
+    load_dotenv()
+    start_time = time.time()
+    today = datetime.now(KST).strftime("%Y-%m-%d")
+    yesterday = (datetime.now(KST) - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    user = current_user()
+    print(f"=== 하루봇 실행 ({today}{f', {user}' if user else ''}) ===\n")
+
+    streams = []
+    stages = _build_stages(today, yesterday, handle_replies=not serve_mode, streams=streams)
+    try:
+        # 일기 쓰기(요약, 코멘트, 설정)는 날짜별로 모아 실행이 끝날 때 한 번에 쓴다
+        with buffered_diary_writes():
+            report = run_stages(stages, max_workers=config.PIPELINE_WORKERS)
+    except Exception:
+        # 요약 단계가 타임아웃되면 스트리밍 메시지를 실패 안내로 바꾼다 (이미 끝났으면 아무 일도 없음)
+        for streaming in streams:
+            streaming.fail()
+        # 실패한 실행도 어디서 시간이 걸렸는지 남긴다
+        if not batch_mode:
+            _flush_metrics(today, "failed")
+        raise
+    finally:
+        if not (serve_mode or batch_mode):
+            close_session()
+            close_diary_sync()
+    _, usage, _ = report.results["summary"]
 
     # 7. 사용량 기록
     duration_sec = time.time() - start_time
-    _log_usage(today, duration_sec, usage, config.CLAUDE_MODEL)
+    notes = [f"route:{usage['route']}"]
+    if serve_mode:
+        notes.append("serve")
+    if batch_mode:
+        notes.append("batch")
+    if usage.get("cache_hit"):
+        notes.append("cache_hit")
+    _log_usage(today, duration_sec, usage, usage["model"], note="+".join(notes))
+
+    if not batch_mode:
+        stats = connection_stats()
+        print(f"[Notion] 요청 {stats['requests']}회, 새 연결 {stats['connections']}회, TLS 핸드셰이크 {stats['tls_handshakes']}회")
+        _flush_metrics(today, "+".join(notes))
 
     print(f"\n=== 하루봇 완료! ===")
+    return usage
+
+
+def main(argv: list[str] | None = None):
+    """CLI 진입점. 인자 없이 실행하면 파이프라인을 한 번 실행한다."""
+    parser = argparse.ArgumentParser(prog="haru-bot", description="하루봇")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("run", help="파이프라인을 한 번 실행 (기본)")
+    sub.add_parser("serve", help="상주 모드: 내부 스케줄러로 매일 실행하고 답장을 즉시 반영")
+    backfill_parser = sub.add_parser("backfill", help="빠진 날짜의 일기를 기간 단위로 생성/갱신")
+    backfill_parser.add_argument("--from", dest="start", required=True, type=date.fromisoformat, help="시작일 (YYYY-MM-DD)")
+    backfill_parser.add_argument("--to", dest="end", required=True, type=date.fromisoformat, help="종료일 (YYYY-MM-DD, 포함)")
+    backfill_parser.add_argument("--concurrency", type=int, default=None, help="동시에 처리할 날짜 수")
+    batch_parser = sub.add_parser("batch", help="로스터의 모든 사용자에 대해 파이프라인을 한 번씩 실행")
+    batch_parser.add_argument("--roster", default="roster.json", help="사용자별 자격 증명/설정 JSON 경로")
+    batch_parser.add_argument("--workers", type=int, default=None, help="동시에 처리할 사용자 수")
+    startup_parser = sub.add_parser("startup-report", help="시작 시간 보고서 (-X importtime으로 모듈별 import 시간 측정)")
+    startup_parser.add_argument("--all", dest="everything", action="store_true",
+                                help="자격 증명과 관계없이 지연 로드 모듈을 모두 불러와 측정")
+    startup_parser.add_argument("--top", type=int, default=15, help="패키지/모듈별 상위 몇 개를 보여줄지")
+    startup_parser.add_argument("--json", dest="json_path", help="결과를 한 줄씩 추가할 JSONL 경로 (릴리스별 추적용)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            from src.daemon import serve
+            serve()
+        elif args.command == "backfill":
+            from src.backfill import backfill
+            backfill(args.start, args.end, concurrency=args.concurrency)
+        elif args.command == "batch":
+            from src.batch import run_batch
+            run_batch(args.roster, workers=args.workers)
+        elif args.command == "startup-report":
+            from src.startup_report import startup_report
+            startup_report(everything=args.everything, top=args.top, json_path=args.json_path)
+        else:
+            run()
+    finally:
+        if abandoned_stages():
+            # 타임아웃된 단계(응답 없는 HTTP 호출 등)가 끝나길 기다리지 않고 종료한다.
+            # 인터프리터 종료 시 풀 스레드를 join하므로 os._exit로 바로 끝낸다 (실패한 실행도 마찬가지).
+            failed = sys.exc_info()[0] is not None
+            if failed:
+                traceback.print_exc()
+            print(f"[Scheduler] 끝나지 않은 단계 {abandoned_stages()}개를 두고 종료")
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
-    run()
+    main()
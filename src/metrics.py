@@ -0,0 +1,166 @@
+"""파이프라인 단계와 외부 호출의 실행 시간(span)을 기록하는 모듈
+
+각 단계(scheduler)와 외부 호출(CalDAV, Notion, GitHub, Anthropic, Telegram)마다
+소요 시간, 주고받은 바이트 수, 상태를 span으로 모아 두었다가, 실행이 끝나면
+usage_log.csv 옆의 metrics.jsonl에 한 줄씩 추가하고 요약 표를 출력한다.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from src.user_context import current_user
+
+KST = timezone(timedelta(hours=9))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_LOG_PATH = os.path.join(PROJECT_ROOT, "metrics.jsonl")
+
+_spans: list[dict] = []
+_lock = threading.Lock()
+
+# Notion 페이지/블록 ID, 데이터 소스 ID 같은 경로 조각 (엔드포인트 이름에서 뺀다)
+_ID_SEGMENT = re.compile(r"^[0-9a-fA-F-]{32,36}$")
+_ERROR_STATUS = ("error", "failed", "timeout")
+
+
+def record(kind: str, name: str, duration: float, bytes_out: int = 0, bytes_in: int = 0, status: str = "ok"):
+    """span 하나를 기록한다.
+
+    Args:
+        kind: 단계면 "stage", 외부 호출이면 서비스 이름 ("notion", "github" 등)
+        name: 단계 이름 또는 엔드포인트
+        duration: 소요 시간 (초)
+        status: "ok", HTTP 상태 코드, "error"/"failed"/"timeout"
+    """
+    entry = {
+        "ts": datetime.now(KST).isoformat(timespec="milliseconds"),
+        "kind": kind,
+        "name": name,
+        "duration_ms": round(duration * 1000, 1),
+        "bytes_out": bytes_out,
+        "bytes_in": bytes_in,
+        "status": str(status),
+    }
+    user = current_user()
+    if user:
+        entry["user"] = user
+    with _lock:
+        _spans.append(entry)
+
+
+@contextmanager
+def span(kind: str, name: str, bytes_out: int = 0):
+    """with 블록의 실행 시간을 기록한다. 받은 바이트 수는 yield한 dict의 "bytes_in"에 채운다."""
+    info = {"bytes_in": 0}
+    start = time.monotonic()
+    status = "ok"
+    try:
+        yield info
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        record(kind, name, time.monotonic() - start, bytes_out, info["bytes_in"], status)
+
+
+def endpoint_name(path: str) -> str:
+    """URL 경로를 ID를 뺀 엔드포인트 이름으로 바꾼다 (/v1/blocks/<id>/children → blocks.children)."""
+    segments = [s for s in path.strip("/").split("/") if s and s != "v1" and not _ID_SEGMENT.match(s)]
+    return ".".join(segments) or "/"
+
+
+def httpx_hooks(service: str, name_of=None) -> dict:
+    """httpx.Client(event_hooks=...)에 넘길 훅을 만든다. 응답 본문까지 받은 시점에 span을 기록한다.
+
+    Args:
+        name_of: httpx.URL → 엔드포인트 이름 함수. 생략하면 endpoint_name(url.path)
+    """
+    name_of = name_of or (lambda url: endpoint_name(url.path))
+
+    def _on_request(request):
+        request.extensions["metrics_start"] = time.monotonic()
+
+    def _on_response(response):
+        response.read()
+        request = response.request
+        start = request.extensions.get("metrics_start", time.monotonic())
+        record(
+            service, name_of(request.url), time.monotonic() - start,
+            bytes_out=len(request.content), bytes_in=len(response.content),
+            status=response.status_code,
+        )
+
+    return {"request": [_on_request], "response": [_on_response]}
+
+
+def requests_hook(service: str):
+    """requests(또는 niquests) Session.hooks["response"]에 넣을 훅을 만든다 (caldav용)."""
+
+    def _on_response(response, *args, **kwargs):
+        body = response.request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        record(
+            service, response.request.method, response.elapsed.total_seconds(),
+            bytes_out=len(body), bytes_in=len(response.content or b""),
+            status=response.status_code,
+        )
+        return response
+
+    return _on_response
+
+
+def take_spans() -> list[dict]:
+    """지금까지 기록한 span을 꺼내고 비운다."""
+    with _lock:
+        spans = list(_spans)
+        _spans.clear()
+    return spans
+
+
+def write_metrics(run_date: str, spans: list[dict], note: str = "") -> str:
+    """span들을 실행 ID와 함께 metrics.jsonl에 추가한다. 실행 ID를 반환한다."""
+    run_id = uuid.uuid4().hex[:12]
+    with open(METRICS_LOG_PATH, "a", encoding="utf-8") as f:
+        for s in spans:
+            line = {"run_id": run_id, "run_date": run_date, "note": note, **s}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return run_id
+
+
+def _format_bytes(n: int) -> str:
+    if n >= 1024 * 1024:
+        return f"{n / 1024 / 1024:.1f}MB"
+    if n >= 1024:
+        return f"{n / 1024:.1f}KB"
+    return f"{n}B"
+
+
+def print_summary(spans: list[dict]):
+    """종류/이름별 호출 수, 총·최대 시간, 주고받은 바이트, 오류 수를 표로 출력한다."""
+    if not spans:
+        return
+    groups = {}
+    for s in spans:
+        g = groups.setdefault((s["kind"], s["name"]), {"count": 0, "total": 0.0, "max": 0.0, "out": 0, "in": 0, "errors": 0})
+        g["count"] += 1
+        g["total"] += s["duration_ms"]
+        g["max"] = max(g["max"], s["duration_ms"])
+        g["out"] += s["bytes_out"]
+        g["in"] += s["bytes_in"]
+        if s["status"] in _ERROR_STATUS or s["status"][:1] in ("4", "5"):
+            g["errors"] += 1
+
+    print("\n--- 호출/단계별 실행 시간 ---")
+    print(f"{'종류':<10} {'이름':<24} {'횟수':>5} {'합계':>9} {'최대':>9} {'보냄':>8} {'받음':>8} {'오류':>4}")
+    for (kind, name), g in sorted(groups.items(), key=lambda kv: (kv[0][0] != "stage", -kv[1]["total"])):
+        print(
+            f"{kind:<10} {name[:24]:<24} {g['count']:>5} {g['total'] / 1000:>8.2f}s {g['max'] / 1000:>8.2f}s "
+            f"{_format_bytes(g['out']):>8} {_format_bytes(g['in']):>8} {g['errors']:>4}"
+        )
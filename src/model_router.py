@@ -0,0 +1,121 @@
+"""입력 규모에 따라 요약 모델을 고르고, 실패 시 대체 모델로 넘어가는 모듈
+
+수집 항목 수와 데이터 블록 추정 토큰으로 config.MODEL_ROUTES에서 모델을 고른다.
+일정 두어 개뿐인 날에는 저렴한 모델로 충분하고, 데이터가 많은 날에만 큰 모델을 쓴다.
+호출이 타임아웃되거나 서버 오류가 나면 config.MODEL_FALLBACKS의 모델로 한 번 더 시도한다.
+"""
+
+import sys
+from datetime import date
+
+import config
+from src.prompt_budget import estimate_tokens, format_calendar_item, format_notion_item, format_github_item
+from src.summarizer import generate_summary
+
+# 대체 모델로 넘어갈 HTTP 상태 코드 (모델 없음, 요청 타임아웃, 요청 한도 초과) — 5xx는 모두 포함
+_FALLBACK_STATUS = {404, 408, 429}
+
+
+def route_model(
+    calendar_data: list[dict],
+    notion_data: list[dict],
+    github_data: list[dict],
+) -> tuple[str, str, str]:
+    """입력 규모로 모델을 고른다.
+
+    Returns:
+        (모델, 규칙 이름, 선택 이유)
+    """
+    if not config.MODEL_ROUTING:
+        return config.CLAUDE_MODEL, "fixed", "라우팅 꺼짐"
+
+    items = len(calendar_data) + len(notion_data) + len(github_data)
+    tokens = (
+        sum(estimate_tokens(format_calendar_item(i)) for i in calendar_data)
+        + sum(estimate_tokens(format_notion_item(i)) for i in notion_data)
+        + sum(estimate_tokens(format_github_item(i)) for i in github_data)
+    )
+    # 예산을 넘는 부분은 요약 전에 잘려 나가므로 실제 입력은 예산을 넘지 않는다
+    tokens = min(tokens, config.PROMPT_TOKEN_BUDGET)
+
+    for route in config.MODEL_ROUTES:
+        max_items = route.get("max_items")
+        max_tokens = route.get("max_input_tokens")
+        if max_items is not None and items > max_items:
+            continue
+        if max_tokens is not None and tokens > max_tokens:
+            continue
+        limits = []
+        if max_items is not None:
+            limits.append(f"항목 {items} ≤ {max_items}")
+        if max_tokens is not None:
+            limits.append(f"토큰 ~{tokens} ≤ {max_tokens}")
+        reason = ", ".join(limits) or f"항목 {items}, 토큰 ~{tokens}"
+        return route["model"], route["name"], reason
+
+    return config.CLAUDE_MODEL, "default", f"맞는 규칙 없음 (항목 {items}, 토큰 ~{tokens})"
+
+
+def _should_fall_back(error: Exception) -> bool:
+    """다른 모델로 다시 시도할 만한 오류인지 판단한다 (인증/요청 형식 오류는 제외)."""
+    # 요약 캐시 적중처럼 SDK를 불러오지 않았으면 API 오류일 수 없다
+    anthropic = sys.modules.get("anthropic")
+    if anthropic is None:
+        return False
+    if isinstance(error, anthropic.APIConnectionError):  # APITimeoutError 포함
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in _FALLBACK_STATUS or error.status_code >= 500
+    return False
+
+
+def generate_routed_summary(
+    calendar_data: list[dict],
+    notion_data: list[dict],
+    github_data: list[dict] | None = None,
+    user_settings: list[str] | None = None,
+    on_text=None,
+    day: date | None = None,
+) -> tuple[str, dict]:
+    """모델을 골라 요약을 생성한다. 실패하면 대체 모델로 한 번 더 시도한다.
+
+    day는 generate_summary로 그대로 넘긴다 (백필처럼 지난 날짜를 요약할 때).
+
+    Returns:
+        (요약 텍스트, 사용량) — 사용량에 실제 사용한 "model"과 "route"(규칙 이름, 대체 시 "→fallback")를 담는다.
+    """
+    github_data = github_data or []
+    model, route, reason = route_model(calendar_data, notion_data, github_data)
+    print(f"[Router] 모델 선택: {model} ({route}: {reason})")
+
+    fallback = config.MODEL_FALLBACKS.get(model)
+    try:
+        summary, usage = generate_summary(
+            calendar_data=calendar_data,
+            notion_data=notion_data,
+            model=model,
+            max_tokens=config.MAX_TOKENS,
+            github_data=github_data,
+            user_settings=user_settings,
+            on_text=on_text,
+            day=day,
+        )
+    except Exception as e:
+        if not fallback or fallback == model or not _should_fall_back(e):
+            raise
+        print(f"[Router] {model} 호출 실패 ({type(e).__name__}: {e}) → {fallback}로 재시도")
+        model, route = fallback, f"{route}→fallback"
+        summary, usage = generate_summary(
+            calendar_data=calendar_data,
+            notion_data=notion_data,
+            model=model,
+            max_tokens=config.MAX_TOKENS,
+            github_data=github_data,
+            user_settings=user_settings,
+            on_text=on_text,
+            day=day,
+        )
+
+    usage["model"] = model
+    usage["route"] = route
+    return summary, usage
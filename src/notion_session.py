@@ -0,0 +1,102 @@
+"""프로세스 전체에서 공유하는 Notion 클라이언트(keep-alive 연결 풀)를 제공하는 모듈
+
+diary_sync와 collectors.notion이 같은 httpx 연결 풀을 재사용하도록
+토큰별로 Client를 한 번만 만든다. 여러 사용자(토큰)를 함께 돌리는 배치 실행에서도
+Client들이 전송 계층(연결 풀) 하나를 공유한다. 열린 TCP 연결/TLS 핸드셰이크 수를 세어
+한 번의 실행에서 연결이 실제로 재사용되는지 확인할 수 있다.
+
+httpx와 notion_client는 클라이언트를 처음 만들 때 불러온다 (Notion을 쓰지 않는 실행은 불러오지 않음).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from src.metrics import httpx_hooks
+
+if TYPE_CHECKING:
+    import httpx
+    from notion_client import Client
+
+_clients: dict[str, Client] = {}
+_transport = None
+_lock = threading.Lock()
+_stats = {"requests": 0, "connections": 0, "tls_handshakes": 0}
+_stats_lock = threading.Lock()
+
+# 동시 요청(본문 발췌 등)보다 넉넉하게 — 배치 실행에서는 여러 사용자가 함께 쓴다
+MAX_CONNECTIONS = 32
+KEEPALIVE_EXPIRY = 30.0
+
+
+def _count(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _trace(event_name: str, info: dict):
+    """httpcore trace 이벤트로 새 연결과 TLS 핸드셰이크를 센다."""
+    if event_name == "connection.connect_tcp.complete":
+        _count("connections")
+    elif event_name == "connection.start_tls.complete":
+        _count("tls_handshakes")
+
+
+def _on_request(request: httpx.Request):
+    _count("requests")
+    request.extensions["trace"] = _trace
+
+
+def _event_hooks() -> dict:
+    """연결 통계 훅과 엔드포인트별 metrics span 훅을 합친다."""
+    hooks = httpx_hooks("notion")
+    hooks["request"].insert(0, _on_request)
+    return hooks
+
+
+def get_notion_client(token: str) -> Client:
+    """토큰별로 공유되는 Notion 클라이언트를 반환한다."""
+    import httpx
+    from notion_client import Client
+
+    from src.rate_limit import RateLimitedTransport
+
+    global _transport
+    with _lock:
+        client = _clients.get(token)
+        if client is None:
+            if _transport is None:
+                # 전송 계층에서 토큰별 초당 요청 한도를 지키고 429는 Retry-After만큼 기다렸다 재시도한다
+                _transport = RateLimitedTransport(
+                    "notion",
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_CONNECTIONS,
+                        keepalive_expiry=KEEPALIVE_EXPIRY,
+                    ),
+                )
+            # notion_client가 인증 헤더를 httpx.Client에 직접 설정하므로 Client는 토큰마다 따로 둔다
+            http_client = httpx.Client(transport=_transport, event_hooks=_event_hooks())
+            # NOTION_BASE_URL: 벤치마크 등에서 로컬 서버로 보낼 때만 지정
+            base_url = os.environ.get("NOTION_BASE_URL", "https://api.notion.com")
+            client = Client(auth=token, client=http_client, base_url=base_url)
+            _clients[token] = client
+        return client
+
+
+def connection_stats() -> dict:
+    """지금까지의 요청 수, 새 TCP 연결 수, TLS 핸드셰이크 수를 반환한다."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def close_notion_clients():
+    """공유 클라이언트의 연결 풀을 모두 닫는다."""
+    global _transport
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _transport = None
@@ -0,0 +1,162 @@
+"""요약 프롬프트에 들어갈 수집 데이터를 입력 토큰 예산에 맞게 줄이는 모듈
+
+1. 거의 같은 커밋 메시지를 하나로 합치고 (xN 표시)
+2. 같은 제목으로 반복되는 캘린더 일정을 하나로 합친 뒤 (N회 표시)
+3. 그래도 예산을 넘으면 Notion 본문 발췌를 같은 비율로 잘라내고
+4. 마지막으로 신호가 약한 항목부터 뺀다.
+"""
+
+import math
+import re
+
+# Notion 발췌를 줄일 때 남겨 둘 최소 길이
+MIN_EXCERPT_CHARS = 40
+
+_NOISE = re.compile(r"[\W\d_]+", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수를 대략 추정한다 (한글 1자 ≈ 1토큰, 영문 4자 ≈ 1토큰)."""
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + math.ceil((len(text) - non_ascii) / 4)
+
+
+def format_calendar_item(item: dict) -> str:
+    """캘린더 일정 하나를 프롬프트 줄로 만든다."""
+    text = f"- {item['start']} | {item['summary']}"
+    if item["description"]:
+        text += f"\n  설명: {item['description']}"
+    return text
+
+
+def format_notion_item(item: dict) -> str:
+    """Notion 페이지 하나를 프롬프트 줄로 만든다."""
+    tags = ", ".join(item["tags"]) if item["tags"] else ""
+    text = f"- {item['title']}" + (f" | 태그: {tags}" if tags else "")
+    if item["excerpt"]:
+        text += f"\n  내용: {item['excerpt']}"
+    return text
+
+
+def format_github_item(item: dict) -> str:
+    """커밋 하나를 프롬프트 줄로 만든다."""
+    return f"- [{item['repo']}] {item['message']}"
+
+
+def _dedupe_commits(github_data: list[dict]) -> list[dict]:
+    """같은 저장소에서 숫자/기호만 다른 커밋 메시지를 하나로 합친다."""
+    groups = {}
+    for item in github_data:
+        key = (item["repo"], _NOISE.sub(" ", item["message"].lower()).strip())
+        if key in groups:
+            groups[key]["count"] += 1
+        else:
+            groups[key] = {"item": item, "count": 1}
+
+    results = []
+    for group in groups.values():
+        item = dict(group["item"])
+        if group["count"] > 1:
+            item["message"] = f"{item['message']} (x{group['count']})"
+        results.append(item)
+    return results
+
+
+def _collapse_calendar(calendar_data: list[dict]) -> list[dict]:
+    """같은 제목의 반복 일정을 첫 일정 하나로 합친다."""
+    groups = {}
+    for item in calendar_data:
+        key = item["summary"].strip()
+        if key in groups:
+            groups[key]["count"] += 1
+        else:
+            groups[key] = {"item": item, "count": 1}
+
+    results = []
+    for group in groups.values():
+        item = dict(group["item"])
+        if group["count"] > 1:
+            item["summary"] = f"{item['summary']} ({group['count']}회)"
+        results.append(item)
+    return results
+
+
+def _signal(source: str, item: dict) -> float:
+    """항목이 요약에 주는 정보량을 대략 점수로 매긴다 (클수록 중요)."""
+    if source == "calendar":
+        return 2.0 + (1.0 if item["description"] else 0.0)
+    if source == "notion":
+        return 1.5 + min(len(item["excerpt"]), 300) / 300 + 0.2 * len(item["tags"])
+    return 1.0 + min(len(item["message"]), 72) / 72
+
+
+def _usage(calendar_data, notion_data, github_data) -> dict:
+    return {
+        "calendar": sum(estimate_tokens(format_calendar_item(i)) for i in calendar_data),
+        "notion": sum(estimate_tokens(format_notion_item(i)) for i in notion_data),
+        "github": sum(estimate_tokens(format_github_item(i)) for i in github_data),
+    }
+
+
+def fit_to_budget(
+    calendar_data: list[dict],
+    notion_data: list[dict],
+    github_data: list[dict],
+    budget: int,
+) -> tuple[list[dict], list[dict], list[dict], dict]:
+    """수집 데이터를 토큰 예산에 맞게 정리한다. 원본 리스트는 바꾸지 않는다.
+
+    Args:
+        budget: 데이터 블록에 쓸 입력 토큰 예산 (프롬프트 고정 문구 제외)
+
+    Returns:
+        (calendar_data, notion_data, github_data, {소스: 추정 토큰 수, "dropped": 뺀 항목 수})
+    """
+    calendar_data = _collapse_calendar(calendar_data)
+    github_data = _dedupe_commits(github_data)
+    notion_data = [dict(item) for item in notion_data]
+
+    usage = _usage(calendar_data, notion_data, github_data)
+    total = sum(usage.values())
+
+    # 발췌를 제외한 부분은 그대로 두고, 남는 예산 비율만큼 발췌를 자른다
+    if total > budget and notion_data:
+        excerpt_tokens = sum(estimate_tokens(i["excerpt"]) for i in notion_data)
+        fixed = total - excerpt_tokens
+        if excerpt_tokens:
+            # 말줄임표가 붙는 만큼 항목당 1토큰씩 여유를 둔다
+            ratio = max(0.0, (budget - fixed - len(notion_data)) / excerpt_tokens)
+            for item in notion_data:
+                keep = max(MIN_EXCERPT_CHARS, int(len(item["excerpt"]) * ratio))
+                if keep < len(item["excerpt"]):
+                    item["excerpt"] = item["excerpt"][:keep].rstrip() + "…"
+        usage = _usage(calendar_data, notion_data, github_data)
+        total = sum(usage.values())
+
+    # 그래도 넘으면 점수가 낮은 항목부터 뺀다
+    dropped = 0
+    if total > budget:
+        # 점수가 같으면 목록 뒤쪽(오래된 항목)부터 뺀다
+        candidates = (
+            [("calendar", n, i) for n, i in enumerate(calendar_data)]
+            + [("notion", n, i) for n, i in enumerate(notion_data)]
+            + [("github", n, i) for n, i in enumerate(github_data)]
+        )
+        ranked = sorted(candidates, key=lambda c: (_signal(c[0], c[2]), -c[1]))
+        lines = {"calendar": format_calendar_item, "notion": format_notion_item, "github": format_github_item}
+        removed = set()
+        for source, _, item in ranked:
+            if total <= budget:
+                break
+            total -= estimate_tokens(lines[source](item))
+            removed.add(id(item))
+            dropped += 1
+        calendar_data = [i for i in calendar_data if id(i) not in removed]
+        notion_data = [i for i in notion_data if id(i) not in removed]
+        github_data = [i for i in github_data if id(i) not in removed]
+        usage = _usage(calendar_data, notion_data, github_data)
+
+    usage["dropped"] = dropped
+    return calendar_data, notion_data, github_data, usage
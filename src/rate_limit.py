@@ -0,0 +1,238 @@
+"""모든 외부 API 호출이 함께 쓰는 요청 한도(토큰 버킷)와 재시도 정책
+
+서비스와 자격 증명(토큰/계정)마다 토큰 버킷 하나를 프로세스 전체에서 공유한다 (config.RATE_LIMITS).
+요청 전에 토큰을 받아 허용 속도를 넘지 않게 하고, 그래도 429/503을 받으면
+Retry-After를 지켜 그 서비스의 버킷 전체를 멈춘 뒤 다시 시도한다. Retry-After가 없으면
+지수 백오프에 지터를 섞어 기다린다. 동시에 여러 요청이 한꺼번에 재시도하는 것을 막는다.
+
+- httpx 클라이언트(Notion, GitHub): RateLimitedTransport (httpx는 처음 쓸 때 불러온다)
+- requests/niquests 세션(CalDAV): limit_session
+- 그 밖의 호출(Telegram, Anthropic): get_bucket(service).acquire()와 retry_delay
+"""
+
+import hashlib
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import config
+from src.metrics import record
+
+# 요청이 처리되지 않았음이 확실한 상태 코드 — 메서드와 관계없이 재시도한다
+_RETRY_ALWAYS = {429, 503}
+# 처리됐을 수도 있는 상태 코드 — 같은 요청을 반복해도 안전한 메서드만 재시도한다
+_RETRY_IDEMPOTENT = {500, 502, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH", "PROPFIND", "REPORT"}
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 burst개까지 쌓이는 토큰 버킷 (스레드 안전)."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """토큰 하나를 예약하고, 사용하기 전까지 기다려야 할 시간(초)을 반환한다."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return wait + max(0.0, self._blocked_until - now)
+
+    def acquire(self) -> float:
+        """토큰을 받을 때까지 기다린다. 기다린 시간(초)을 반환한다."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """서버가 한도 초과를 알려오면 seconds 동안 이 버킷의 모든 요청을 멈춘다."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            # 멈춘 뒤 한꺼번에 몰리지 않도록 쌓인 토큰을 비운다
+            self._tokens = min(self._tokens, 0.0)
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_key(service: str, credential: str | None) -> str:
+    """자격 증명별 버킷 이름 ("notion:1a2b3c4d"). 한도는 토큰/계정마다 따로 매겨지므로 사용자별로 나눈다."""
+    if not credential:
+        return service
+    return f"{service}:{hashlib.sha256(credential.encode()).hexdigest()[:8]}"
+
+
+def get_bucket(name: str) -> TokenBucket:
+    """공유 버킷을 반환한다. 한도는 이름의 서비스 부분(":" 앞)으로 config.RATE_LIMITS에서 찾는다."""
+    with _buckets_lock:
+        bucket = _buckets.get(name)
+        if bucket is None:
+            rate, burst = config.RATE_LIMITS.get(name.split(":", 1)[0], (10, 10))
+            bucket = TokenBucket(rate, burst)
+            _buckets[name] = bucket
+        return bucket
+
+
+def parse_retry_after(headers) -> float | None:
+    """Retry-After(초 또는 HTTP 날짜) 또는 GitHub의 X-RateLimit-Reset에서 대기 시간을 읽는다."""
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+        try:
+            return max(0.0, float(headers["X-RateLimit-Reset"]) - time.time())
+        except ValueError:
+            return None
+    return None
+
+
+def retry_delay(attempt: int, retry_after: float | None = None) -> float:
+    """attempt번째(0부터) 재시도 전 대기 시간. Retry-After가 있으면 그 시간에 약간의 지터를 더한다."""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, config.RETRY_BASE_DELAY)
+    # full jitter: 0 ~ min(상한, 기본값 * 2^attempt)
+    return random.uniform(0, min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _is_throttled(response) -> bool:
+    """429, 또는 GitHub처럼 403으로 알려주는 한도 초과인지 확인한다."""
+    if response.status_code == 429:
+        return True
+    return response.status_code == 403 and (
+        "Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0"
+    )
+
+
+def send_with_retry(service: str, bucket_name: str, method: str, send, retry_exceptions: tuple = ()):
+    """버킷에서 토큰을 받고 send()를 호출한다. 한도 초과/일시 오류면 정책에 따라 다시 시도한다.
+
+    Args:
+        send: 인자 없이 호출하면 응답(status_code, headers, close())을 반환하는 함수
+        retry_exceptions: 메서드와 관계없이 재시도할 예외 (연결 실패 등 요청이 전달되지 않은 경우)
+
+    Returns:
+        마지막 응답 (재시도 횟수를 다 쓰면 실패 응답을 그대로 돌려준다)
+    """
+    bucket = get_bucket(bucket_name)
+    idempotent = method.upper() in _IDEMPOTENT_METHODS
+    attempts = config.RETRY_MAX_ATTEMPTS
+
+    for attempt in range(attempts):
+        waited = bucket.acquire()
+        if waited > 0.05:
+            record(service, "rate_limit_wait", waited)
+
+        last = attempt == attempts - 1
+        try:
+            response = send()
+        except retry_exceptions as e:
+            if last:
+                raise
+            delay = retry_delay(attempt)
+            print(f"[RateLimit] {service} 연결 실패 - {delay:.1f}초 후 재시도: {e}")
+            record(service, "retry", delay, status="error")
+            time.sleep(delay)
+            continue
+
+        status = response.status_code
+        throttled = _is_throttled(response)
+        if last or not (throttled or status in _RETRY_ALWAYS or (idempotent and status in _RETRY_IDEMPOTENT)):
+            return response
+
+        retry_after = parse_retry_after(response.headers)
+        if retry_after is not None and retry_after > config.RETRY_MAX_DELAY:
+            # 한도가 풀리기까지 너무 오래 걸리면 기다리지 않고 실패를 돌려준다
+            return response
+        delay = retry_delay(attempt, retry_after)
+        if throttled or status == 503:
+            # 같은 서비스를 쓰는 다른 요청도 함께 멈춰 429가 연달아 나지 않게 한다
+            bucket.pause(delay)
+        response.close()
+        print(f"[RateLimit] {service} {status} - {delay:.1f}초 후 재시도 ({attempt + 1}/{attempts - 1})")
+        record(service, "retry", delay, status=status)
+        time.sleep(delay)
+
+    raise AssertionError("unreachable")
+
+
+def _transport_class():
+    """RateLimitedTransport 클래스를 만든다. httpx는 이때 처음 불러온다."""
+    import httpx
+
+    class RateLimitedTransport(httpx.HTTPTransport):
+        """요청마다 공유 버킷에서 토큰을 받고, 정책에 따라 재시도하는 httpx 전송 계층.
+
+        여러 클라이언트(사용자별 토큰)가 이 전송 계층 하나, 즉 연결 풀 하나를 함께 쓸 수 있다.
+        버킷은 요청의 Authorization 헤더(토큰)별로 나뉜다.
+
+        Args:
+            service: 버킷/로그에 쓸 서비스 이름
+            bucket_for: httpx.Request → 버킷 이름의 서비스 부분. 엔드포인트별로 한도가 다를 때 지정 (기본: service)
+            **kwargs: httpx.HTTPTransport 인자 (limits 등)
+        """
+
+        def __init__(self, service: str, bucket_for=None, **kwargs):
+            super().__init__(**kwargs)
+            self.service = service
+            self.bucket_for = bucket_for or (lambda request: service)
+
+        def handle_request(self, request: httpx.Request) -> httpx.Response:
+            def _send():
+                response = super(RateLimitedTransport, self).handle_request(request)
+                if response.status_code >= 400:
+                    # 재시도 판단 전에 본문을 받아 두어야 연결을 풀에 돌려줄 수 있다
+                    response.read()
+                return response
+
+            bucket = bucket_key(self.bucket_for(request), request.headers.get("Authorization"))
+            return send_with_retry(
+                self.service, bucket, request.method, _send,
+                retry_exceptions=(httpx.ConnectError, httpx.ConnectTimeout),
+            )
+
+    return RateLimitedTransport
+
+
+def __getattr__(name: str):
+    # httpx를 쓰는 전송 계층은 처음 쓸 때 만든다 — Notion/GitHub를 쓰지 않는 실행은 httpx를 불러오지 않는다
+    if name == "RateLimitedTransport":
+        with _buckets_lock:
+            cls = globals().get(name) or _transport_class()
+            globals()[name] = cls
+        return cls
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def limit_session(session, bucket_name: str, url: str):
+    """requests/niquests 세션에서 url로 가는 요청에 공유 버킷과 재시도 정책을 적용한다 (CalDAV용).
+
+    Args:
+        bucket_name: 버킷 이름 (bucket_key로 만든 계정별 이름)
+    """
+    service = bucket_name.split(":", 1)[0]
+    adapter = session.get_adapter(url)
+    send = adapter.send
+
+    def _send(request, **kwargs):
+        # CalDAV 요청(PROPFIND/REPORT)은 읽기 전용이라 연결 오류도 재시도한다
+        return send_with_retry(service, bucket_name, request.method, lambda: send(request, **kwargs),
+                               retry_exceptions=(OSError,))
+
+    adapter.send = _send
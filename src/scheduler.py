@@ -0,0 +1,234 @@
+"""파이프라인 단계를 의존성 그래프(DAG)에 따라 동시에 실행하는 모듈
+
+서로 의존하지 않는 단계(수집, 설정 로드 등)는 스레드 풀에서 함께 실행하고,
+의존 관계가 있는 단계(요약 → 전송 → 저장 → 답장 대기)는 순서를 지킨다.
+각 단계는 개별 타임아웃을 가지며, 실행이 끝나면 임계 경로(critical path)를 출력한다.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from src.metrics import record
+from src.user_context import submit_with_context
+
+_MISSING = object()
+
+# 타임아웃으로 결과를 버렸지만 아직 돌고 있는 단계 (끝나면 스스로 빠진다)
+_abandoned: set = set()
+_abandoned_lock = threading.Lock()
+
+
+def _abandon(future):
+    with _abandoned_lock:
+        _abandoned.add(future)
+
+    def _discard(f):
+        with _abandoned_lock:
+            _abandoned.discard(f)
+
+    future.add_done_callback(_discard)
+
+
+def abandoned_stages() -> int:
+    """타임아웃된 뒤에도 아직 끝나지 않은 단계 스레드 수."""
+    with _abandoned_lock:
+        return len(_abandoned)
+
+
+@dataclass
+class Stage:
+    """파이프라인의 한 단계.
+
+    Attributes:
+        name: 단계 이름 (다른 단계의 deps에서 참조)
+        func: 실행 함수. 지금까지의 결과 dict({단계 이름: 결과})를 인자로 받는다.
+        deps: 먼저 끝나야 하는 단계 이름들
+        timeout: 단계 타임아웃 (초), None이면 무제한
+        fallback: 실패/타임아웃 시 대신 사용할 값. 지정하지 않으면 예외를 그대로 올린다.
+    """
+
+    name: str
+    func: Callable[[dict], Any]
+    deps: tuple[str, ...] = ()
+    timeout: float | None = None
+    fallback: Any = _MISSING
+
+
+@dataclass
+class StageTiming:
+    """단계별 실행 시각 기록 (time.monotonic 기준)."""
+
+    start: float
+    end: float
+    status: str = "ok"
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class StageReport:
+    """run_stages 실행 결과."""
+
+    results: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, StageTiming] = field(default_factory=dict)
+    critical_path: list[str] = field(default_factory=list)
+
+
+class StageError(RuntimeError):
+    """fallback이 없는 단계가 실패했을 때 발생한다."""
+
+
+def _validate(stages: list[Stage]) -> dict[str, Stage]:
+    """이름 중복, 없는 의존성, 순환 의존성을 검사한다."""
+    by_name = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"중복된 단계 이름: {stage.name}")
+        by_name[stage.name] = stage
+
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"'{stage.name}' 단계의 의존성 '{dep}'이 없음")
+
+    visited, visiting = set(), set()
+
+    def _visit(name: str):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"순환 의존성 발견: {name}")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            _visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in by_name:
+        _visit(name)
+    return by_name
+
+
+def _critical_path(by_name: dict[str, Stage], timings: dict[str, StageTiming]) -> list[str]:
+    """가장 늦게 끝난 단계에서 거꾸로, 가장 늦게 끝난 의존성을 따라간다."""
+    if not timings:
+        return []
+    current = max(timings, key=lambda n: timings[n].end)
+    path = [current]
+    while True:
+        deps = [d for d in by_name[current].deps if d in timings]
+        if not deps:
+            break
+        current = max(deps, key=lambda n: timings[n].end)
+        path.append(current)
+    path.reverse()
+    return path
+
+
+def _print_report(report: StageReport, origin: float):
+    """단계별 소요 시간과 임계 경로를 출력한다."""
+    print("\n--- 단계별 실행 시간 ---")
+    for name, t in sorted(report.timings.items(), key=lambda kv: kv[1].start):
+        mark = "*" if name in report.critical_path else " "
+        status = "" if t.status == "ok" else f" ({t.status})"
+        print(f"{mark} {name:<16} {t.start - origin:7.1f}s → {t.end - origin:7.1f}s  {t.duration:6.1f}s{status}")
+
+    if report.critical_path:
+        chain = " → ".join(report.critical_path)
+        total = sum(report.timings[n].duration for n in report.critical_path)
+        print(f"임계 경로: {chain} (합계 {total:.1f}s)")
+
+
+def run_stages(stages: list[Stage], max_workers: int = 8) -> StageReport:
+    """단계들을 의존성 순서를 지키며 스레드 풀에서 동시에 실행한다.
+
+    Args:
+        stages: 실행할 단계 목록
+        max_workers: 동시에 실행할 최대 단계 수
+
+    Returns:
+        StageReport (단계별 결과, 실행 시각, 임계 경로)
+
+    Raises:
+        StageError: fallback이 없는 단계가 실패하거나 타임아웃된 경우
+
+    타임아웃된 단계의 스레드는 강제로 멈출 수 없어 백그라운드에서 계속 돈다.
+    run_stages는 그 스레드를 기다리지 않고 반환한다 (결과는 버린다). 인터프리터는
+    종료할 때 풀 스레드를 기다리므로, 한 번 실행하고 끝나는 프로세스는
+    abandoned_stages()를 확인해 기다리지 않고 종료해야 한다.
+    """
+    by_name = _validate(stages)
+    report = StageReport()
+    pending = dict(by_name)
+    running = {}  # future -> (stage, start, deadline)
+    timed_out = set()  # 결과를 버린 채 아직 돌고 있을 수 있는 future
+    origin = time.monotonic()
+    error = None
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+    try:
+        while pending or running:
+            for name in list(pending):
+                stage = pending[name]
+                if all(d in report.results for d in stage.deps):
+                    del pending[name]
+                    start = time.monotonic()
+                    deadline = start + stage.timeout if stage.timeout is not None else None
+                    future = submit_with_context(executor, stage.func, dict(report.results))
+                    running[future] = (stage, start, deadline)
+
+            if not running:
+                # 남은 단계가 있는데 실행할 수 없음 (앞 단계 실패)
+                break
+
+            deadlines = [d for _, _, d in running.values() if d is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future in list(running):
+                stage, start, deadline = running[future]
+                if future in done:
+                    try:
+                        report.results[stage.name] = future.result()
+                        status = "ok"
+                    except Exception as e:
+                        status = "failed"
+                        print(f"[Scheduler] '{stage.name}' 단계 실패: {e}")
+                        if stage.fallback is _MISSING:
+                            error = error or StageError(f"'{stage.name}' 단계 실패: {e}")
+                        else:
+                            report.results[stage.name] = stage.fallback
+                elif deadline is not None and now >= deadline:
+                    # 스레드는 강제 종료할 수 없으므로 결과만 버리고 진행한다
+                    status = "timeout"
+                    timed_out.add(future)
+                    _abandon(future)
+                    print(f"[Scheduler] '{stage.name}' 단계 타임아웃 ({stage.timeout:.0f}초)")
+                    if stage.fallback is _MISSING:
+                        error = error or StageError(f"'{stage.name}' 단계 타임아웃")
+                    else:
+                        report.results[stage.name] = stage.fallback
+                else:
+                    continue
+                del running[future]
+                report.timings[stage.name] = StageTiming(start, now, status)
+                record("stage", stage.name, now - start, status=status)
+
+            if error:
+                break
+    finally:
+        # 타임아웃된 단계가 있으면 그 스레드를 기다리지 않는다 (기다리면 타임아웃이 의미 없다)
+        executor.shutdown(wait=error is None and not running and not timed_out, cancel_futures=True)
+
+    report.critical_path = _critical_path(by_name, report.timings)
+    _print_report(report, origin)
+
+    if error:
+        raise error
+    return report
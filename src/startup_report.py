@@ -0,0 +1,172 @@
+"""시작 시간 보고서 (haru-bot startup-report)
+
+새 인터프리터에서 python -X importtime으로 CLI 모듈(src.main)과, 실행 중에
+지연 로드되는 의존성(수집기, SDK)을 불러와 모듈별 import 시간을 집계한다.
+기본은 현재 설정(.env 포함)에서 실제로 불러올 것만, --all이면 전부 불러온다.
+--json으로 결과를 한 줄씩 쌓아 두면 릴리스마다 시작 시간을 비교할 수 있다.
+"""
+
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tomllib
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 실행 중에 처음 쓸 때 불러오는 SDK — (이름, 모듈, 필요한 설정). 수집기는 src.collectors.COLLECTORS에서 가져온다
+LAZY_DEPENDENCIES = [
+    ("Notion SDK", "notion_client", ("NOTION_TOKEN",)),
+    ("Claude SDK", "anthropic", ("ANTHROPIC_API_KEY",)),
+    ("Telegram", "telegram", ("TELEGRAM_BOT_TOKEN",)),
+]
+
+_CHILD_CODE = "import src.main; from src.startup_report import load_lazy_modules; load_lazy_modules({everything})"
+
+
+def _lazy_modules() -> list[tuple[str, str, tuple[str, ...]]]:
+    from src.collectors import COLLECTORS
+
+    collectors = [(f"{label} 수집기", module, required) for label, module, _, required in COLLECTORS.values()]
+    return collectors + LAZY_DEPENDENCIES
+
+
+def load_lazy_modules(everything: bool = False):
+    """(측정용 자식 프로세스에서 실행) 설정이 있는 지연 로드 모듈을 불러오고, 결과를 stdout에 JSON으로 쓴다.
+
+    importlib로 불러온 모듈은 -X importtime 출력에서 중첩 깊이가 맞지 않으므로 시간은 직접 잰다.
+    앞 모듈이 이미 불러온 공통 의존성(httpx 등)은 뒤 모듈의 시간에 들어가지 않는다.
+    """
+    from dotenv import load_dotenv
+
+    from src.user_context import get_env
+
+    load_dotenv()
+    result = []
+    for label, module, required in _lazy_modules():
+        missing = [env for env in required if not get_env(env)]
+        loaded = everything or not missing
+        ms = None
+        if loaded:
+            start = time.perf_counter()
+            importlib.import_module(module)
+            ms = round((time.perf_counter() - start) * 1000, 1)
+        result.append({"label": label, "module": module, "loaded": loaded, "missing": missing, "ms": ms})
+    print(json.dumps(result))
+
+
+def _parse_importtime(stderr: str) -> list[dict]:
+    """-X importtime 출력 → [{"name", "depth", "self_us", "cumulative_us"}] (출력 순서)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # 이름 앞 공백: 구분자 뒤 한 칸 + 중첩 깊이마다 두 칸
+        indent = len(name) - len(name.lstrip()) - 1
+        entries.append({
+            "name": name.strip(),
+            "depth": indent // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return entries
+
+
+def _project_version() -> str:
+    try:
+        with open(os.path.join(PROJECT_ROOT, "pyproject.toml"), "rb") as f:
+            return tomllib.load(f)["project"]["version"]
+    except (OSError, KeyError, tomllib.TOMLDecodeError):
+        return "unknown"
+
+
+def measure(everything: bool = False) -> dict:
+    """새 인터프리터에서 import 시간을 측정한다.
+
+    Returns:
+        {"wall_ms", "interpreter_ms", "main_ms", "lazy": [...], "entries": [...]}
+    """
+    command = [sys.executable, "-X", "importtime", "-c", _CHILD_CODE.format(everything=everything)]
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"측정 프로세스 실패:\n{proc.stderr[-2000:]}")
+
+    entries = _parse_importtime(proc.stderr)
+    lazy = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # 최상위(depth 0) import 중 src.main 이전은 인터프리터 시작(site 등)
+    top = [e for e in entries if e["depth"] == 0]
+    main_index = next(i for i, e in enumerate(top) if e["name"] == "src.main")
+
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "interpreter_ms": round(sum(e["cumulative_us"] for e in top[:main_index]) / 1000, 1),
+        "main_ms": round(top[main_index]["cumulative_us"] / 1000, 1),
+        "lazy": lazy,
+        "entries": entries,
+    }
+
+
+def _by_package(entries: list[dict]) -> dict[str, float]:
+    """최상위 패키지별 self 시간 합계 (ms)."""
+    totals = {}
+    for e in entries:
+        package = e["name"].split(".", 1)[0]
+        totals[package] = totals.get(package, 0.0) + e["self_us"] / 1000
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+
+def startup_report(everything: bool = False, top: int = 15, json_path: str | None = None) -> dict:
+    """시작 시간 보고서를 출력하고, json_path가 있으면 결과를 한 줄 추가한다."""
+    result = measure(everything)
+    version = _project_version()
+    scope = "모든 지연 로드 모듈" if everything else "현재 설정 기준"
+
+    print(f"=== 시작 시간 보고서 (haru-bot {version}, Python {platform.python_version()}) ===")
+    print(f"{'인터프리터 시작 (site 등)':<32} {result['interpreter_ms']:8.1f}ms")
+    print(f"{'CLI 시작 (import src.main)':<32} {result['main_ms']:8.1f}ms")
+    print(f"지연 로드 ({scope}):")
+    lazy_total = 0.0
+    for item in result["lazy"]:
+        if item["loaded"]:
+            lazy_total += item["ms"]
+            print(f"  {item['label']:<14} {item['module']:<24} {item['ms']:8.1f}ms")
+        else:
+            print(f"  {item['label']:<14} {item['module']:<24} 건너뜀 ({', '.join(item['missing'])} 없음)")
+    print(f"{'import 합계':<32} {result['interpreter_ms'] + result['main_ms'] + lazy_total:8.1f}ms")
+    print(f"{'프로세스 전체 (벽시계)':<32} {result['wall_ms']:8.1f}ms")
+
+    packages = _by_package(result["entries"])
+    print(f"\n패키지별 import 시간 (self 합계, 상위 {top}):")
+    for package, ms in list(packages.items())[:top]:
+        print(f"  {package:<30} {ms:8.1f}ms")
+
+    print(f"\n모듈별 import 시간 (self, 상위 {top}):")
+    for e in sorted(result["entries"], key=lambda e: -e["self_us"])[:top]:
+        print(f"  {e['name']:<40} {e['self_us'] / 1000:8.1f}ms  (누적 {e['cumulative_us'] / 1000:.1f}ms)")
+
+    if json_path:
+        line = {
+            "ts": datetime.now(KST).isoformat(timespec="seconds"),
+            "version": version,
+            "python": platform.python_version(),
+            "all": everything,
+            "wall_ms": result["wall_ms"],
+            "interpreter_ms": result["interpreter_ms"],
+            "main_ms": result["main_ms"],
+            "lazy_ms": {item["module"]: item["ms"] for item in result["lazy"]},
+            "packages_ms": {k: round(v, 1) for k, v in list(packages.items())[:top]},
+        }
+        with open(json_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        print(f"\n결과 추가: {json_path}")
+    return result
@@ -1,16 +1,40 @@
 """Claude API를 사용하여 오늘 한 일 3가지를 요약하는 모듈"""
 
-import os
+from __future__ import annotations
 
-import anthropic
+import hashlib
+import importlib
+import json
+import threading
+import time
+from datetime import date
+from typing import TYPE_CHECKING
 
+import config
+from src.local_cache import load_json, update_json
+from src.metrics import span
+from src.rate_limit import bucket_key, get_bucket
+from src.user_context import get_env
+from src.prompt_budget import fit_to_budget, format_calendar_item, format_notion_item, format_github_item
 
+if TYPE_CHECKING:
+    import anthropic
+
+# 같은 입력으로 다시 요약할 때 API를 호출하지 않도록 응답을 저장한다
+SUMMARY_CACHE_FILE = "summary_cache.json"
+
+# API 키별 클라이언트 — 배치 실행에서 같은 키를 쓰는 사용자들이 연결 풀을 함께 쓴다
+_clients: dict[str, anthropic.Anthropic] = {}
+_clients_lock = threading.Lock()
+
+
+# 백필에서는 지난 날짜를 요약하므로 날짜는 사용자 프롬프트에서만 알려준다
 SYSTEM_PROMPT = """당신은 사용자의 하루를 정리해주는 따뜻한 일기 도우미입니다.
-사용자의 오늘 활동 데이터를 분석하여,
-오늘 실제로 한 일 중 가장 의미 있는 3가지를 골라 자연스러운 한국어로 정리합니다.
+사용자의 하루 활동 데이터를 분석하여,
+그날 실제로 한 일 중 가장 의미 있는 3가지를 골라 자연스러운 한국어로 정리합니다.
 
 데이터 소스별 의미:
-- 캘린더 일정: 오늘 있었던 일정. 대부분 실제로 참석한 것으로 간주
+- 캘린더 일정: 그날 있었던 일정. 대부분 실제로 참석한 것으로 간주
 - Notion 작업 내용: 실제 작업한 내용 (할일 목록은 완료된 것만 포함됨)
 - GitHub 커밋: 실제로 한 작업
 
@@ -27,6 +51,29 @@ SYSTEM_PROMPT = """당신은 사용자의 하루를 정리해주는 따뜻한 
 - 이모지는 사용하지 않음"""
 
 
+def _get_client(api_key: str) -> anthropic.Anthropic:
+    """API 키별 공유 클라이언트를 반환한다."""
+    import anthropic
+
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # 재시도(429는 Retry-After, 그 밖에는 지수 백오프)는 SDK가 1회만 하고,
+            # 그래도 실패하면 model_router가 대체 모델로 넘어간다
+            client = anthropic.Anthropic(api_key=api_key, timeout=config.SUMMARY_API_TIMEOUT, max_retries=1)
+            _clients[api_key] = client
+        return client
+
+
+def preload_sdk():
+    """ANTHROPIC_API_KEY가 있으면 anthropic SDK를 미리 불러온다.
+
+    수집 단계와 동시에 실행해 두면 요약 단계에서 SDK를 불러오느라 기다리지 않는다.
+    """
+    if get_env("ANTHROPIC_API_KEY"):
+        importlib.import_module("anthropic")
+
+
 def generate_summary(
     calendar_data: list[dict],
     notion_data: list[dict],
@@ -34,80 +81,197 @@ def generate_summary(
     max_tokens: int = 1000,
     github_data: list[dict] | None = None,
     user_settings: list[str] | None = None,
+    token_budget: int | None = None,
+    on_text=None,
+    day: date | None = None,
 ) -> tuple[str, dict]:
     """수집된 데이터를 바탕으로 오늘 한 일 3가지를 요약한다.
 
+    Args:
+        day: 요약할 날짜 (백필용). None이면 오늘의 데이터로 보고 프롬프트를 쓴다.
+        token_budget: 데이터 블록의 입력 토큰 예산, None이면 config.PROMPT_TOKEN_BUDGET
+        on_text: 지정하면 스트리밍 API를 쓰고, 텍스트가 도착할 때마다
+            지금까지의 전체 텍스트로 호출한다 (캐시 적중 시에는 호출하지 않음).
+
     Returns:
         (요약 텍스트, {"input_tokens": int, "output_tokens": int})
     """
-    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    api_key = get_env("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError("ANTHROPIC_API_KEY가 설정되지 않았습니다.")
 
-    client = anthropic.Anthropic(api_key=api_key)
-    user_prompt = _build_user_prompt(calendar_data, notion_data, github_data or [])
+    client = _get_client(api_key)
+    calendar_data, notion_data, github_data, token_usage = fit_to_budget(
+        calendar_data, notion_data, github_data or [],
+        budget=token_budget or config.PROMPT_TOKEN_BUDGET,
+    )
+    dropped = f", 제외 {token_usage['dropped']}개" if token_usage["dropped"] else ""
+    print(
+        f"[Summarizer] 프롬프트 토큰 추정: Calendar {token_usage['calendar']}, "
+        f"Notion {token_usage['notion']}, GitHub {token_usage['github']}{dropped}"
+    )
+    user_prompt = _build_user_prompt(calendar_data, notion_data, github_data, day)
+
+    system_blocks = _build_system_blocks(user_settings or [])
+    system_prompt = "".join(block["text"] for block in system_blocks)
 
-    system_prompt = SYSTEM_PROMPT
-    if user_settings:
-        settings_text = "\n".join(f"- {s}" for s in user_settings)
-        system_prompt += f"\n\n사용자 지정 규칙 (반드시 따를 것):\n{settings_text}"
-        print(f"[Summarizer] 사용자 설정 {len(user_settings)}건 적용")
+    key = _cache_key(model, system_prompt, user_prompt, max_tokens)
+    cached = _get_cached_summary(key)
+    if cached:
+        print(f"[Summarizer] 캐시된 요약 사용 (API 호출 없음, {len(cached)}자)")
+        return cached, {
+            "input_tokens": 0, "output_tokens": 0,
+            "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0,
+            "cache_hit": True,
+        }
 
     print(f"[Summarizer] Claude API 호출 중 (모델: {model})...")
 
-    message = client.messages.create(
-        model=model,
-        max_tokens=max_tokens,
-        system=[{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}],
-        messages=[{"role": "user", "content": user_prompt}],
-    )
+    request = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": system_blocks,
+        "messages": [{"role": "user", "content": user_prompt}],
+    }
+    get_bucket(bucket_key("anthropic", api_key)).acquire()
+    # 요청 크기는 프롬프트 본문 기준으로 대략 센다
+    sent = len((system_prompt + user_prompt).encode("utf-8"))
+    with span("anthropic", f"{'messages.stream' if on_text else 'messages.create'}:{model}", sent) as metric:
+        if on_text:
+            # 스트리밍: 받은 만큼의 텍스트를 콜백으로 넘긴다. 최종 메시지/사용량은 비스트리밍과 같다
+            with client.messages.stream(**request) as stream:
+                text = ""
+                for chunk in stream.text_stream:
+                    text += chunk
+                    on_text(text)
+                message = stream.get_final_message()
+        else:
+            message = client.messages.create(**request)
 
-    result = message.content[0].text
+        result = message.content[0].text
+        metric["bytes_in"] = len(result.encode("utf-8"))
     usage = {
         "input_tokens": message.usage.input_tokens,
         "output_tokens": message.usage.output_tokens,
+        "cache_creation_input_tokens": message.usage.cache_creation_input_tokens or 0,
+        "cache_read_input_tokens": message.usage.cache_read_input_tokens or 0,
     }
-    print(f"[Summarizer] 요약 완료 ({len(result)}자, 입력 {usage['input_tokens']}토큰, 출력 {usage['output_tokens']}토큰)")
+    print(
+        f"[Summarizer] 요약 완료 ({len(result)}자, 입력 {usage['input_tokens']}토큰, 출력 {usage['output_tokens']}토큰, "
+        f"캐시 쓰기 {usage['cache_creation_input_tokens']}토큰, 캐시 읽기 {usage['cache_read_input_tokens']}토큰)"
+    )
+    _store_summary(key, result)
     return result, usage
 
 
-def _build_user_prompt(calendar_data: list[dict], notion_data: list[dict], github_data: list[dict] | None = None) -> str:
-    """Claude에게 보낼 사용자 프롬프트를 구성한다."""
+def _canonical_settings(user_settings: list[str]) -> list[str]:
+    """사용자 설정을 줄 단위로 나누고 공백을 정리한 뒤, 중복을 빼고 처음 나온 순서대로 돌려준다.
+
+    같은 설정이 여러 일기에 반복 저장되거나 조회 순서가 달라져도
+    시스템 프롬프트가 바뀌지 않아야 프롬프트 캐시가 맞는다.
+    """
+    seen = set()
+    results = []
+    for setting in user_settings:
+        for line in setting.splitlines():
+            normalized = " ".join(line.split()).lstrip("- ").strip()
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                results.append(normalized)
+    return results
+
+
+def _build_system_blocks(user_settings: list[str]) -> list[dict]:
+    """시스템 프롬프트를 캐시 가능한 블록으로 나눈다.
+
+    고정 프롬프트(항상 같음)를 첫 블록으로 두고 캐시 지점을 찍은 뒤,
+    자주 바뀌는 사용자 설정은 그 뒤의 별도 블록에 둔다. 설정이 바뀌어도
+    고정 접두부는 그대로 캐시에서 읽힌다.
+    """
+    blocks = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+    settings = _canonical_settings(user_settings)
+    if settings:
+        settings_text = "\n".join(f"- {s}" for s in settings)
+        blocks.append({
+            "type": "text",
+            "text": f"\n\n사용자 지정 규칙 (반드시 따를 것):\n{settings_text}",
+            "cache_control": {"type": "ephemeral"},
+        })
+        print(f"[Summarizer] 사용자 설정 {len(settings)}건 적용 (원본 {len(user_settings)}건)")
+    return blocks
+
+
+def _cache_key(model: str, system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+    """요약 요청 내용의 해시를 캐시 키로 쓴다."""
+    payload = json.dumps([model, system_prompt, user_prompt, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_cached_summary(key: str) -> str | None:
+    """캐시에서 요약을 찾는다. 보관 기간이 지난 항목은 무시한다."""
+    entry = load_json(SUMMARY_CACHE_FILE, {}).get(key)
+    if not entry:
+        return None
+    if time.time() - entry["created_at"] > config.SUMMARY_CACHE_MAX_AGE_DAYS * 86400:
+        return None
+    return entry["text"]
+
+
+def _store_summary(key: str, text: str):
+    """요약을 캐시에 저장하고, 오래된 항목과 개수 초과분을 정리한다.
+
+    병렬 백필의 다른 날짜가 같은 파일에 쓰므로 지금 파일 내용에 합쳐 저장한다.
+    """
+    def add_entry(cache: dict) -> dict:
+        cache[key] = {"text": text, "created_at": time.time()}
+        cutoff = time.time() - config.SUMMARY_CACHE_MAX_AGE_DAYS * 86400
+        entries = sorted(
+            ((k, v) for k, v in cache.items() if v["created_at"] >= cutoff),
+            key=lambda kv: kv[1]["created_at"],
+            reverse=True,
+        )
+        return dict(entries[:config.SUMMARY_CACHE_MAX_ENTRIES])
+
+    update_json(SUMMARY_CACHE_FILE, add_entry, {})
+
+
+def _build_user_prompt(
+    calendar_data: list[dict],
+    notion_data: list[dict],
+    github_data: list[dict] | None = None,
+    day: date | None = None,
+) -> str:
+    """Claude에게 보낼 사용자 프롬프트를 구성한다. day가 있으면 '오늘' 대신 그 날짜로 쓴다."""
+    if day is None:
+        when, that_day = "오늘", "오늘"
+    else:
+        when, that_day = f"{day.isoformat()}({'월화수목금토일'[day.weekday()]})", "이날"
     sections = []
 
     if calendar_data:
-        lines = []
-        for item in calendar_data:
-            lines.append(f"- {item['start']} | {item['summary']}")
-            if item["description"]:
-                lines.append(f"  설명: {item['description']}")
-        sections.append("### 오늘 캘린더 일정\n" + "\n".join(lines))
+        lines = [format_calendar_item(item) for item in calendar_data]
+        sections.append(f"### {when} 캘린더 일정\n" + "\n".join(lines))
 
     if notion_data:
-        lines = []
-        for item in notion_data:
-            tags = ", ".join(item["tags"]) if item["tags"] else ""
-            tag_str = f" | 태그: {tags}" if tags else ""
-            lines.append(f"- {item['title']}{tag_str}")
-            if item["excerpt"]:
-                lines.append(f"  내용: {item['excerpt']}")
-        sections.append("### 오늘 Notion에서 작업한 내용\n" + "\n".join(lines))
+        lines = [format_notion_item(item) for item in notion_data]
+        sections.append(f"### {when} Notion에서 작업한 내용\n" + "\n".join(lines))
 
     if github_data:
-        lines = []
-        for item in github_data:
-            lines.append(f"- [{item['repo']}] {item['message']}")
-        sections.append("### 오늘 GitHub 커밋\n" + "\n".join(lines))
+        lines = [format_github_item(item) for item in github_data]
+        sections.append(f"### {when} GitHub 커밋\n" + "\n".join(lines))
 
     if not sections:
-        data_block = "(오늘 수집된 데이터가 없습니다. '오늘은 기록된 활동이 없어요. 직접 하루를 돌아봐 주세요!'라고 안내해주세요.)"
+        data_block = (
+            f"({when} 수집된 데이터가 없습니다. "
+            f"'{that_day}은 기록된 활동이 없어요. 직접 하루를 돌아봐 주세요!'라고 안내해주세요.)"
+        )
     else:
         data_block = "\n\n".join(sections)
 
-    return f"""아래는 오늘 하루 동안의 활동 데이터입니다.
+    return f"""아래는 {when} 하루 동안의 활동 데이터입니다.
 
 ---
 {data_block}
 ---
 
-위 데이터를 분석하여, 오늘 한 일 중 가장 의미 있는 **3가지**를 골라 정리해주세요."""
+위 데이터를 분석하여, {that_day} 한 일 중 가장 의미 있는 **3가지**를 골라 정리해주세요."""
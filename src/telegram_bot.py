@@ -1,53 +1,363 @@
-"""Telegram Bot으로 일기 요약 전송 및 코멘트 수신"""
+"""Telegram Bot으로 일기 요약 전송 및 코멘트 수신
+
+모든 Telegram 호출은 봇 토큰당 하나의 TelegramSession을 통해 이루어진다
+(배치 실행에서 같은 봇을 쓰는 사용자들은 세션 하나를 함께 쓴다).
+세션은 전용 스레드에서 이벤트 루프 하나를 돌리며 Bot(연결 풀)을 재사용하고,
+아래의 동기 함수들은 코루틴을 그 루프에 넘겨 결과를 기다린다.
+
+받은 메시지는 세션의 채팅별 받은편지함을 거친다. getUpdates는 봇 단위라서, 같은 봇을 쓰는
+사용자 중 누가 받아도 메시지는 보낸 채팅의 받은편지함에 들어가고 그 사용자가 꺼내 간다.
+세션을 닫을 때 아무도 꺼내 가지 않은 메시지는 로컬 캐시에 남겨 다음 실행에서 전달한다.
+python-telegram-bot은 세션을 처음 만들 때(봇 토큰이 있을 때만) 불러온다.
+"""
 
 import os
 import asyncio
+import hashlib
+import json
+import threading
+import time
+import functools
+from concurrent.futures import Future
+
+import config
+from src.local_cache import update_json
+from src.metrics import record
+from src.rate_limit import bucket_key, get_bucket, retry_delay
+from src.user_context import get_env
+
+
+@functools.cache
+def _bot_request_class():
+    """_BotRequest 클래스를 만든다. python-telegram-bot은 세션을 처음 만들 때 불러온다."""
+    from telegram.request import HTTPXRequest
+
+    class _BotRequest(HTTPXRequest):
+        """Bot API 호출에 공유 요청 한도와 429 재시도를 적용하고, 호출마다 metrics span을 남긴다.
+
+        getUpdates(롱 폴링)는 전송 한도와 무관하므로 버킷을 거치지 않는다.
+        """
+
+        async def do_request(self, url, method, request_data=None, **kwargs):
+            # url에는 봇 토큰이 들어 있으므로 마지막 조각(API 메서드 이름)만 남긴다
+            api_method = url.rsplit("/", 1)[-1]
+            limited = api_method != "getUpdates"
+            # 봇(토큰)별로 한도를 센다 — url의 끝에서 두 번째 조각이 "bot<토큰>"
+            bucket = get_bucket(bucket_key("telegram", url.rsplit("/", 2)[-2]))
+            attempts = config.RETRY_MAX_ATTEMPTS
+
+            for attempt in range(attempts):
+                if limited:
+                    wait = bucket.reserve()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+
+                start = time.monotonic()
+                status = "error"
+                payload = b""
+                try:
+                    status, payload = await super().do_request(url, method, request_data=request_data, **kwargs)
+                finally:
+                    sent = len(request_data.json_payload) if request_data and not request_data.contains_files else 0
+                    record("telegram", api_method, time.monotonic() - start, sent, len(payload), status)
+
+                if status != 429 or attempt == attempts - 1:
+                    return status, payload
+
+                try:
+                    retry_after = json.loads(payload)["parameters"]["retry_after"]
+                except (ValueError, KeyError, TypeError):
+                    retry_after = None
+                if retry_after is not None and retry_after > config.RETRY_MAX_DELAY:
+                    return status, payload
+                delay = retry_delay(attempt, retry_after)
+                bucket.pause(delay)
+                print(f"[Telegram] {api_method} 429 - {delay:.1f}초 후 재시도")
+                await asyncio.sleep(delay)
+
+    return _BotRequest
+
+
+# 세션을 닫을 때 전달하지 못한 메시지 — {봇 토큰 해시: {chat ID: [{"text", "date"}]}}
+INBOX_FILE = "telegram_inbox.json"
+# Telegram도 확인하지 않은 업데이트를 24시간 뒤에 버린다
+INBOX_MAX_AGE = 24 * 3600
+
+
+class TelegramSession:
+    """이벤트 루프 하나와 Bot 하나를 실행 내내 유지하는 Telegram 클라이언트."""
+
+    def __init__(self, token: str):
+        from telegram import Bot
+
+        request_class = _bot_request_class()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="telegram", daemon=True)
+        self._thread.start()
+        self.bot = Bot(
+            token=token,
+            base_url=os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org/bot"),
+            request=request_class(connection_pool_size=4),
+            get_updates_request=request_class(connection_pool_size=1),
+        )
+        # 받은편지함은 세션 루프에서만 다룬다
+        self._token_key = hashlib.sha256(token.encode()).hexdigest()[:16]
+        self._inbox: dict[str, list[dict]] = self._load_inbox()
+        self._offset = None  # 다음 getUpdates에 넘길 offset (넘기면 그 앞은 확정된다)
+        self._confirmed = None
+        self._poll_lock = None
+
+    def _load_inbox(self) -> dict[str, list[dict]]:
+        taken = {}
+
+        def take(saved: dict) -> dict:
+            taken.update(saved.pop(self._token_key, {}))
+            return saved
+
+        # 봇 토큰마다 세션이 따로 있으므로 파일 전체를 잠근 채 이 토큰 몫만 꺼낸다
+        update_json(INBOX_FILE, take, {}, shared=True)
+        cutoff = time.time() - INBOX_MAX_AGE
+        return {chat: kept for chat, messages in taken.items() if (kept := [m for m in messages if m["date"] >= cutoff])}
+
+    async def receive(self, chat_id: str, timeout: int = 0) -> list[str]:
+        """chat_id의 받은편지함 메시지를 반환한다 (꺼내지 않음, ack로 지운다).
+
+        비어 있으면 getUpdates를 한 번 (최대 timeout초 롱 폴링) 호출해 받은 메시지를 채팅별로 나눠 넣는다.
+        같은 봇의 getUpdates가 겹치면 Telegram이 거부하므로 세션당 한 번에 하나만 부른다.
+        """
+        chat_id = str(chat_id)
+        if self._poll_lock is None:
+            self._poll_lock = asyncio.Lock()
+        async with self._poll_lock:
+            if not self._inbox.get(chat_id):
+                updates = await self.bot.get_updates(
+                    offset=self._offset, timeout=timeout, allowed_updates=["message"],
+                )
+                for update in updates:
+                    self._offset = update.update_id + 1
+                    message = update.message
+                    if message and message.text:
+                        self._inbox.setdefault(str(message.chat_id), []).append(
+                            {"text": message.text, "date": message.date.timestamp()},
+                        )
+            return [m["text"] for m in self._inbox.get(chat_id, [])]
+
+    def ack(self, chat_id: str, count: int):
+        """receive로 받은 메시지 중 앞의 count개를 처리 완료로 지운다 (세션 루프에서 호출)."""
+        chat_id = str(chat_id)
+        messages = self._inbox.get(chat_id, [])
+        del messages[:count]
+        if not messages:
+            self._inbox.pop(chat_id, None)
+
+    async def confirm(self):
+        """받은편지함에 옮긴 업데이트까지 Telegram에 확정한다 (다시 받지 않게)."""
+        if self._offset is None or self._offset == self._confirmed:
+            return
+        if self._poll_lock is None:
+            self._poll_lock = asyncio.Lock()
+        if self._poll_lock.locked():
+            # 다른 사용자가 롱 폴링 중이면 그 다음 getUpdates가 확정한다
+            return
+        async with self._poll_lock:
+            await self.bot.get_updates(offset=self._offset, timeout=0)
+            self._confirmed = self._offset
+
+    def _save_inbox(self):
+        def put(saved: dict) -> dict:
+            if self._inbox:
+                saved[self._token_key] = self._inbox
+            else:
+                saved.pop(self._token_key, None)
+            return saved
+
+        update_json(INBOX_FILE, put, {}, shared=True)
+        if self._inbox:
+            print(f"[Telegram] 전달하지 못한 메시지 {sum(map(len, self._inbox.values()))}개 - 다음 실행에서 전달")
+
+    def submit(self, coro):
+        """코루틴을 세션 루프에 넘기고 concurrent.futures.Future를 반환한다."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout: float | None = None):
+        """코루틴을 세션 루프에서 실행하고 결과를 기다린다 (어느 스레드에서든 호출 가능)."""
+        return self.submit(coro).result(timeout)
+
+    def close(self):
+        """남은 메시지를 저장하고, 연결 풀을 닫고 이벤트 루프를 멈춘다."""
+        try:
+            self.run(self.confirm(), timeout=10)
+        except Exception as e:
+            print(f"[Telegram] 업데이트 확정 실패: {e}")
+        self._save_inbox()
+        try:
+            self.run(self.bot.shutdown(), timeout=10)
+        except Exception as e:
+            print(f"[Telegram] 세션 종료 오류: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop.close()
+
+
+_sessions: dict[str, TelegramSession] = {}
+_session_lock = threading.Lock()
+
+
+def _get_session() -> tuple[TelegramSession, str] | tuple[None, None]:
+    """현재 사용자의 봇 토큰에 해당하는 공유 세션과 chat ID를 반환한다. 설정이 없으면 (None, None)."""
+    token = get_env("TELEGRAM_BOT_TOKEN")
+    chat_id = get_env("TELEGRAM_CHAT_ID")
+
+    if not token or not chat_id:
+        return None, None
 
-from telegram import Bot, Update
-from telegram.ext import ApplicationBuilder, MessageHandler, filters
+    with _session_lock:
+        session = _sessions.get(token)
+        if session is None:
+            session = TelegramSession(token)
+            _sessions[token] = session
+        return session, chat_id
+
+
+def close_session():
+    """공유 세션을 모두 닫는다. 실행이 끝날 때 한 번 호출한다."""
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
 
 
 def send_message(text: str) -> bool:
     """Telegram으로 임의 메시지를 전송한다."""
-    token = os.environ.get("TELEGRAM_BOT_TOKEN")
-    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
-
-    if not token or not chat_id:
+    session, chat_id = _get_session()
+    if not session:
         return False
 
-    async def _send():
-        bot = Bot(token=token)
-        await bot.send_message(chat_id=chat_id, text=text)
-
     try:
-        asyncio.run(_send())
+        session.run(session.bot.send_message(chat_id=chat_id, text=text))
         return True
     except Exception as e:
         print(f"[Telegram] 메시지 전송 실패: {e}")
         return False
 
 
+def _format_summary(summary: str) -> str:
+    """요약 메시지 본문을 만든다."""
+    return f"오늘 하루 정리\n{'=' * 20}\n\n{summary}\n\n---\n코멘트를 남겨주세요. 오늘 하루는 어땠나요?"
+
+
+class StreamingSummary:
+    """요약이 생성되는 동안 Telegram 메시지 하나를 계속 고쳐 쓰는 헬퍼.
+
+    start()로 자리표시 메시지를 먼저 보내고, update(text)는
+    config.TELEGRAM_EDIT_INTERVAL 간격으로만 편집을 보낸다 (Telegram 편집 제한).
+    중간 편집은 Markdown이 깨질 수 있어 일반 텍스트로 보내고,
+    finish()가 send_summary와 같은 형식(Markdown)으로 최종본을 쓴다.
+    요약이 실패하거나 타임아웃되면 fail()이 메시지를 실패 안내로 바꾼다.
+    finish()/fail() 중 먼저 불린 쪽만 반영된다 (타임아웃 뒤에 끝난 생성이 안내를 덮어쓰지 않게).
+    """
+
+    def __init__(self):
+        self._session, self._chat_id = _get_session()
+        self._message_id = None
+        self._last_edit = 0.0
+        self._pending = None
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+    def start(self) -> bool:
+        """자리표시 메시지를 보낸다. 실패하면 False (일반 전송으로 대체)."""
+        if not self._session:
+            return False
+        try:
+            message = self._session.run(
+                self._session.bot.send_message(chat_id=self._chat_id, text="오늘 하루 정리 중..."),
+            )
+            self._message_id = message.message_id
+            return True
+        except Exception as e:
+            print(f"[Telegram] 스트리밍 메시지 시작 실패: {e}")
+            return False
+
+    def update(self, text: str):
+        """지금까지 생성된 텍스트로 메시지를 고친다 (간격 제한, 이전 편집이 끝나지 않았으면 건너뜀)."""
+        if self._message_id is None or self._closed:
+            return
+        now = time.monotonic()
+        if now - self._last_edit < config.TELEGRAM_EDIT_INTERVAL:
+            return
+        if self._pending and not self._pending.done():
+            return
+        self._last_edit = now
+        self._pending = self._session.submit(self._edit(f"오늘 하루 정리 중...\n\n{text}", parse_mode=None))
+
+    def _close(self) -> bool:
+        """메시지를 마지막으로 고칠 권한을 얻는다. 이미 finish/fail 했으면 False."""
+        with self._close_lock:
+            if self._message_id is None or self._closed:
+                return False
+            self._closed = True
+        if self._pending:
+            try:
+                self._pending.result(timeout=10)
+            except Exception:
+                pass
+        return True
+
+    def finish(self, summary: str) -> bool:
+        """최종 요약으로 메시지를 고친다. 성공 여부를 반환한다."""
+        if not self._close():
+            return False
+        text = _format_summary(summary)
+        try:
+            self._session.run(self._edit(text, parse_mode="Markdown"))
+        except Exception:
+            # Markdown 해석 실패 시 일반 텍스트로 한 번 더 시도
+            try:
+                self._session.run(self._edit(text, parse_mode=None))
+            except Exception as e:
+                print(f"[Telegram] 최종 요약 편집 실패: {e}")
+                return False
+        print("[Telegram] 요약 메시지 전송 완료 (스트리밍)")
+        return True
+
+    def fail(self, notice: str = "오늘 하루 정리에 실패했어요."):
+        """요약에 실패했을 때 자리표시/중간 텍스트를 실패 안내로 바꾼다."""
+        if not self._close():
+            return
+        try:
+            self._session.run(self._edit(notice, parse_mode=None))
+        except Exception as e:
+            print(f"[Telegram] 스트리밍 메시지 실패 안내 편집 실패: {e}")
+
+    async def _edit(self, text: str, parse_mode: str | None):
+        from telegram.error import BadRequest
+
+        try:
+            await self._session.bot.edit_message_text(
+                chat_id=self._chat_id, message_id=self._message_id, text=text, parse_mode=parse_mode,
+            )
+        except BadRequest as e:
+            # 내용이 같으면 Telegram이 거부하지만 문제 없음
+            if "not modified" not in str(e).lower():
+                raise
+
+
 def send_summary(summary: str) -> bool:
     """Telegram으로 오늘의 요약을 전송한다.
 
     Returns:
         성공 여부
     """
-    token = os.environ.get("TELEGRAM_BOT_TOKEN")
-    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
-
-    if not token or not chat_id:
+    session, chat_id = _get_session()
+    if not session:
         print("[Telegram] TELEGRAM_BOT_TOKEN 또는 TELEGRAM_CHAT_ID가 설정되지 않음 - 건너뜀")
         return False
 
-    message = f"오늘 하루 정리\n{'=' * 20}\n\n{summary}\n\n---\n코멘트를 남겨주세요. 오늘 하루는 어땠나요?"
-
-    async def _send():
-        bot = Bot(token=token)
-        await bot.send_message(chat_id=chat_id, text=message, parse_mode="Markdown")
+    message = _format_summary(summary)
 
     try:
-        asyncio.run(_send())
+        session.run(session.bot.send_message(chat_id=chat_id, text=message, parse_mode="Markdown"))
         print("[Telegram] 요약 메시지 전송 완료")
         return True
     except Exception as e:
@@ -55,58 +365,107 @@ def send_summary(summary: str) -> bool:
         return False
 
 
-def wait_for_reply(timeout: int = 21600) -> str | None:
-    """Telegram에서 사용자의 코멘트를 대기한다.
+def wait_for_replies(
+    timeout: int = 21600,
+    poll_timeout: int | None = None,
+    burst_window: float | None = None,
+    burst_max: float | None = None,
+) -> list[str]:
+    """getUpdates 롱 폴링으로 사용자의 답장을 기다린다.
+
+    첫 답장이 오는 즉시 깨어나고, 이어서 burst_window초 안에 오는 메시지까지 함께 모은다.
+    메시지가 계속 와도 첫 답장 후 burst_max초, 또는 대기를 시작한 지 timeout초가 지나면 멈춘다.
+    받은 메시지는 모두 소비(offset 확정)된다.
 
     Args:
-        timeout: 대기 시간 (초), 기본 6시간
+        timeout: 첫 답장까지 최대 대기 시간 (초)
+        poll_timeout: getUpdates 서버 측 대기 시간 (초), None이면 config 값
+        burst_window: 연속 메시지 수집 시간 (초), None이면 config 값
+        burst_max: 연속 메시지를 모으는 최대 시간 (초), None이면 config 값
 
     Returns:
-        사용자 코멘트 텍스트, 타임아웃 시 None
+        답장 텍스트 리스트, 타임아웃 시 빈 리스트
     """
-    token = os.environ.get("TELEGRAM_BOT_TOKEN")
-    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
-
-    if not token or not chat_id:
+    session, chat_id = _get_session()
+    if not session:
         print("[Telegram] 설정 누락 - 코멘트 수신 건너뜀")
-        return None
-
-    reply_text = None
-
-    async def _poll():
-        nonlocal reply_text
-        app = ApplicationBuilder().token(token).build()
-
-        async def handle_message(update: Update, context):
-            nonlocal reply_text
-            if str(update.effective_chat.id) == str(chat_id):
-                reply_text = update.message.text
-                app.stop_running()
-
-        app.add_handler(MessageHandler(filters.TEXT, handle_message))
+        return []
 
-        print(f"[Telegram] 코멘트 대기 중 (최대 {timeout // 60}분)...")
+    poll_timeout = config.TELEGRAM_LONG_POLL_TIMEOUT if poll_timeout is None else poll_timeout
+    burst_window = config.TELEGRAM_REPLY_BURST_WINDOW if burst_window is None else burst_window
+    burst_max = config.TELEGRAM_REPLY_BURST_MAX if burst_max is None else burst_max
 
-        async with app:
-            await app.start()
+    async def _wait():
+        replies = []
+        arrived = asyncio.Event()
+
+        async def _long_poll():
+            while True:
+                try:
+                    messages = await session.receive(chat_id, timeout=poll_timeout)
+                except Exception as e:
+                    print(f"[Telegram] 롱 폴링 오류 - 재시도: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                if messages:
+                    session.ack(chat_id, len(messages))
+                    replies.extend(messages)
+                    arrived.set()
+
+        loop = asyncio.get_running_loop()
+        wait_deadline = loop.time() + timeout
+        poller = asyncio.create_task(_long_poll())
+        try:
             try:
-                await asyncio.wait_for(
-                    _wait_until_stopped(app),
-                    timeout=timeout,
-                )
+                await asyncio.wait_for(arrived.wait(), timeout=timeout)
             except asyncio.TimeoutError:
                 print("[Telegram] 코멘트 대기 시간 초과")
-            finally:
-                await app.stop()
+                return replies
+
+            # 첫 답장 이후 잠시 조용해질 때까지 이어지는 메시지를 모은다 (전체 시간 상한 있음)
+            deadline = min(wait_deadline, loop.time() + burst_max)
+            while True:
+                count = len(replies)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    print("[Telegram] 연속 메시지 수집 시간 상한 도달")
+                    break
+                await asyncio.sleep(min(burst_window, remaining))
+                if len(replies) == count:
+                    break
+        finally:
+            poller.cancel()
+            try:
+                await poller
+            except (asyncio.CancelledError, Exception):
+                pass
+            await session.confirm()
+        return replies
+
+    print(f"[Telegram] 코멘트 대기 중 (최대 {timeout // 60}분)...")
 
     try:
-        asyncio.run(_poll())
+        replies = session.run(_wait())
     except Exception as e:
         print(f"[Telegram] 코멘트 수신 오류: {e}")
+        return []
+
+    if replies:
+        print(f"[Telegram] 코멘트 {len(replies)}개 수신: {replies[0][:50]}...")
+    return replies
 
-    if reply_text:
-        print(f"[Telegram] 코멘트 수신: {reply_text[:50]}...")
-    return reply_text
+
+def wait_for_reply(timeout: int = 21600) -> str | None:
+    """Telegram에서 사용자의 코멘트를 대기한다.
+
+    Args:
+        timeout: 대기 시간 (초), 기본 6시간
+
+    Returns:
+        사용자 코멘트 텍스트 (연속 메시지는 줄바꿈으로 합침), 타임아웃 시 None
+    """
+    replies = wait_for_replies(timeout=timeout)
+    return "\n".join(replies) if replies else None
 
 
 def get_all_replies(consume: bool = True) -> list[str]:
@@ -118,34 +477,19 @@ def get_all_replies(consume: bool = True) -> list[str]:
     Returns:
         개별 메시지 텍스트 리스트
     """
-    token = os.environ.get("TELEGRAM_BOT_TOKEN")
-    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
-
-    if not token or not chat_id:
+    session, chat_id = _get_session()
+    if not session:
         return []
 
     async def _get():
-        bot = Bot(token=token)
-        updates = await bot.get_updates()
-
-        replies = []
-        max_update_id = None
-
-        for update in updates:
-            if (update.message
-                    and update.message.text
-                    and str(update.message.chat_id) == str(chat_id)):
-                replies.append(update.message.text)
-            if max_update_id is None or update.update_id > max_update_id:
-                max_update_id = update.update_id
-
-        if consume and max_update_id is not None:
-            await bot.get_updates(offset=max_update_id + 1)
-
+        replies = await session.receive(chat_id)
+        if consume:
+            session.ack(chat_id, len(replies))
+            await session.confirm()
         return replies
 
     try:
-        replies = asyncio.run(_get())
+        replies = session.run(_get())
         if replies:
             print(f"[Telegram] 미처리 메시지 {len(replies)}개 발견")
         else:
@@ -156,6 +500,47 @@ def get_all_replies(consume: bool = True) -> list[str]:
         return []
 
 
+def start_reply_listener(on_replies) -> Future | None:
+    """답장을 상시 수신하는 롱 폴링 루프를 세션 루프에서 시작한다 (데몬 모드용).
+
+    같은 채팅에서 메시지가 오면 한 번에 받은 묶음을 on_replies(list[str])로 넘긴다.
+    on_replies는 블로킹 호출(Notion 저장 등)을 해도 되도록 별도 스레드에서 실행되며,
+    정상 반환한 경우에만 offset을 확정한다.
+
+    Returns:
+        취소 가능한 Future (future.cancel()로 중지), 설정 누락 시 None
+    """
+    session, chat_id = _get_session()
+    if not session:
+        print("[Telegram] 설정 누락 - 답장 수신기 시작 안 함")
+        return None
+
+    async def _listen():
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                replies = await session.receive(chat_id, timeout=config.TELEGRAM_LONG_POLL_TIMEOUT)
+            except Exception as e:
+                print(f"[Telegram] 롱 폴링 오류 - 재시도: {e}")
+                await asyncio.sleep(5)
+                continue
+
+            if not replies:
+                continue
+            try:
+                await loop.run_in_executor(None, on_replies, replies)
+            except Exception as e:
+                # 처리 실패 시 받은편지함에 남겨 두고 (Telegram에도 확정하지 않음) 다시 시도한다
+                print(f"[Telegram] 답장 처리 실패 - 재시도 예정: {e}")
+                await asyncio.sleep(5)
+                continue
+            session.ack(chat_id, len(replies))
+            await session.confirm()
+
+    print("[Telegram] 답장 수신기 시작")
+    return session.submit(_listen())
+
+
 def get_latest_reply(consume: bool = True) -> str | None:
     """Telegram에서 미확인 메시지를 모두 가져와 합쳐서 반환한다.
 
@@ -164,9 +549,3 @@ def get_latest_reply(consume: bool = True) -> str | None:
     """
     replies = get_all_replies(consume=consume)
     return "\n".join(replies) if replies else None
-
-
-async def _wait_until_stopped(app):
-    """앱이 중지될 때까지 대기하는 헬퍼."""
-    while app.running:
-        await asyncio.sleep(0.5)
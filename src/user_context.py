@@ -0,0 +1,61 @@
+"""한 프로세스에서 여러 사용자의 파이프라인을 돌릴 때 사용자별 자격 증명을 구분하는 모듈
+
+수집기/저장소/전송 모듈은 자격 증명을 get_env()로 읽는다. 단일 사용자 실행에서는
+os.environ을 그대로 쓰고, 배치 실행(src.batch)에서는 그 스레드에 활성화된 사용자
+컨텍스트(로스터의 값)만 쓴다 — 다른 사용자나 프로세스 환경의 값이 섞이지 않는다.
+
+컨텍스트는 contextvars로 전달되므로, 스레드 풀에 작업을 넘길 때는
+submit_with_context로 호출한 쪽의 컨텍스트를 함께 넘긴다.
+"""
+
+import contextvars
+import os
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class UserContext:
+    """배치 실행에서 한 사용자의 식별자와 환경 변수 (NOTION_TOKEN 등)."""
+
+    user_id: str
+    env: dict[str, str] = field(default_factory=dict)
+
+
+_current: contextvars.ContextVar[UserContext | None] = contextvars.ContextVar("haru_user", default=None)
+
+
+def get_env(name: str, default: str | None = None) -> str | None:
+    """현재 사용자의 설정값을 반환한다. 사용자 컨텍스트가 없으면 os.environ을 읽는다."""
+    user = _current.get()
+    if user is None:
+        return os.environ.get(name, default)
+    return user.env.get(name, default)
+
+
+def current_user() -> str | None:
+    """현재 사용자 ID. 단일 사용자 실행이면 None."""
+    user = _current.get()
+    return user.user_id if user else None
+
+
+@contextmanager
+def use_user(user: UserContext):
+    """with 블록 안에서 user의 자격 증명을 쓴다."""
+    token = _current.set(user)
+    try:
+        yield user
+    finally:
+        _current.reset(token)
+
+
+def submit_with_context(executor: Executor, fn, *args, **kwargs) -> Future:
+    """호출한 스레드의 사용자 컨텍스트를 유지한 채 fn을 스레드 풀에 넘긴다."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def map_with_context(executor: Executor, fn, items) -> list:
+    """executor.map처럼 순서대로 결과를 반환하되 사용자 컨텍스트를 유지한다."""
+    futures = [submit_with_context(executor, fn, item) for item in items]
+    return [future.result() for future in futures]